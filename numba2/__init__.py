@@ -6,7 +6,7 @@ import unittest
 
 from pykit.utils.pattern import match as pyoverload
 
-from .entrypoints import jit, ijit, sjit, abstract
+from .entrypoints import jit, ijit, sjit, abstract, vectorize
 from .compiler import (annotate, overload, overloadable)
 from .typing import (overlay, parse, unify, free, UnificationError)
 from .rules import typeof, convert, promote, typejoin, is_numba_type
@@ -16,10 +16,13 @@ from .runtime import cast, NULL
 from .runtime.interfaces.interface import implements
 from .runtime.ffi import sizeof, malloc
 from .runtime import builtins as bltins
+from .runtime.builtins import prange, prod
 from .runtime.obj.librt import debug
 from .runtime.special import addressof
 
 from .passes import translate
+from .background import warmup
+from .eager import precompile
 from .errors import error, InferError, SpecializeError
 
 __version__ = '0.1'
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+
+"""
+Ahead-of-time compilation of numba functions to object files and shared
+libraries.
+
+    from numba2 import aot
+    aot.compile_module(mymodule, {'f': ['int32 -> int32 -> int32']},
+                       'build/mymodule.so')
+
+or from the command line:
+
+    bin/numba --aot build/mymodule.so -s 'f:int32 -> int32 -> int32' mymodule.py
+
+Every specialization is exported as a C-callable symbol, named after the
+function and its argument types (e.g. f_int32_int32, see mangle()). Along
+with a shared library we emit a loader module (e.g. build/mymodule.py),
+which binds the symbols to python callables through ctypes only, so the
+compiled functions can be used without numba.
+
+Only functions with C primitive argument and return types (integers,
+floats, booleans and pointers) can be exported, and the generated code may
+not refer to objects of the compiling process (e.g. through the garbage
+collector or python objects).
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import subprocess
+
+from numba2.errors import CompileError
+
+#===------------------------------------------------------------------===
+# Entry points
+#===------------------------------------------------------------------===
+
+def compile_module(module, signatures, output, emit='shared', loader=None):
+    """
+    Compile functions of a module (or dict of globals) for the given
+    signatures: { function name : [signature] }. See `compile`.
+    """
+    scope = module if isinstance(module, dict) else vars(module)
+    functions = []
+    for name, sigs in sorted(signatures.items()):
+        if name not in scope:
+            raise CompileError("No function %r in module" % (name,))
+        if isinstance(sigs, basestring):
+            sigs = [sigs]
+        for sig in sigs:
+            functions.append((scope[name], parse_signature(sig, scope)))
+
+    return compile(functions, output, emit, loader)
+
+def compile(functions, output, emit='shared', loader=None):
+    """
+    Compile a list of (FunctionWrapper, signature) pairs ahead of time.
+
+    Arguments
+    =========
+    output: str
+        object file or shared library to write
+    emit: 'shared' or 'object'
+        whether to emit a shared library or an object file
+    loader: str, optional
+        file name of the python loader module to emit for a shared library.
+        Defaults to `output` with a .py extension, pass False to skip.
+
+    Returns a list of Export entries.
+    """
+    from numba2.compiler.backend import llvm
+
+    if emit not in ('shared', 'object'):
+        raise ValueError("Expected 'shared' or 'object', got %r" % (emit,))
+
+    exports = [export(func, signature) for func, signature in functions]
+
+    # -------------------------------------------------
+    # Build a single module with C wrappers
+
+    name = os.path.splitext(os.path.basename(output))[0]
+    lfuncs = [e.lfunc for e in exports]
+    lfuncs += [lfunc for e in exports for lfunc in e.callees]
+    module = llvm.extract_module(lfuncs, name,
+                                 [e.lfunc.name for e in exports])
+    if llvm.embeds_addresses(module):
+        raise CompileError(
+            "Cannot compile ahead of time: the generated code refers to "
+            "objects of the compiling process")
+
+    for e in exports:
+        llvm.add_c_wrapper(module, e.lfunc.name, e.symbol)
+
+    obj = llvm.emit_object(module)
+
+    # -------------------------------------------------
+    # Write output
+
+    if emit == 'object':
+        with open(output, 'wb') as f:
+            f.write(obj)
+    else:
+        link_shared(obj, output)
+        if loader is None:
+            loader = os.path.splitext(output)[0] + '.py'
+        if loader:
+            write_loader(loader, os.path.basename(output), exports)
+
+    return exports
+
+#===------------------------------------------------------------------===
+# Exports
+#===------------------------------------------------------------------===
+
+class Export(object):
+    """A compiled specialization exported under a C symbol"""
+
+    def __init__(self, name, symbol, argtypes, restype, lfunc, callees):
+        self.name = name
+        self.symbol = symbol
+        self.argtypes = argtypes
+        self.restype = restype
+        self.lfunc = lfunc
+        self.callees = callees  # llvm functions of the callgraph
+
+def export(func, signature):
+    """Compile `func` for `signature` and verify it has a C signature"""
+    from numba2 import phase, environment
+    from pykit.analysis import callgraph
+
+    argtypes = list(signature.argtypes)
+    env = environment.fresh_env(func, argtypes)
+    f, env = phase.lower(func, env)
+    lfunc, env = phase.codegen_phase(f, env)
+    restype = env["numba.typing.restype"]
+
+    # Callees live in modules of their own unless the callgraph was linked
+    # into a single module (see numba.link.mode)
+    envs = env["numba.state.envs"]
+    callees = [envs[g]["numba.state.llvm_func"]
+                   for g in callgraph.callgraph(f).node if g != f]
+
+    for type in argtypes + [restype]:
+        if ctype_name(type) is None:
+            raise CompileError(
+                "Cannot export %s with type %s, only C primitive types are "
+                "supported" % (func.py_func.__name__, type))
+
+    name = func.py_func.__name__
+    return Export(name, mangle(name, argtypes), argtypes, restype, lfunc,
+                  callees)
+
+def parse_signature(sig, scope):
+    """Parse a signature string, e.g. 'int32 -> float64 -> float64'"""
+    from numba2 import typing, types
+
+    if isinstance(sig, basestring):
+        scope = dict(vars(types), **scope)
+        sig = typing.resolve(typing.parse(sig), scope, {})
+    return sig
+
+def mangle(name, argtypes):
+    """
+    Symbol of a specialization: the function name followed by the name of
+    each argument type, e.g. f_int32_float64 for f(int32, float64).
+    """
+    return '_'.join([name] + [symbol_name(t) for t in argtypes])
+
+def symbol_name(type):
+    """
+    Name of a type in symbols: int32, uint8, float64, bool, or ptr_ followed
+    by the name of the base type for pointers.
+    """
+    from numba2.runtime.obj import Int, Float, Bool, Pointer
+
+    if type.impl is Int:
+        nbits, unsigned = type.parameters
+        return '%sint%d' % ('u' if unsigned else '', nbits)
+    elif type.impl is Float:
+        [nbits] = type.parameters
+        return 'float%d' % (nbits,)
+    elif type.impl is Bool:
+        return 'bool'
+    elif type.impl is Pointer:
+        [base] = type.parameters
+        return 'ptr_' + symbol_name(base)
+    return re.sub(r'\W+', '_', str(type))
+
+def ctype_name(type):
+    """Name of the ctypes type for a C primitive, or None"""
+    from numba2.types import void
+    from numba2.conversion import ctype
+    from numba2.runtime.obj import Int, Float, Bool, Pointer
+
+    if type == void:
+        return 'None'
+    elif type.impl is Pointer:
+        return 'c_void_p'
+    elif type.impl in (Int, Float, Bool):
+        return ctype(type).__name__
+    return None
+
+#===------------------------------------------------------------------===
+# Linking
+#===------------------------------------------------------------------===
+
+def link_shared(obj, output):
+    """Link object code into a shared library with the system compiler"""
+    cc = os.environ.get('CC', 'cc')
+    tmpdir = tempfile.mkdtemp()
+    try:
+        objfile = os.path.join(tmpdir, 'module.o')
+        with open(objfile, 'wb') as f:
+            f.write(obj)
+
+        flags = ['-shared']
+        if sys.platform == 'darwin':
+            flags += ['-undefined', 'dynamic_lookup']
+
+        cmd = [cc] + flags + ['-o', output, objfile]
+        try:
+            subprocess.check_call(cmd)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise CompileError("Linking failed (%s): %s" % (" ".join(cmd), e))
+    finally:
+        shutil.rmtree(tmpdir)
+
+#===------------------------------------------------------------------===
+# Loader
+#===------------------------------------------------------------------===
+
+loader_template = '''\
+# -*- coding: utf-8 -*-
+
+"""
+Loader for %(libname)s, generated by numba2.aot. Does not require numba.
+"""
+
+import os
+import ctypes
+
+_lib = ctypes.CDLL(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                %(libname)r))
+
+_kinds = { bool: 'b', int: 'i', float: 'f' }
+try:
+    _kinds[long] = 'i'
+except NameError:
+    pass
+
+class CompiledFunction(object):
+    """
+    Function compiled ahead of time, dispatching on the python types of the
+    arguments.
+    """
+
+    def __init__(self, name):
+        self.__name__ = name
+        self.overloads = {}     # (kind) -> ctypes function
+        self.signatures = []
+
+    def add(self, symbol, argtypes, restype, kinds, signature):
+        cfunc = getattr(_lib, symbol)
+        cfunc.argtypes = [getattr(ctypes, t) for t in argtypes]
+        cfunc.restype = getattr(ctypes, restype) if restype != 'None' else None
+        self.overloads.setdefault(kinds, cfunc)
+        self.signatures.append(signature)
+
+    def __call__(self, *args):
+        kinds = tuple(_kinds.get(type(arg), 'p') for arg in args)
+        cfunc = self.overloads.get(kinds)
+        if cfunc is None:
+            for key, f in sorted(self.overloads.items()):
+                if len(key) == len(args) and all(
+                        k == a or (k == 'f' and a == 'i')
+                            for k, a in zip(key, kinds)):
+                    cfunc = f
+                    break
+            else:
+                raise TypeError("No compiled signature of %%s matches %%s" %% (
+                                    self.__name__, kinds))
+        return cfunc(*args)
+
+    def __repr__(self):
+        return "<compiled function %%s>" %% (self.__name__,)
+
+%(definitions)s
+'''
+
+def kind(ctype_name):
+    if ctype_name == 'c_bool':
+        return 'b'
+    elif ctype_name in ('c_float', 'c_double'):
+        return 'f'
+    elif ctype_name == 'c_void_p':
+        return 'p'
+    return 'i'
+
+def write_loader(filename, libname, exports):
+    """Write a python module binding the exported symbols"""
+    lines = []
+    names = []
+    for e in exports:
+        if e.name not in names:
+            names.append(e.name)
+            lines.append("%s = CompiledFunction(%r)" % (e.name, e.name))
+
+    for e in exports:
+        argtypes = [ctype_name(t) for t in e.argtypes]
+        signature = " -> ".join(str(t) for t in e.argtypes + [e.restype])
+        lines.append("%s.add(%r, %r, %r, %r, %r)" % (
+            e.name, e.symbol, argtypes, ctype_name(e.restype),
+            tuple(kind(t) for t in argtypes), signature))
+
+    with open(filename, 'w') as f:
+        f.write(loader_template % {
+            'libname': libname,
+            'definitions': "\n".join(lines),
+        })
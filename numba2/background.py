@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+Background compilation.
+
+Functions jitted with background=True do not block on compilation: the
+first call with new argument types schedules compilation on a background
+worker and runs the python function in the meantime. Once compilation
+finishes, subsequent calls use the compiled code.
+
+    @jit(background=True)
+    def f(x): ...
+
+    f(10)                           # interpreted, compiles f(int32)
+    f.compile_async([int32]).wait() # returns when f(int32) is compiled
+
+Specializations can be compiled ahead of the first call:
+
+    warmup([(f, 'int64 -> int64'), (g, [float64])])
+
+If compilation fails, the function keeps running in the interpreter and a
+warning is issued.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import threading
+import warnings
+from multiprocessing.pool import ThreadPool
+
+from numba2.config import config
+from numba2 import eager
+
+#===------------------------------------------------------------------===
+# Futures
+#===------------------------------------------------------------------===
+
+class CompileFuture(object):
+    """
+    Handle to the compilation of a specialization in the background. The
+    result is the CallStub of the compiled specialization.
+    """
+
+    def __init__(self, func, argtypes):
+        self.func = func
+        self.argtypes = list(argtypes)
+        self._event = threading.Event()
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Wait for compilation to finish, returns whether it did"""
+        self._event.wait(timeout)
+        return self.done()
+
+    def result(self, timeout=None):
+        """Return the compiled CallStub, raising any compilation error"""
+        exc = self.exception(timeout)
+        if exc is not None:
+            raise exc
+        return self._result
+
+    def exception(self, timeout=None):
+        """Return the compilation error, or None"""
+        if not self.wait(timeout):
+            raise RuntimeError("Compilation of %s%s did not finish in time" % (
+                self.func.py_func.__name__, tuple(self.argtypes)))
+        return self._exception
+
+    def add_done_callback(self, fn):
+        """Call fn(future) when compilation finishes"""
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _finish(self, result, exception):
+        with self._lock:
+            self._result = result
+            self._exception = exception
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+    def __repr__(self):
+        state = 'pending'
+        if self.done():
+            state = 'failed' if self._exception is not None else 'done'
+        return "<CompileFuture %s%s %s>" % (
+            self.func.py_func.__name__, tuple(self.argtypes), state)
+
+#===------------------------------------------------------------------===
+# Worker
+#===------------------------------------------------------------------===
+
+_pool = []
+_lock = threading.Lock()
+
+def _worker():
+    with _lock:
+        if not _pool:
+            _pool.append(ThreadPool(max(1, config.compile_threads)))
+        return _pool[0]
+
+def submit(func, argtypes):
+    """
+    Schedule compilation of FunctionWrapper `func` for `argtypes`, returns a
+    CompileFuture. Repeated submissions return the same future.
+    """
+    key = tuple(argtypes)
+    with _lock:
+        future = func.futures.get(key)
+        if future is not None:
+            return future
+        future = func.futures[key] = CompileFuture(func, argtypes)
+
+    _worker().apply_async(_compile, (future,))
+    return future
+
+def _compile(future):
+    try:
+        stub = future.func.translate_stub(future.argtypes)
+    except Exception as e:
+        warnings.warn("Compilation of %s%s failed, running in the "
+                      "interpreter: %s" % (future.func.py_func.__name__,
+                                           tuple(future.argtypes), e),
+                      RuntimeWarning)
+        future._finish(None, e)
+    else:
+        future._finish(stub, None)
+
+#===------------------------------------------------------------------===
+# Warmup
+#===------------------------------------------------------------------===
+
+def warmup(specializations, timeout=None):
+    """
+    Compile a list of (FunctionWrapper, signature) pairs in the background
+    and wait for them. Signatures are strings (e.g. 'int32 -> float64') or
+    lists of argument types. Returns the list of CompileFutures, raising the
+    first compilation error.
+    """
+    futures = []
+    for func, signature in specializations:
+        futures.append(submit(func, eager.argtypes(func, signature)))
+
+    for future in futures:
+        future.result(timeout)
+    return futures
@@ -28,9 +28,209 @@ relationship between stages.
 
 from __future__ import print_function, division, absolute_import
 
+import sys
+import weakref
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict, namedtuple
+
+try:
+    from collections import MutableMapping
+except ImportError:
+    from collections.abc import MutableMapping
+
+#===------------------------------------------------------------------===
+# LRU
+#===------------------------------------------------------------------===
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'size',
+                                     'nbytes', 'maxsize', 'maxbytes'])
+
+_lru_dicts = weakref.WeakSet() # All LRU dicts, shrunk after compilation
+_compiling = [0]               # Number of compilations in flight
+_compiling_lock = threading.Lock()
+
+class LRUDict(MutableMapping):
+    """
+    Dict evicting least recently used entries when holding more than
+    `maxsize` entries or more than `maxbytes` bytes (as estimated by
+    `sizeof`). Limits are unbounded when None.
+
+    Evicted entries are passed to the `on_evict` callbacks, which release
+    any state depending on them.
+    """
+
+    def __init__(self, maxsize=None, maxbytes=None, sizeof=None):
+        self.data = OrderedDict()
+        self.sizes = {}
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.on_evict = []
+        self.lock = threading.RLock()
+        _lru_dicts.add(self)
+
+    # Compare and hash by identity like any object, rather than as a
+    # mapping, so that we can be tracked in _lru_dicts
+    __hash__ = object.__hash__
+
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.data:
+                self.hits += 1
+                return self[key]
+            self.misses += 1
+            return default
+
+    def __getitem__(self, key):
+        with self.lock:
+            value = self.data.pop(key)
+            self.data[key] = value # Move to most recently used position
+            return value
+
+    def __setitem__(self, key, value):
+        size = self.sizeof(value) if self.sizeof else 0
+        with self.lock:
+            if key in self.data:
+                del self[key]
+
+            self.data[key] = value
+            self.sizes[key] = size
+            self.nbytes += size
+
+        if not _compiling[0]:
+            self.shrink()
+
+    def __delitem__(self, key):
+        with self.lock:
+            del self.data[key]
+            self.nbytes -= self.sizes.pop(key)
+
+    def pop(self, key, *default):
+        with self.lock:
+            if key not in self.data and default:
+                return default[0]
+            value = self.data[key]
+            del self[key]
+            return value
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def keys(self):
+        with self.lock:
+            return list(self.data.keys())
+
+    def values(self):
+        with self.lock:
+            return list(self.data.values())
+
+    def items(self):
+        """
+        Snapshot of the entries, which does not affect their recency (unlike
+        __getitem__, which would reorder the entries while iterating).
+        """
+        with self.lock:
+            return list(self.data.items())
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def full(self):
+        return ((self.maxsize is not None and len(self) > self.maxsize) or
+                (self.maxbytes is not None and self.nbytes > self.maxbytes))
+
+    def shrink(self):
+        """Evict entries until we are within our limits"""
+        while True:
+            with self.lock:
+                if not (self.data and self.full()):
+                    break
+                key, value = next(iter(self.data.items()))
+                del self[key]
+                self.evictions += 1
+
+            for callback in self.on_evict:
+                callback(key, value)
+
+    def clear_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self),
+                         self.nbytes, self.maxsize, self.maxbytes)
+
+
+@contextmanager
+def compiling():
+    """
+    Defer evictions until the outermost compilation finishes, so that state
+    of functions that are being compiled is never released. Compilations in
+    different threads count as nested.
+    """
+    with _compiling_lock:
+        _compiling[0] += 1
+    try:
+        yield
+    finally:
+        with _compiling_lock:
+            _compiling[0] -= 1
+            done = not _compiling[0]
+        if done:
+            for lru in list(_lru_dicts):
+                lru.shrink()
+
+#===------------------------------------------------------------------===
+# Memory accounting
+#===------------------------------------------------------------------===
+
+# Rough estimates in bytes, including types, metadata and uses
+OP_SIZE = 512
+NODE_SIZE = 256
+INSTR_SIZE = 256
+
+def estimate_size(value):
+    """
+    Estimate the memory held by a cache entry (IR functions, environments,
+    typing contexts, LLVM functions) in bytes.
+    """
+    if isinstance(value, tuple):
+        return sum(estimate_size(x) for x in value)
+    elif isinstance(value, dict):
+        context = value.get('numba.typing.context') or {}
+        return sys.getsizeof(value) + len(context) * NODE_SIZE
+    elif hasattr(value, 'constraints') and hasattr(value, 'graph'):
+        # Inference context
+        nodes = len(value.context) + len(value.constraints)
+        if value.graph is not None:
+            nodes += len(value.graph) + value.graph.number_of_edges()
+        return estimate_size(value.func) + nodes * NODE_SIZE
+    elif hasattr(value, 'ops') and hasattr(value, 'blocks'):
+        # IR function
+        return sum(1 for _ in value.ops) * OP_SIZE
+    elif hasattr(value, 'basic_blocks'):
+        # LLVM function
+        return sum(len(bb.instructions) for bb in value.basic_blocks) * INSTR_SIZE
+    return sys.getsizeof(value)
+
+#===------------------------------------------------------------------===
+# Phase caches
+#===------------------------------------------------------------------===
+
 class Cache(object):
-    def __init__(self):
-        self.cached = {}
+    def __init__(self, maxsize=None, maxbytes=None):
+        self.cached = LRUDict(maxsize, maxbytes, estimate_size)
 
     def lookup(self, key):
         return self.cached.get(key)
@@ -38,6 +238,12 @@ class Cache(object):
     def insert(self, key, value):
         self.cached[key] = value
 
+    def remove(self, key):
+        self.cached.pop(key, None)
+
+    def info(self):
+        return self.cached.info()
+
     __contains__ = lookup
     __getitem__ = lookup
 
@@ -71,9 +277,9 @@ class InferenceCache(object):
             principal type schemes
     """
 
-    def __init__(self):
-        self.typings = {}
-        self.ctxs = {}
+    def __init__(self, maxsize=None, maxbytes=None):
+        self.typings = LRUDict(maxsize, maxbytes, estimate_size)
+        self.ctxs = LRUDict(maxsize, maxbytes, estimate_size)
 
     def lookup(self, func, argtypes):
         return self.typings.get((func, tuple(argtypes)))
@@ -81,6 +287,157 @@ class InferenceCache(object):
     def lookup_ctx(self, func):
         return self.ctxs.get(func)
 
+    def remove(self, func):
+        """Remove all typings and contexts of `func`"""
+        self.ctxs.pop(func, None)
+        for key, (ctx, signature) in list(self.typings.items()):
+            if key[0] is func or ctx.func is func:
+                del self.typings[key]
+
+    def info(self):
+        return { 'typings': self.typings.info(), 'ctxs': self.ctxs.info() }
+
+#===------------------------------------------------------------------===
+# Eviction
+#===------------------------------------------------------------------===
+
+phase_caches = [
+    'numba.frontend.cache',
+    'numba.typing.cache',
+    'numba.opt.cache',
+    'numba.lowering.cache',
+    'numba.codegen.cache',
+]
+
+def install(root_env):
+    """
+    Release dependent state when entries are evicted from the phase caches
+    of `root_env`. Untyped functions (frontend) are released individually,
+    specializations (later phases) along with their copies and callers.
+    """
+    def evict_untyped(key, value):
+        func, env = value
+        release_function(func, root_env)
+
+    def evict_specialization(key, value):
+        func, env = value
+        release(func, env, root_env)
+
+    root_env['numba.frontend.cache'].cached.on_evict.append(evict_untyped)
+    for name in phase_caches[1:]:
+        root_env[name].cached.on_evict.append(evict_specialization)
+
+def set_limits(maxsize=None, maxbytes=None, caches=None, root_env=None):
+    """
+    Set the maximum number of entries and estimated number of bytes of the
+    given caches (names of environment keys), or all caches.
+    """
+    for lru in _lrus(caches, root_env).values():
+        lru.maxsize = maxsize
+        lru.maxbytes = maxbytes
+        if not _compiling[0]:
+            lru.shrink()
+
+def cache_info(caches=None, root_env=None):
+    """
+    Return a dict mapping cache names to CacheInfo tuples, with sizes and
+    hit/miss counts. 'numba.state.envs' gives the number of live
+    environments.
+    """
+    info = dict((name, lru.info())
+                    for name, lru in _lrus(caches, root_env).items())
+    if caches is None:
+        envs = _root(root_env)['numba.state.envs']
+        info['numba.state.envs'] = CacheInfo(0, 0, 0, len(envs), 0, None, None)
+    return info
+
+def _root(root_env):
+    from . import environment
+    return root_env or environment.root_env
+
+def _lrus(caches, root_env):
+    root_env = _root(root_env)
+    lrus = dict((name, root_env[name].cached) for name in phase_caches)
+    inference = root_env['numba.inference.cache']
+    lrus['numba.inference.cache.typings'] = inference.typings
+    lrus['numba.inference.cache.ctxs'] = inference.ctxs
+    if caches is not None:
+        lrus = dict((name, lrus[name]) for name in caches)
+    return lrus
+
+# ______________________________________________________________________
+
+def release_function(func, root_env):
+    """
+    Release the state of a single function: its environment, inference
+    contexts and generated LLVM code.
+    """
+    envs = root_env['numba.state.envs']
+    envs.pop(func, None)
+    root_env['numba.inference.cache'].remove(func)
+    llvm_cache = root_env.get('codegen.cache')
+    if llvm_cache is not None:
+        llvm_cache.pop(func, None)
+    for name in phase_caches:
+        cache = root_env[name]
+        for key, value in list(cache.cached.items()):
+            if key is func or value[0] is func:
+                cache.remove(key)
+
+def release(func, env, root_env, released=None):
+    """
+    Release a specialization: all copies of the function made by the phase
+    transitions, their environments and cached results, the specialization
+    held by the FunctionWrapper, and recursively any function calling into
+    one of the released functions.
+
+    The machine code is not freed, since native callers or ctypes function
+    pointers obtained by the user may still refer to it.
+    """
+    if released is None:
+        released = set()
+
+    envs = root_env['numba.state.envs']
+
+    # -------------------------------------------------
+    # Find all copies of the specialization, sharing the copies dict
+
+    copies = env.get('numba.state.copies')
+    funcs = dict((f, e) for f, e in envs.items()
+                     if e is env or (copies is not None and
+                                     e.get('numba.state.copies') is copies))
+    funcs[func] = env
+    funcs = dict((f, e) for f, e in funcs.items() if f not in released)
+    if not funcs:
+        return
+    released.update(funcs)
+
+    # -------------------------------------------------
+    # Release functions and compiled specializations
+
+    released_envs = list(funcs.values())
+    for f in funcs:
+        release_function(f, root_env)
+
+    for e in released_envs:
+        wrapper = e.get('numba.state.function_wrapper')
+        if wrapper is not None and hasattr(wrapper, 'release'):
+            wrapper.release(released_envs)
+
+    # -------------------------------------------------
+    # Release callers
+
+    callers = [(f, e) for f, e in envs.items()
+                   if f not in released and _calls_any(f, funcs)]
+    for f, e in callers:
+        release(f, e, root_env, released)
+
+def _calls_any(func, funcs):
+    for op in getattr(func, 'ops', ()):
+        if op.opcode == 'call' and op.args[0] in funcs:
+            return True
+    return False
+
 #===------------------------------------------------------------------===
 # lookup
 #===------------------------------------------------------------------===
@@ -5,10 +5,18 @@ Numba compiler backend leveraging pykit.
 """
 
 from __future__ import print_function, division, absolute_import
+import io
+import ctypes
+import threading
 
 from pykit.codegen.llvm import llvm_codegen
 from pykit.codegen import llvm
 import llvm.core as lc
+import llvm.passes as lp
+
+# The execution engine is shared by all functions and is not thread-safe.
+# Hold this lock while adding modules to it or looking up function pointers.
+engine_lock = threading.RLock()
 
 def codegen_init(func, env):
     """
@@ -38,19 +46,214 @@ def codegen_run(func, env):
     lfunc = llvm_codegen.translate(func, env, env["numba.state.llvm_func"])
     return lfunc, env
 
-#global_mod = lc.Module.new("global_module")
-
 def codegen_link(func, env):
     """
-    Link the llvm function into
+    Per-function link step. Functions of a callgraph are linked together by
+    `link` once all of them have been generated.
     """
     lfunc = env["numba.state.llvm_func"]
     return lfunc, env
 
-    #global_mod.link_in(lfunc.module, preserve=True)
-    #new_lfunc = global_mod.get_function_named(lfunc.name)
-    #
-    #env["numba.state.llvm_func"] = new_lfunc
-    #return new_lfunc, env
+def get_ctypes(func, env):
+    """
+    Retrieve a pointer to the compiled function. Linked functions live in a
+    module we added to the execution engine ourselves.
+    """
+    with engine_lock:
+        if not env.get("numba.state.linked"):
+            return llvm.get_ctypes(func, env)
+
+        engine = env["codegen.llvm.engine"]
+        cfunc = ctypes.c_void_p(engine.get_pointer_to_function(func))
+    env["codegen.llvm.ctypes"] = cfunc
+    return func, env
+
+#===------------------------------------------------------------------===
+# Linking
+#===------------------------------------------------------------------===
+
+# Inlining threshold of the module-level optimizations (LLVM's default for -O2)
+INLINE_THRESHOLD = 225
+
+def link(funcs, compiled, envs, env):
+    """
+    Link the llvm functions of `funcs`, a callgraph that was just generated,
+    into a single module, and optimize the module as a whole (inlining,
+    interprocedural optimizations and dead function stripping).
+
+    Bodies of previously `compiled` callees are linked in as available
+    externally, which allows them to be inlined without redefining them.
+
+    This updates the 'numba.state.llvm_func' of the environment of each
+    function in `funcs`.
+    """
+    lfuncs = [envs[f]["numba.state.llvm_func"] for f in funcs]
+    module = lc.Module.new("numba.linked.%s" % lfuncs[0].name)
+
+    # -------------------------------------------------
+    # Link modules
+
+    new_modules = _unique_modules(lfuncs)
+    new_defs = set(f.name for m in new_modules
+                              for f in m.functions if not f.is_declaration)
+    new_ids = set(id(m) for m in new_modules)
+    old_modules = [m for m in _unique_modules(
+                       envs[f]["numba.state.llvm_func"] for f in compiled)
+                             if id(m) not in new_ids]
+
+    for m in new_modules + old_modules:
+        module.link_in(m, preserve=True)
+
+    for f in module.functions:
+        if (not f.is_declaration and f.name not in new_defs and
+                f.linkage == lc.LINKAGE_EXTERNAL):
+            f.linkage = lc.LINKAGE_AVAILABLE_EXTERNALLY
+
+    # -------------------------------------------------
+    # Optimize
+
+    if env["numba.optimize"]:
+        optimize_module(module, env["codegen.llvm.opt"] or 2)
+
+    engine = env["codegen.llvm.engine"]
+    with engine_lock:
+        engine.add_module(module)
+
+    # -------------------------------------------------
+    # Update environments
+
+    cache = env["codegen.cache"]
+    for f, lfunc in zip(funcs, lfuncs):
+        e = envs[f]
+        new_lfunc = module.get_function_named(lfunc.name)
+        e["numba.state.llvm_func"] = new_lfunc
+        e["numba.state.linked"] = True
+        cache[f] = new_lfunc
+
+    return module
+
+def optimize_module(module, opt_level):
+    """Run module-level optimizations, including inlining and IPO"""
+    pmb = lp.PassManagerBuilder.new()
+    pmb.opt_level = opt_level
+    pmb.use_inliner_with_threshold(INLINE_THRESHOLD)
+
+    pm = lp.PassManager.new()
+    pmb.populate(pm)
+    pm.add('globaldce')
+    pm.run(module)
+
+def _unique_modules(lfuncs):
+    modules, seen = [], set()
+    for lfunc in lfuncs:
+        if id(lfunc.module) not in seen:
+            seen.add(id(lfunc.module))
+            modules.append(lfunc.module)
+    return modules
+
+#===------------------------------------------------------------------===
+# Serialization
+#===------------------------------------------------------------------===
+
+def embeds_addresses(module):
+    """
+    Whether the module refers to process-specific memory: constant integers
+    converted to pointers (addresses of C functions, Python objects, etc),
+    in instructions or global initializers. Such code cannot be reused by
+    another process.
+    """
+    values = [gv.initializer for gv in module.global_variables
+                  if not gv.is_declaration]
+    for f in module.functions:
+        for block in f.basic_blocks:
+            for inst in block.instructions:
+                if (inst.opcode_name == 'inttoptr' and
+                        isinstance(inst.operands[0], lc.Constant)):
+                    return True
+                values.extend(inst.operands)
+
+    return any(_constant_address(value) for value in values)
+
+def _constant_address(value):
+    """Whether `value` is a constant containing an integer cast to a pointer"""
+    if isinstance(value, lc.ConstantExpr) and value.opcode_name == 'inttoptr':
+        return True
+    elif isinstance(value, lc.Constant) and not isinstance(value,
+                                                           lc.GlobalValue):
+        return any(_constant_address(x) for x in value.operands)
+    return False
+
+def extract_module(lfuncs, name, entries=None):
+    """
+    Build a self-contained module holding the given llvm functions, which
+    must include the functions they call that live in other modules, and
+    the globals they reference. All functions except the entry points are
+    internalized. The first function is the entry point unless `entries`
+    (a list of function names) is given.
+    """
+    module = lc.Module.new(name)
+    for m in _unique_modules(lfuncs):
+        module.link_in(m, preserve=True)
+
+    entries = set(entries or [lfuncs[0].name])
+    for f in module.functions:
+        if not f.is_declaration and f.name not in entries:
+            f.linkage = lc.LINKAGE_INTERNAL
+
+    pm = lp.PassManager.new()
+    pm.add('globaldce')
+    pm.run(module)
+
+    return module
+
+def to_bitcode(module):
+    """Serialize an llvm module to a bitcode string"""
+    buf = io.BytesIO()
+    module.to_bitcode(buf)
+    return buf.getvalue()
+
+def load_bitcode(bitcode, entry, env, suffix):
+    """
+    Load a module from bitcode into the execution engine of `env`. Defined
+    functions are renamed with `suffix` to avoid clashes with functions
+    compiled by this process.
+
+    Returns (llvm_func, ctypes_func)
+    """
+    module = lc.Module.from_bitcode(io.BytesIO(bitcode))
+    for f in module.functions:
+        if not f.is_declaration:
+            f.name = f.name + suffix
+
+    engine = env["codegen.llvm.engine"]
+    lfunc = module.get_function_named(entry + suffix)
+    with engine_lock:
+        engine.add_module(module)
+        cfunc = ctypes.c_void_p(engine.get_pointer_to_function(lfunc))
+    return lfunc, cfunc
+
+#===------------------------------------------------------------------===
+# Object code
+#===------------------------------------------------------------------===
+
+def add_c_wrapper(module, name, symbol):
+    """
+    Add an externally visible function `symbol` forwarding to function
+    `name` of the module.
+    """
+    lfunc = module.get_function_named(name)
+    wrapper = module.add_function(lfunc.type.pointee, symbol)
+    builder = lc.Builder.new(wrapper.append_basic_block('entry'))
+    result = builder.call(lfunc, wrapper.args)
+    if lfunc.type.pointee.return_type.kind == lc.TYPE_VOID:
+        builder.ret_void()
+    else:
+        builder.ret(result)
+    return wrapper
+
+def emit_object(module, opt=2):
+    """Emit position independent object code for the host"""
+    import llvm.ee as le
 
-get_ctypes = llvm.get_ctypes
\ No newline at end of file
+    tm = le.TargetMachine.new(opt=opt, reloc=le.RELOC_PIC)
+    return tm.emit_object(module)
@@ -6,11 +6,19 @@ Copy functions to a function with a new name.
 
 from __future__ import print_function, division, absolute_import
 
+import threading
+
 from pykit.ir import copy_function, vmap, Function
 from pykit.analysis import callgraph
 from pykit.utils import make_temper
 
-temper = make_temper()
+_temper = make_temper()
+_temper_lock = threading.Lock()
+
+def temper(name):
+    """Generate a unique function name, functions may be copied concurrently"""
+    with _temper_lock:
+        return _temper(name)
 
 def copy_graph(func, env, funcs=None, graph=None):
     """
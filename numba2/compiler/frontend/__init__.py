@@ -5,4 +5,6 @@ Frontend package providing translation from bytecode -> untyped pykit IR.
 """
 
 from .frontend import translate, simplify_exceptions
+from .generators import fuse_generators
+from .parallel import outline_parallel_loops
 from .interp import run as interpret
\ No newline at end of file
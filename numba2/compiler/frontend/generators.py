@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+
+"""
+Generator fusion.
+
+Generators are never instantiated. Instead, a call to a generator function
+is fused with the for loop that consumes it, by copying the body of the
+generator into the loop:
+
+    def gen(n):                         for x in gen(n):
+        i = 0                               body(x)
+        while i < n:
+            yield i * 2
+            i += 1
+
+becomes
+
+    resume = 0
+    header:
+        if resume == 0: goto gen_entry
+        if resume == 1: goto resume1
+    gen_entry:
+        i = 0
+        ...
+        item = i * 2; resume = 1
+        goto body
+    resume1:
+        i += 1
+        ...
+        goto loopexit                   # generator returned
+    body:
+        x = item
+        body(x)
+        goto header
+
+Generator state lives in local variables of the consumer, which are
+promoted to registers by cfa. When a generator object is passed to another
+function, such as `sum(f(x) for x in range(n))`, the callee is inlined
+first, which exposes its for loop to fusion. Pipelines of generators thus
+compile to a single loop.
+
+This runs on the untyped IR before cfa, where local variables are still
+allocas, so the generator's locals don't need phis across the loop.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import inspect
+import operator
+
+try:
+    import __builtin__ as builtins
+except ImportError:
+    import builtins
+
+from numba2.errors import CompileError
+from numba2.typing import overlay_registry
+from .translation import Translate
+from .frontend import simplify_exceptions
+
+from pykit import types
+from pykit.ir import Builder, Block, Const, Op, FuncArg
+from pykit.utils import flatten, nestedmap
+
+# Limit the number of fusions, recursive generators can't be fused
+MAX_FUSIONS = 64
+
+#===------------------------------------------------------------------===
+# Pass
+#===------------------------------------------------------------------===
+
+def fuse_generators(func, env=None):
+    """
+    Fuse calls to generator functions with the for loops consuming them.
+    """
+    py_func = env and env.get('numba.state.py_func')
+    if py_func is not None and is_generator(py_func):
+        raise CompileError(
+            "Generator %s can only be called from a for loop in a jitted "
+            "function" % (py_func.__name__,))
+
+    for i in range(MAX_FUSIONS):
+        calls = [(op, generator_func(op)) for op in func.ops]
+        calls = [(op, gen) for op, gen in calls if gen is not None]
+        if not calls:
+            return
+        # Generators passed to other generators are fused once the
+        # consuming generator is fused
+        if not any(fuse(func, op, gen) for op, gen in calls):
+            op, gen = calls[0]
+            raise CompileError(
+                "Generator %s must be consumed directly by a for loop, or "
+                "passed to a jitted function iterating over it" % (
+                    gen.__name__,))
+
+    raise CompileError("Could not fuse generators in %s, are generators "
+                       "recursive?" % (func.name,))
+
+def fuse(func, call, gen):
+    """
+    Fuse generator instantiation `call` with its consumer. Returns whether
+    the consumer is supported.
+    """
+    users = uses(func)
+    forward_stores(call, users)
+    users = uses(func)
+
+    consumers = users.get(call, [])
+    if len(consumers) == 1 and callee(consumers[0], builtins.iter):
+        fuse_loop(func, call, gen, consumers[0], uses(func))
+    elif len(consumers) == 1 and inlinable(consumers[0], call):
+        inline_call(func, consumers[0], callee(consumers[0]))
+    else:
+        return False
+    return True
+
+run = fuse_generators
+
+#===------------------------------------------------------------------===
+# Fusion
+#===------------------------------------------------------------------===
+
+def fuse_loop(func, call, gen, it, users):
+    """
+    Fuse the generator instantiated by `call` with the for loop iterating
+    over `it = iter(call)`.
+    """
+    # -------------------------------------------------
+    # Match the loop
+
+    web = iterator_phis(it, users)
+    nexts = [op for v in [it] + web for op in users.get(v, [])
+                 if op not in web]
+    if len(nexts) != 1 or not callee(nexts[0], builtins.next):
+        raise CompileError("Generator %s must be consumed directly by a "
+                           "for loop" % (gen.__name__,))
+
+    [next_call] = nexts
+    header = next_call.block
+    exc_setup, jump = loop_header(next_call)
+    [loopexit] = exc_setup.args[0]
+    [body] = jump.args
+    preheader = it.block
+    tail = terminator(preheader)
+    if tail.opcode != 'jump' or tail.args != [header]:
+        raise CompileError("Unsupported loop over generator %s" % (
+            gen.__name__,))
+
+    # -------------------------------------------------
+    # Copy generator
+
+    b = Builder(func)
+    b.position_at_beginning(func.startblock)
+    item = b.alloca(types.Pointer(types.Opaque))
+    resume = b.alloca(types.Pointer(types.Opaque))
+
+    src = translate(gen)
+    entry, rets, yields = copy_blocks(func, src, call.args[1])
+
+    # Initialize generator state in the preheader
+    b.position_before(tail)
+    b.store(const(0), resume)
+
+    # -------------------------------------------------
+    # Yield: item = value; resume = k; goto body
+
+    ybody = func.new_block(func.temp('yield'))
+    b.position_at_end(ybody)
+    value = b.load(item)
+    b.jump(body)
+    update_phis(body, header, ybody)
+
+    for k, (block, val, resumeblock) in enumerate(yields):
+        b.position_at_end(block)
+        b.store(val, item)
+        b.store(const(k + 1), resume)
+        b.jump(ybody)
+
+    # -------------------------------------------------
+    # Return: goto loopexit
+
+    for block, val in rets:
+        b.position_at_end(block)
+        b.jump(loopexit)
+        add_incoming(loopexit, block, web)
+
+    # -------------------------------------------------
+    # Header: dispatch on resume
+
+    targets = [entry] + [resumeblock for _, _, resumeblock in yields]
+    b.position_before(exc_setup)
+    state = b.load(resume)
+    for k, target in enumerate(targets[:-1]):
+        cond = b.call(types.Opaque, const(operator.eq), [state, const(k)])
+        nextblock = func.new_block(func.temp('resume'))
+        b.cbranch(cond, target, nextblock)
+        b.position_at_end(nextblock)
+    b.jump(targets[-1])
+
+    # -------------------------------------------------
+    # Delete iterator
+
+    next_call.replace_uses(value)
+    delete_ops([jump, next_call, exc_setup] + web + [it, call])
+    for op in list(loopexit):
+        if op.opcode == 'exc_catch':
+            op.delete()
+
+
+def inline_call(func, call, py_func):
+    """
+    Inline the call to jitted python function `py_func`, to fuse generators
+    passed as arguments.
+    """
+    b = Builder(func)
+    b.position_at_beginning(func.startblock)
+    result = b.alloca(types.Pointer(types.Opaque))
+
+    # Split the block after the call
+    block = call.block
+    ops = list(block)
+    following = ops[ops.index(call) + 1]
+    b.position_after(call)
+    b.splitblock(terminate=True, preserve_exc=False)
+    cont = following.block
+    for succ in successors(cont):
+        update_phis(succ, block, cont)
+
+    src = translate(py_func)
+    entry, rets, yields = copy_blocks(func, src, call.args[1])
+    if yields:
+        raise CompileError("Cannot inline generator %s" % (py_func.__name__,))
+
+    terminator(block).set_args([entry])
+    for retblock, val in rets:
+        b.position_at_end(retblock)
+        b.store(val if val is not None else const(None), result)
+        b.jump(cont)
+
+    b.position_at_beginning(cont)
+    value = b.load(result)
+    call.replace_uses(value)
+    call.delete()
+
+#===------------------------------------------------------------------===
+# Copying
+#===------------------------------------------------------------------===
+
+def translate(py_func):
+    """Translate python function to untyped IR for fusion"""
+    t = Translate(py_func)
+    t.initialize()
+    t.interpret()
+    simplify_exceptions(t.dst)
+    return t.dst
+
+def copy_blocks(func, src, args):
+    """
+    Copy the blocks of untyped function `src` into `func`, substituting its
+    arguments with `args`. Allocas are moved to the entry block of `func`.
+
+    Returns (entry, rets, yields) where
+
+        entry:  the copy of the entry block of `src`
+        rets:   [(block, value)], unterminated blocks for each return
+        yields: [(block, value, resume_block)], unterminated blocks for
+                each yield, and the block following the yield
+    """
+    b = Builder(func)
+    name = src.name.split('.')[-1]
+
+    first = {}   # block -> first block of copy
+    last = {}    # block -> last block of copy, after splitting at yields
+    valuemap = dict(zip(src.args, args))
+    copies = []
+    rets, yields = [], []
+
+    for block in src.blocks:
+        newblock = func.new_block(func.temp(name))
+        first[block] = newblock
+        for op in block:
+            if op.opcode == 'ret':
+                rets.append((newblock, op.args[0] if op.args else None))
+                continue
+            elif op.opcode == 'yield':
+                resumeblock = func.new_block(func.temp(name))
+                yields.append((newblock, op.args[0], resumeblock))
+                newblock = resumeblock
+                continue
+
+            newop = Op(op.opcode, op.type, op.args)
+            if op.opcode == 'alloca':
+                b.position_at_beginning(func.startblock)
+            else:
+                b.position_at_end(newblock)
+            b.emit(newop)
+            valuemap[op] = newop
+            copies.append(newop)
+
+        last[block] = newblock
+
+    # -------------------------------------------------
+    # Substitute copied values and blocks
+
+    def substitute(x):
+        if isinstance(x, Block):
+            return first[x]
+        return valuemap.get(x, x)
+
+    for op in copies:
+        if op.opcode == 'phi':
+            blocks, values = op.args
+            op.set_args([[last[block] for block in blocks],
+                         [substitute(v) for v in values]])
+        else:
+            op.set_args(nestedmap(substitute, op.args))
+
+    rets = [(block, substitute(v)) for block, v in rets]
+    yields = [(block, substitute(v), resume) for block, v, resume in yields]
+    return first[src.startblock], rets, yields
+
+#===------------------------------------------------------------------===
+# Matching
+#===------------------------------------------------------------------===
+
+def generator_func(op):
+    """Return the generator function called by `op`, or None"""
+    f = callee(op)
+    if f is not None and is_generator(f):
+        return f
+
+def callee(op, expected=None):
+    """
+    Return the python function called by untyped call `op`, or None. With
+    `expected`, return whether `op` calls `expected`.
+    """
+    from numba2.functionwrapper import FunctionWrapper
+
+    if op.opcode != 'call' or not isinstance(op.args[0], Const):
+        return None if expected is None else False
+
+    f = op.args[0].const
+    if expected is not None:
+        return f is expected
+
+    f = overlay_registry.lookup_overlay(f) or f
+    if isinstance(f, FunctionWrapper):
+        if f.opaque or len(f.overloads) != 1:
+            return None
+        f = f.py_func
+    return f if inspect.isfunction(f) else None
+
+def is_generator(py_func):
+    return inspect.isgeneratorfunction(py_func)
+
+def inlinable(op, arg):
+    """
+    Whether `op` calls a jitted function that can be inlined to fuse the
+    generator `arg` passed to it
+    """
+    f = callee(op)
+    if (f is None or is_generator(f) or
+            len(inspect.getargspec(f).args) != len(op.args[1])):
+        return False
+    return any(a is arg and consumes(f, i) for i, a in enumerate(op.args[1]))
+
+def consumes(py_func, i, depth=0):
+    """
+    Whether `py_func` iterates over argument `i` in a for loop, or passes it
+    to a function that does.
+    """
+    if depth > MAX_FUSIONS:
+        return False
+
+    src = translate(py_func)
+    users = uses(src)
+    arg = src.args[i]
+
+    # Arguments are stored in local variables
+    values = [arg]
+    for op in users.get(arg, []):
+        if op.opcode == 'store' and op.args[0] is arg:
+            values.extend(load for load in users.get(op.args[1], [])
+                              if load.opcode == 'load')
+
+    for value in values:
+        for op in users.get(value, []):
+            if callee(op, builtins.iter):
+                return True
+            f = callee(op)
+            if (f is not None and not is_generator(f) and
+                    len(inspect.getargspec(f).args) == len(op.args[1])):
+                if any(a is value and consumes(f, j, depth + 1)
+                           for j, a in enumerate(op.args[1])):
+                    return True
+    return False
+
+def loop_header(next_call):
+    """
+    Match the header of a for loop:
+
+        exc_setup([loopexit]); next_call = next(it); jump(body)
+
+    Returns (exc_setup, jump).
+    """
+    ops = [op for op in next_call.block if op.opcode != 'phi']
+    if (len(ops) != 3 or ops[1] is not next_call or
+            ops[0].opcode != 'exc_setup' or ops[2].opcode != 'jump'):
+        raise CompileError("Unsupported for loop over generator")
+    return ops[0], ops[2]
+
+def iterator_phis(it, users):
+    """
+    Find the phis carrying iterator `it` on the value stack, which we can
+    remove once the loop is fused.
+    """
+    web = []
+    todo = [it]
+    while todo:
+        value = todo.pop()
+        for op in users.get(value, []):
+            if op.opcode == 'phi' and op not in web:
+                web.append(op)
+                todo.append(op)
+
+    # Phis merging the iterator with other values are not supported
+    for phi in web:
+        if any(v is not it and v not in web for v in phi.args[1]):
+            raise CompileError("Iterator of generator escapes the loop")
+    return web
+
+#===------------------------------------------------------------------===
+# Helpers
+#===------------------------------------------------------------------===
+
+const = lambda value: Const(value, types.Opaque)
+
+def forward_stores(value, users):
+    """
+    Forward `value` stored in a local variable to the only load of the
+    variable:
+
+        store(value, var); x = load(var)    =>  x := value
+    """
+    stores = users.get(value, [])
+    if len(stores) != 1 or stores[0].opcode != 'store':
+        return
+    store = stores[0]
+    var = store.args[1]
+    if store.args[0] is not value or var.opcode != 'alloca':
+        return
+
+    loads = [op for op in users.get(var, []) if op is not store]
+    if len(loads) == 1 and loads[0].opcode == 'load':
+        [load] = loads
+        load.replace_uses(value)
+        load.delete()
+        store.delete()
+
+def update_phis(block, old, new):
+    """Replace predecessor `old` by `new` in the phis of `block`"""
+    for op in block:
+        if op.opcode == 'phi':
+            blocks, values = op.args
+            op.set_args([[new if b is old else b for b in blocks], values])
+
+def add_incoming(block, pred, ignore):
+    """
+    Add an incoming value from `pred` to the phis of `block`. This is only
+    possible if the phi merges a single value.
+    """
+    for op in block:
+        if op.opcode == 'phi' and op not in ignore:
+            blocks, values = op.args
+            if len(set(values)) != 1:
+                raise CompileError("Unsupported loop over generator")
+            op.set_args([blocks + [pred], values + values[:1]])
+
+def terminator(block):
+    return list(block)[-1]
+
+def successors(block):
+    return [x for x in flatten(terminator(block).args)
+                if isinstance(x, Block)]
+
+def delete_ops(ops):
+    """Delete ops which may use each other"""
+    placeholder = const(None)
+    for op in ops:
+        op.set_args(nestedmap(
+            lambda x: placeholder if isinstance(x, Op) else x, op.args))
+    for op in ops:
+        op.delete()
+
+def uses(func):
+    """Map values of `func` to the ops using them"""
+    users = {}
+    for op in func.ops:
+        for arg in flatten(op.args):
+            if isinstance(arg, (Op, FuncArg)):
+                users.setdefault(arg, []).append(op)
+    return users
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+
+"""
+Outlining of prange loops.
+
+The body of a loop `for i in prange(...)` is moved to a function running a
+chunk of its iterations, and the loop is replaced by a call to the worker
+pool, see runtime/parallel.py for the generated code. This rewrites the
+Python AST before translation, so that the body can be jitted like any
+other function.
+
+Variables used in the loop body are
+
+    captured:   read but not assigned in the body, passed by value
+    reductions: only updated with `x += ...` (or -=, *=, |=, &=, ^=). Each
+                chunk accumulates a partial result from the identity of the
+                operator, and the partial results are combined after the
+                loop
+    private:    assigned in the body, including the loop variable. These
+                are local to the body and may not be used after the loop.
+
+Iterations run in an unspecified order, `break`, `return` and `yield` may
+not leave the loop body.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import ast
+import copy
+import itertools
+import inspect
+import textwrap
+import threading
+import weakref
+
+from numba2.errors import CompileError
+
+# Reduction operator -> (identity, operator combining partial results)
+reductions = {
+    ast.Add:    (0,  '+'),
+    ast.Sub:    (0,  '+'),
+    ast.Mult:   (1,  '*'),
+    ast.BitOr:  (0,  '|'),
+    ast.BitAnd: (-1, '&'),
+    ast.BitXor: (0,  '^'),
+}
+
+# Outlined functions are kept as long as the python function they were made
+# from. Functions without prange loops map to None, since values may not
+# refer to their key. Both tables are only used while holding _lock.
+outlined = weakref.WeakKeyDictionary() # python function -> outlined function
+sources = weakref.WeakKeyDictionary()  # code object -> ast.FunctionDef of
+                                       # outlined loop bodies
+loopids = itertools.count() # unique names for nested loops
+_lock = threading.RLock()
+
+#===------------------------------------------------------------------===
+# Pass
+#===------------------------------------------------------------------===
+
+def outline_parallel_loops(py_func, env=None):
+    """
+    Replace prange loops in `py_func` by calls to the worker pool. Returns
+    the python function to translate.
+    """
+    code = py_func.__code__
+    if 'prange' not in code.co_names + code.co_freevars:
+        return py_func, env
+
+    with _lock:
+        if py_func not in outlined:
+            new_func = outline(py_func)
+            outlined[py_func] = new_func if new_func is not py_func else None
+        new_func = outlined[py_func] or py_func
+
+    if env is not None:
+        env['numba.state.py_func'] = new_func
+        env['numba.state.func_globals'] = new_func.__globals__
+        env['numba.state.func_code'] = new_func.__code__
+
+    return new_func, env
+
+run = outline_parallel_loops
+
+def outline(py_func):
+    """Outline the prange loops of `py_func`"""
+    tree = parse(py_func)
+
+    namespace = dict(py_func.__globals__)
+    cells = py_func.__closure__ or ()
+    namespace.update((name, cell.cell_contents) for name, cell in
+                         zip(py_func.__code__.co_freevars, cells))
+
+    outliner = Outliner(py_func, tree, namespace)
+    outliner.generic_visit(tree)
+    if not outliner.count:
+        return py_func
+
+    func = define(tree, namespace, py_func)
+    func.__defaults__ = py_func.__defaults__
+    return func
+
+#===------------------------------------------------------------------===
+# Outlining
+#===------------------------------------------------------------------===
+
+caller_template = """
+{p}r = __numba_parallel.range()
+{p}n = __numba_parallel.nthreads({p}r)
+{partials}
+{p}caps = ({caps},)
+__numba_parallel.run({p}chunk({p}caps), {p}caps, {p}r, {p}n)
+{combine}
+"""
+
+combine_template = """
+for {p}k in __numba_parallel.range({p}n):
+    {reductions}
+"""
+
+body_template = """
+def {name}({p}lo, {p}hi, {p}k, {params}):
+    {loads}
+    for {p}j in __numba_parallel.range({p}lo, {p}hi):
+        {target} = {p}r[{p}j]
+        pass
+    {stores}
+"""
+
+class Outliner(ast.NodeTransformer):
+    """Replace prange loops in the body of a function definition"""
+
+    def __init__(self, py_func, tree, namespace):
+        self.py_func = py_func
+        self.tree = tree
+        self.namespace = namespace
+        self.locals = set(py_func.__code__.co_varnames)
+        self.count = 0
+
+        # Variables used outside of any prange loop
+        loops = [node for node in ast.walk(tree)
+                     if isinstance(node, ast.For) and self.is_prange(node)]
+        self.outside = variables(tree.body, skip=loops)
+
+    def visit_For(self, node):
+        if self.is_prange(node):
+            return self.outline_loop(node)
+        self.generic_visit(node)
+        return node
+
+    def visit_FunctionDef(self, node):
+        return node # Different scope
+
+    visit_ClassDef = visit_Lambda = visit_FunctionDef
+
+    def is_prange(self, node):
+        from numba2.runtime.builtins import prange
+
+        call = node.iter
+        return (isinstance(call, ast.Call) and
+                resolve(call.func, self.namespace, self.locals) is prange)
+
+    # __________________________________________________________________
+
+    def outline_loop(self, node):
+        self.check_loop(node)
+
+        p = "__prange%d_" % next(loopids)
+        self.count += 1
+
+        target = node.target.id
+        loads, stores, augmented = variables(node.body)
+        reduced = reduction_vars(loads, stores, augmented)
+        private = (stores | set(augmented) | set([target])) - set(reduced)
+        captured = sorted((loads & self.locals) - private)
+
+        outside_loads, _, outside_augmented = self.outside
+        escaping = sorted(private & (outside_loads | set(outside_augmented)))
+        if escaping:
+            raise CompileError(
+                "Variable '%s' is assigned in the prange loop on line %d and "
+                "used outside of it. Only reductions with +=, -=, *=, |=, "
+                "&= and ^= can leave the loop" % (escaping[0], node.lineno))
+
+        # -------------------------------------------------
+        # Body
+
+        from numba2.runtime import parallel
+        self.namespace['__numba_parallel'] = parallel
+
+        reduced = sorted(reduced.items())
+        partials = ["%ss_%s" % (p, name) for name, op in reduced]
+        params = ["%sr" % p] + captured + partials
+
+        bodydef = fill(body_template, node, {
+            'name': "%s%s" % (self.tree.name, p.rstrip('_')),
+            'p': p,
+            'params': ", ".join(params),
+            'target': target,
+            'loads': "\n    ".join("%s = (%s.p + %sk).deref()" % (name, s, p)
+                                   for (name, op), s in zip(reduced, partials)),
+            'stores': "\n    ".join("(%s.p + %sk).store(%s)" % (s, p, name)
+                                    for (name, op), s in zip(reduced, partials)),
+        })[0]
+
+        [loop] = [stmt for stmt in bodydef.body if isinstance(stmt, ast.For)]
+        loop.body[-1:] = node.body
+        body = self.define_body(bodydef)
+
+        # -------------------------------------------------
+        # Call the worker pool
+
+        combine = ""
+        if reduced:
+            combine = fill_source(combine_template, {
+                'p': p,
+                'reductions': "\n    ".join(
+                    "%s %s= (%s.p + %sk).deref()" % (
+                        name, reductions[op][1], s, p)
+                    for (name, op), s in zip(reduced, partials)),
+            })
+            combine = "\n".join([combine] + [
+                "__numba_parallel.freepartials(%s)" % s for s in partials])
+
+        stmts = fill(caller_template, node, {
+            'p': p,
+            'caps': ", ".join(params),
+            'partials': "\n".join(
+                "%s = __numba_parallel.newpartials(%s, %d, %sn)" % (
+                    s, name, reductions[op][0], p)
+                for (name, op), s in zip(reduced, partials)),
+            'combine': combine,
+        })
+
+        # r = range(*prange_args)
+        rangecall = node.iter
+        rangecall.func = stmts[0].value.func
+        stmts[0].value = rangecall
+
+        self.namespace[p + 'chunk'] = parallel.make_chunk(body, len(params))
+        return stmts
+
+    def define_body(self, bodydef):
+        """Define and jit the function for the loop body"""
+        from numba2 import jit
+
+        func = define(copy.deepcopy(bodydef), self.namespace, self.py_func)
+        with _lock:
+            sources[func.__code__] = bodydef
+        return jit(func, scope={})
+
+    def check_loop(self, node):
+        if node.orelse:
+            raise CompileError("prange loop on line %d cannot have an else "
+                               "clause" % (node.lineno,))
+        if not isinstance(node.target, ast.Name):
+            raise CompileError("prange loop on line %d must assign a single "
+                               "variable" % (node.lineno,))
+        call = node.iter
+        if (call.keywords or getattr(call, 'starargs', None) or
+                getattr(call, 'kwargs', None) or not 1 <= len(call.args) <= 3):
+            raise CompileError("prange() on line %d takes 1 to 3 positional "
+                               "arguments" % (node.lineno,))
+        for stmt in node.body:
+            check_exits(stmt, inloop=False)
+
+#===------------------------------------------------------------------===
+# Variables
+#===------------------------------------------------------------------===
+
+def variables(stmts, skip=()):
+    """
+    Find the variables of a list of statements, except in the statements
+    `skip`. Returns (loads, stores, augmented) with augmented a dict mapping
+    variables updated through augmented assignment to the set of their
+    operators.
+    """
+    loads, stores, augmented = set(), set(), {}
+    augtargets = set()
+
+    nodes = list(walk(stmts, skip))
+    for node in nodes:
+        if isinstance(node, ast.AugAssign) and isinstance(node.target,
+                                                          ast.Name):
+            augmented.setdefault(node.target.id, set()).add(type(node.op))
+            augtargets.add(node.target)
+
+    for node in nodes:
+        if isinstance(node, ast.Name) and node not in augtargets:
+            if isinstance(node.ctx, ast.Load):
+                loads.add(node.id)
+            else:
+                stores.add(node.id)
+
+    return loads, stores, augmented
+
+def reduction_vars(loads, stores, augmented):
+    """
+    Find the reduction variables of a loop body, which are only updated
+    with a single operator. Returns {name: operator type}.
+    """
+    result = {}
+    for name, ops in augmented.items():
+        if name in loads or name in stores or len(ops) != 1:
+            continue
+        [op] = ops
+        if op in reductions:
+            result[name] = op
+    return result
+
+def walk(stmts, skip=()):
+    """Walk the nodes of `stmts`, except the nodes in `skip`"""
+    todo = list(stmts)
+    while todo:
+        node = todo.pop()
+        if not any(node is x for x in skip):
+            yield node
+            todo.extend(ast.iter_child_nodes(node))
+
+def check_exits(node, inloop):
+    """Check that `node` does not leave the body of a prange loop"""
+    if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Lambda)):
+        return
+    elif isinstance(node, (ast.Return, ast.Yield)):
+        raise CompileError("Cannot return or yield from a prange loop "
+                           "(line %d)" % (node.lineno,))
+    elif isinstance(node, ast.Break) and not inloop:
+        raise CompileError("Cannot break from a prange loop (line %d)" % (
+            node.lineno,))
+
+    inloop = inloop or isinstance(node, (ast.For, ast.While))
+    for child in ast.iter_child_nodes(node):
+        check_exits(child, inloop)
+
+def resolve(node, namespace, locals):
+    """Resolve a global name or attribute of a global"""
+    if isinstance(node, ast.Name):
+        if node.id in locals:
+            return None
+        return namespace.get(node.id)
+    elif isinstance(node, ast.Attribute):
+        obj = resolve(node.value, namespace, locals)
+        return getattr(obj, node.attr, None)
+    return None
+
+#===------------------------------------------------------------------===
+# Source
+#===------------------------------------------------------------------===
+
+def parse(py_func):
+    """Parse the function definition of `py_func`"""
+    code = py_func.__code__
+    with _lock:
+        bodydef = sources.get(code)
+    if bodydef is not None:
+        return copy.deepcopy(bodydef)
+
+    try:
+        source = textwrap.dedent(inspect.getsource(py_func))
+    except (IOError, TypeError):
+        raise CompileError("Cannot find the source of %s to outline its "
+                           "prange loops" % (py_func.__name__,))
+
+    [tree] = ast.parse(source).body
+    ast.increment_lineno(tree, code.co_firstlineno - 1)
+    tree.decorator_list = []
+    return tree
+
+def define(tree, namespace, py_func):
+    """Define the function for definition `tree` with globals `namespace`"""
+    module = ast.parse("")
+    module.body = [tree]
+    ast.fix_missing_locations(module)
+    filename = py_func.__code__.co_filename
+    scope = {}
+    exec(compile(module, filename, 'exec'), namespace, scope)
+    return scope[tree.name]
+
+def fill_source(template, params):
+    """Fill in `template`, dropping empty lines"""
+    source = template.format(**params)
+    return "\n".join(line for line in source.splitlines() if line.strip())
+
+def fill(template, node, params):
+    """
+    Fill in `template` and parse the statements, with the location of
+    `node`.
+    """
+    stmts = ast.parse(fill_source(template, params)).body
+    for stmt in stmts:
+        for child in ast.walk(stmt):
+            if 'lineno' in child._attributes:
+                ast.copy_location(child, node)
+    return stmts
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, int32, environment, phase
+from numba2.errors import CompileError
+
+#===------------------------------------------------------------------===
+# Test code
+#===------------------------------------------------------------------===
+
+@jit
+def evens(n):
+    i = 0
+    while i < n:
+        yield i * 2
+        i = i + 1
+
+@jit
+def three(x):
+    yield x
+    yield x + 1
+    yield x + 2
+
+@jit
+def doubled(it):
+    for x in it:
+        yield x * 2
+
+@jit
+def total(it):
+    s = 0
+    for x in it:
+        s = s + x
+    return s
+
+@jit
+def sum_evens(n):
+    s = 0
+    for x in evens(n):
+        s = s + x
+    return s
+
+@jit
+def sum_three(x):
+    s = 0
+    for y in three(x):
+        s = s * 10 + y
+    return s
+
+@jit
+def pipeline(n):
+    return total(doubled(evens(n)))
+
+@jit
+def genexpr(n):
+    return total(x * x for x in range(n))
+
+@jit
+def break_early(n):
+    s = 0
+    for x in evens(n):
+        if x > 4:
+            break
+        s = s + x
+    return s
+
+@jit
+def second(it, n):
+    return n
+
+@jit
+def unconsumed(n):
+    return second(evens(n), n)
+
+def opcodes(f, argtypes):
+    env = environment.fresh_env(f, argtypes)
+    func, env = phase.translation(f, env)
+    return set(op.opcode for op in func.ops)
+
+#===------------------------------------------------------------------===
+# Tests
+#===------------------------------------------------------------------===
+
+class TestGeneratorFusion(unittest.TestCase):
+
+    def test_fusion(self):
+        self.assertEqual(sum_evens(5), 20)
+        self.assertEqual(sum_evens(0), 0)
+
+    def test_multiple_yields(self):
+        self.assertEqual(sum_three(1), 123)
+
+    def test_pipeline(self):
+        self.assertEqual(pipeline(4), 24)
+
+    def test_genexpr(self):
+        self.assertEqual(genexpr(4), 14)
+
+    def test_break(self):
+        self.assertEqual(break_early(10), 6)
+
+    def test_fused(self):
+        self.assertNotIn('yield', opcodes(pipeline, [int32]))
+        self.assertNotIn('exc_setup', opcodes(sum_evens, [int32]))
+
+    def test_unfused(self):
+        self.assertRaises(CompileError, evens, 10)
+
+    def test_not_iterated(self):
+        # second() does not loop over the generator, so it is not inlined
+        self.assertRaises(CompileError, unconsumed, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import gc
+import unittest
+import weakref
+
+import numba2
+from numba2 import jit, prange
+from numba2.errors import CompileError
+from numba2.compiler.frontend import parallel
+from numba2.compiler.frontend.parallel import outline_parallel_loops
+
+import numpy as np
+
+#===------------------------------------------------------------------===
+# Test code
+#===------------------------------------------------------------------===
+
+@jit
+def fill(a, n):
+    for i in prange(n):
+        a[i] = i * 2.0
+
+@jit
+def total(n):
+    s = 0
+    for i in prange(n):
+        s += i
+    return s
+
+@jit
+def dot(a, b):
+    s = 0.0
+    p = 1
+    for i in numba2.prange(len(a)):
+        s += a[i] * b[i]
+        p *= 1
+    return s + p
+
+@jit
+def strided(n):
+    s = 0
+    for i in prange(1, n, 3):
+        x = i * 2
+        s -= x
+    return s
+
+@jit
+def nested(a, n):
+    for i in prange(n):
+        for j in prange(n):
+            a[i, j] = i * n + j
+
+def escapes(a, n):
+    for i in prange(n):
+        x = a[i]
+    return x
+
+def breaks(a, n):
+    for i in prange(n):
+        if a[i]:
+            break
+
+def serial(n):
+    s = 0
+    for i in range(n):
+        s += i
+    return s
+
+#===------------------------------------------------------------------===
+# Tests
+#===------------------------------------------------------------------===
+
+class TestOutlining(unittest.TestCase):
+
+    def test_unchanged(self):
+        func, env = outline_parallel_loops(serial)
+        self.assertIs(func, serial)
+
+    def test_outlined(self):
+        func, env = outline_parallel_loops(total.py_func)
+        self.assertNotIn('prange', func.__code__.co_names)
+
+    def test_escaping_variable(self):
+        self.assertRaises(CompileError, outline_parallel_loops, escapes)
+
+    def test_break(self):
+        self.assertRaises(CompileError, outline_parallel_loops, breaks)
+
+    def test_collected(self):
+        def f(n):
+            s = 0
+            for i in prange(n):
+                s += i
+            return s
+
+        func, env = outline_parallel_loops(f)
+        self.assertIs(outline_parallel_loops(f)[0], func)
+        self.assertIn(f, parallel.outlined)
+
+        # Outlined functions don't keep their python function alive
+        ref = weakref.ref(f)
+        del f, func
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+class TestPrange(unittest.TestCase):
+
+    def test_fill(self):
+        a = np.zeros(1000)
+        fill(a, 1000)
+        self.assertTrue(np.all(a == np.arange(1000) * 2.0))
+
+    def test_reduction(self):
+        self.assertEqual(total(10000), sum(range(10000)))
+        self.assertEqual(total(0), 0)
+        self.assertEqual(total(1), 0)
+
+    def test_multiple_reductions(self):
+        a = np.arange(100.0)
+        self.assertEqual(dot(a, a), np.dot(a, a) + 1)
+
+    def test_step(self):
+        self.assertEqual(strided(100), -sum(i * 2 for i in range(1, 100, 3)))
+
+    def test_nested(self):
+        a = np.zeros((20, 20))
+        nested(a, 20)
+        self.assertTrue(np.all(a == np.arange(400.0).reshape(20, 20)))
+
+
+if __name__ == '__main__':
+    unittest.main()
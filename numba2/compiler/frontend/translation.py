@@ -11,6 +11,7 @@ from __future__ import print_function, division, absolute_import
 
 import __builtin__
 import inspect
+from types import FunctionType
 import dis
 import operator
 import collections
@@ -368,6 +369,12 @@ class Translate(object):
             val = None # Generate a bare 'ret' instruction
         self.insert('ret', val)
 
+    def op_YIELD_VALUE(self, inst):
+        # Generators are fused with the loops consuming them, see generators.py
+        val = self.pop()
+        self.insert('yield', val)
+        self.push(const(None))
+
     def op_CALL_FUNCTION(self, inst):
         argc = inst.arg & 0xff
         kwsc = (inst.arg >> 8) & 0xff
@@ -386,6 +393,16 @@ class Translate(object):
         func = self.pop()
         self.call(func, args)
 
+    def op_MAKE_FUNCTION(self, inst):
+        code = self.pop()
+        defaults = list(reversed([self.pop() for i in range(inst.arg)]))
+        if not all(isinstance(x, Const) for x in [code] + defaults):
+            raise NotImplementedError("Non-constant default arguments")
+
+        func = FunctionType(code.const, self.func.func_globals, None,
+                            tuple(x.const for x in defaults) or None)
+        self.push(const(func))
+
     def op_GET_ITER(self, inst):
         self.call(iter, [self.pop()])
 
@@ -602,26 +619,27 @@ class Translate(object):
 
     def op_SLICE_0(self, inst):
         tos = self.pop()
-        sl = self.insert('slice', *map(slicearg, [None, None, None]))
-        self.call(operator.getitem, args=(tos, sl))
+        self.getslice(tos)
 
     def op_SLICE_1(self, inst):
         start = self.pop()
         tos = self.pop()
-        sl = self.insert('slice', *map(slicearg, [start, None, None]))
-        self.call(operator.getitem, args=(tos, sl))
+        self.getslice(tos, start=start)
 
     def op_SLICE_2(self, inst):
         stop = self.pop()
         tos = self.pop()
-        sl = self.insert('slice', *map(slicearg, [None, stop, None]))
-        self.call(operator.getitem, args=(tos, sl))
+        self.getslice(tos, stop=stop)
 
     def op_SLICE_3(self, inst):
         stop = self.pop()
         start = self.pop()
         tos = self.pop()
-        sl = self.insert('slice', *map(slicearg, [start, stop, None]))
+        self.getslice(tos, start, stop)
+
+    def getslice(self, tos, start=None, stop=None):
+        sl = self.call(slice, map(slicearg, [start, stop, None]))
+        self.pop()
         self.call(operator.getitem, args=(tos, sl))
 
     def op_BUILD_SLICE(self, inst):
@@ -629,9 +647,12 @@ class Translate(object):
         tos = [self.pop() for _ in range(argc)]
 
         if argc == 2:
-            self.push_insert('slice', *map(slicearg, [tos[1], tos[0], None]))
+            self.call(slice, map(slicearg, [tos[1], tos[0], None]))
         elif argc == 3:
-            self.push_insert('slice', *map(slicearg, [tos[2], tos[1], tos[0]]))
+            step = tos[0]
+            if isinstance(step, Const) and step.const == 0:
+                raise CompileError("slice step cannot be zero")
+            self.call(slice, map(slicearg, [tos[2], tos[1], tos[0]]))
         else:
             raise Exception('unreachable')
 
@@ -708,8 +729,10 @@ def func_name(func):
     return func.__name__
 
 def slicearg(v):
-    """Construct an argument to a slice instruction"""
-    return Const(v, types.Int64)
+    """Construct an argument to a slice() call, None for missing values"""
+    if v is None:
+        return const(None)
+    return v
 
 #===------------------------------------------------------------------===
 # Exceptions
@@ -12,4 +12,6 @@ from .constructors import rewrite_constructors, rewrite_raise_exc_type
 from .constants import rewrite_constants
 from .conversion import convert_retval
 from .objects import rewrite_obj_return
-from .allocation import allocator
\ No newline at end of file
+from .allocation import allocator
+from .gil import check_nogil
+from .loops import rewrite_loops
@@ -6,9 +6,11 @@ Handle constants.
 
 from __future__ import print_function, division, absolute_import
 import ctypes
+import threading
 
 from numba2.representation import byref
 from numba2.conversion import fromobject, toctypes
+from .gil import is_pythonapi_func
 
 from pykit.utils.ctypes_support import from_ctypes_value
 from pykit.ir import collect_constants, substitute_args
@@ -18,6 +20,7 @@ from pykit.ir import collect_constants, substitute_args
 #===------------------------------------------------------------------===
 
 _keep_alive = []
+_keep_alive_lock = threading.Lock()
 
 def rewrite_constants(func, env):
     """
@@ -43,7 +46,8 @@ def rewrite_constants(func, env):
             # Python -> Numba (if not already)
             numba_obj = fromobject(c.const, ty)
             # Numba -> ctypes
-            ctype_obj = toctypes(numba_obj, ty, _keep_alive)
+            keepalive = []
+            ctype_obj = toctypes(numba_obj, ty, keepalive)
             if byref(ty):
                 ctype_obj = ctypes.pointer(ctype_obj)
             # ctypes -> pykit
@@ -52,6 +56,12 @@ def rewrite_constants(func, env):
             context[new_const] = ty
             new_constants.append(new_const)
 
-            _keep_alive.extend([ctype_obj, c.const])
+            if is_pythonapi_func(c.const):
+                # Remember calls needing the GIL, see gil.check_nogil
+                env['numba.state.gil_calls'] = (
+                    env.get('numba.state.gil_calls', ()) + (c.const,))
+
+            with _keep_alive_lock:
+                _keep_alive.extend(keepalive + [ctype_obj, c.const])
 
         substitute_args(op, constants, new_constants)
\ No newline at end of file
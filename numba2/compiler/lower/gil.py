@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+Verify that functions compiled with nogil=True do not need the GIL.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import ctypes
+
+from numba2.errors import CompileError
+
+from pykit.analysis import callgraph
+
+#===------------------------------------------------------------------===
+# Pass
+#===------------------------------------------------------------------===
+
+def check_nogil(func, env):
+    """
+    Raise a CompileError if a function compiled with nogil=True, or any
+    function it calls, uses python objects or calls into the CPython C-API.
+
+    Allocating through the collector does not need the GIL, but needs the
+    calling thread to be registered with the collector. Threads calling
+    compiled functions from Python are registered before the GIL is
+    released (see runtime/lib/threads.py).
+    """
+    if not env['numba.state.options'].get('nogil'):
+        return
+
+    envs = env['numba.state.envs']
+    for f in callgraph.callgraph(func).node:
+        reason = requires_gil(f, envs.get(f, env))
+        if reason:
+            raise CompileError(
+                "Function %s was compiled with nogil=True, but %s needs the "
+                "GIL: %s" % (env['numba.state.func_name'], f.name, reason))
+
+def requires_gil(func, env):
+    """Returns why `func` needs the GIL, or None"""
+    context = env['numba.typing.context'] or {}
+    for value, type in context.iteritems():
+        if is_object_type(type):
+            return "%s has type %s" % (value, type)
+
+    # Constants are rewritten to pointers by rewrite_constants, which keeps
+    # track of C-API functions for us
+    for cfunc in env.get('numba.state.gil_calls') or ():
+        return "calls %s" % (getattr(cfunc, '__name__', cfunc),)
+
+    return None
+
+def is_object_type(type):
+    """Whether `type` is or contains a python object type"""
+    from numba2.runtime.obj.pyobject import Object
+
+    if getattr(type, 'impl', None) is Object:
+        return True
+    return any(is_object_type(t) for t in getattr(type, 'parameters', ()))
+
+def is_pythonapi_func(value):
+    """
+    Whether `value` is a foreign function that must be called with the GIL
+    held (ctypes.pythonapi, or functions of a PyDLL such as libcpy).
+    """
+    return (isinstance(value, ctypes._CFuncPtr) and
+            bool(value._flags_ & ctypes._FUNCFLAG_PYTHONAPI))
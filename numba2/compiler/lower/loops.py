@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lower for loops over sequences to counted loops.
+
+The front-end translates a for loop to iter() and next() calls, where the
+end of the loop is signalled by next() raising StopIteration:
+
+    it = iter(seq)
+    header:
+        exc_setup(exit)
+        item = next(it)
+        jump(body)
+    body:
+        ...
+    exit:
+        exc_catch(StopIteration)
+
+For Range, and other Sequences with __len__ and __getitem__, we rewrite this
+to a loop over an induction variable:
+
+        n = len(seq)
+    header:
+        i = phi(0, i.next)
+        cond = i < n
+        cbranch(cond, body, exit)
+    body:
+        item = seq[i]
+        i.next = i + 1
+        ...
+    exit:
+
+which needs no iterator object and no exception handling, and which LLVM's
+loop optimizations can analyze.
+
+The length of mutable sequences such as List is computed in the header
+instead, since the loop body may append or remove items.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import inspect
+
+from numba2.compiler.utils import Caller
+from numba2.compiler.optimizations.escape import uses
+from numba2.runtime import builtins
+from numba2.runtime.interfaces import Sequence
+from numba2.runtime.obj import Range, StaticTuple, Array
+
+from pykit import types as ptypes
+from pykit.ir import Builder, Const, Function, Op
+
+#===------------------------------------------------------------------===
+# Pass
+#===------------------------------------------------------------------===
+
+def rewrite_loops(func, env):
+    """Rewrite for loops over sequences to counted loops"""
+    if env['numba.state.opaque']:
+        return
+
+    context = env['numba.typing.context']
+    envs = env['numba.state.envs']
+    users = uses(func)
+
+    for it, seq, next_call in sequence_loops(func, envs, context, users):
+        counted_loop(func, context, it, seq, next_call)
+
+def sequence_loops(func, envs, context, users):
+    """
+    Find loops over sequences, yielding (it, seq, next_call) where `it` is
+    the iterator returned by iter(seq) and `next_call` the only use of `it`.
+    """
+    loops = []
+    for op in func.ops:
+        if not is_call_to(op, builtins.iter, envs):
+            continue
+        [seq] = op.args[1]
+        if not is_sequence(context.get(seq)):
+            continue
+
+        calls = users.get(op, [])
+        if len(calls) != 1 or not is_call_to(calls[0], builtins.next, envs):
+            continue
+
+        next_call = calls[0]
+        if for_iter(next_call) is not None:
+            loops.append((op, seq, next_call))
+
+    return loops
+
+def counted_loop(func, context, it, seq, next_call):
+    """Rewrite the loop of `next_call` to a counted loop"""
+    from numba2 import phase
+
+    exc_setup, jump = for_iter(next_call)
+    header = next_call.block
+    [loopexit] = exc_setup.args[0]
+    [body] = jump.args
+    type = context[seq]
+
+    b = Builder(func)
+    caller = Caller(b, context)
+
+    # -------------------------------------------------
+    # Preheader or header: n = len(seq)
+
+    if fixed_length(type):
+        b.position_after(it)
+    else:
+        b.position_before(exc_setup)
+    n = caller.call(phase.typing, builtins.len, [seq])
+    index_type = context[n]
+    zero = Const(0, ptypes.Opaque)
+    one = Const(1, ptypes.Opaque)
+    context[zero] = context[one] = index_type
+
+    # -------------------------------------------------
+    # Header: i = phi(0, i.next); cbranch(i < n, body, exit)
+
+    i = Op('phi', ptypes.Opaque, [[], []])
+    context[i] = index_type
+    b.position_at_beginning(header)
+    b.emit(i)
+
+    b.position_before(exc_setup)
+    cond = caller.call(phase.typing, index_type.fields['__lt__'], [i, n])
+    jump.replace(Op('cbranch', ptypes.Void, [cond, body, loopexit]))
+
+    # -------------------------------------------------
+    # Body: item = seq[i]; i.next = i + 1
+
+    b.position_at_beginning(body)
+    item = caller.call(phase.typing, type.fields['__getitem__'], [seq, i])
+    inc = caller.call(phase.typing, index_type.fields['__add__'], [i, one])
+
+    preds = predecessors(func, header)
+    i.set_args([preds, [zero if pred is it.block else inc for pred in preds]])
+
+    # -------------------------------------------------
+    # Remove the iterator and exception handling
+
+    next_call.replace_uses(item)
+    next_call.delete()
+    exc_setup.delete()
+    it.delete()
+    for op in list(loopexit):
+        if op.opcode == 'exc_catch':
+            op.delete()
+
+run = rewrite_loops
+
+#===------------------------------------------------------------------===
+# Helpers
+#===------------------------------------------------------------------===
+
+def is_call_to(op, py_func, envs):
+    """Whether `op` calls the typed version of FunctionWrapper `py_func`"""
+    if op.opcode != 'call':
+        return False
+    f = op.args[0]
+    return (isinstance(f, Function) and f in envs and
+            envs[f]['numba.state.function_wrapper'] is py_func)
+
+def is_sequence(ty):
+    """Whether we know how to iterate over values of type `ty` by index"""
+    impl = getattr(ty, 'impl', None)
+    if not inspect.isclass(impl) or not issubclass(impl, Sequence):
+        return False
+    return '__len__' in ty.fields and '__getitem__' in ty.fields
+
+def fixed_length(ty):
+    """Whether the length of sequences of type `ty` is constant"""
+    return issubclass(ty.impl, (Range, StaticTuple, Array))
+
+def for_iter(next_call):
+    """
+    Match the header block of a for loop, which consists of
+
+        exc_setup([exit]); next_call; jump(body)
+
+    Returns (exc_setup, jump) or None.
+    """
+    ops = list(next_call.block)
+    if len(ops) != 3 or ops[1] is not next_call:
+        return None
+    exc_setup, _, jump = ops
+    if exc_setup.opcode != 'exc_setup' or len(exc_setup.args[0]) != 1:
+        return None
+    if jump.opcode != 'jump':
+        return None
+    return exc_setup, jump
+
+def predecessors(func, block):
+    """Blocks branching to `block`"""
+    preds = []
+    for op in func.ops:
+        if op.opcode in ('jump', 'cbranch') and block in op.args:
+            if op.block not in preds:
+                preds.append(op.block)
+    return preds
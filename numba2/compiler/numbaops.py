@@ -8,4 +8,5 @@ from __future__ import print_function, division, absolute_import
 
 from pykit.ir.ops import op
 
-exc_end = op('exc_end')
\ No newline at end of file
+exc_end = op('exc_end')
+yield_ = op('yield')
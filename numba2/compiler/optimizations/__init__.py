@@ -5,4 +5,7 @@ Optimizations package providing high-level optimizations not handled by pykit.
 """
 
 from .pykit_opts import optimize
-from .inlining import inliner
\ No newline at end of file
+from .inlining import inliner
+from .constfolding import constfold
+from .escape import stackalloc
+from .sroa import sroa
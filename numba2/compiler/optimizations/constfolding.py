@@ -1 +1,550 @@
-__author__ = 'mark'
+# -*- coding: utf-8 -*-
+
+"""
+Typed constant folding and sparse conditional constant propagation (SCCP).
+
+We propagate lattice values (undefined, constant, overdefined) over the
+SSA graph, visiting only blocks that are reachable given the constants
+found so far. Afterwards we replace constant values, fold branches on
+constant conditions and delete the blocks that became unreachable.
+
+Calls are evaluated by running the same analysis over the typed IR of the
+callee, with the parameters bound to the lattice values of the arguments.
+This covers the low-level implementations of opaque functions (e.g.
+Int.__add__, sizeof(Type[a]) or cast), as well as pure numba code, e.g.:
+
+    len_range(0, 10, 1)             -> 10
+    isinstance(x, Type[int32])      -> True
+    stop == 0xdeadbeef              -> False, prune the branch
+
+Arithmetic follows the semantics of the generated code: integers wrap
+around, division truncates, and nothing is folded that would trap (e.g.
+division by zero).
+
+A call whose value is folded is only removed if the callee is pure.
+
+Each function records the value it returns when nothing is known about its
+arguments (see 'numba.state.constfold'), which callers use instead of
+analyzing it again for call sites with overdefined arguments.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import math
+import struct
+from collections import namedtuple, deque
+
+from numba2.compiler import representation_type
+
+from pykit import types as ptypes
+from pykit.ir import Function, FuncArg, Op, Const, Block, OpBuilder, defs
+from pykit.utils import flatten, nestedmap
+
+#===------------------------------------------------------------------===
+# Lattice
+#===------------------------------------------------------------------===
+
+class _Undef(object):
+    def __repr__(self):
+        return 'undef'
+
+class _Overdef(object):
+    def __repr__(self):
+        return 'overdef'
+
+undef = _Undef()
+overdef = _Overdef()
+Constant = namedtuple('Constant', ['value'])
+
+class TypeValue(namedtuple('TypeValue', ['type'])):
+    """The value of a Type[a] argument, which is determined by its type"""
+
+def meet(a, b):
+    if a is undef:
+        return b
+    if b is undef or a == b:
+        return a
+    return overdef
+
+class Unfoldable(Exception):
+    """Raised when an operation on constants cannot be folded"""
+
+MAX_DEPTH = 8
+
+# Operations without side effects
+pure_ops = set(['phi', 'ret', 'jump', 'cbranch', 'convert', 'sizeof'])
+
+binary_ops = set(['add', 'sub', 'mul', 'div', 'mod', 'lshift', 'rshift',
+                  'bitand', 'bitor', 'bitxor'])
+compare_ops = set(['lt', 'le', 'gt', 'ge', 'eq', 'ne'])
+unary_ops = set(['invert', 'uadd', 'usub', 'not_'])
+
+pure_ops.update(binary_ops, compare_ops, unary_ops)
+
+#===------------------------------------------------------------------===
+# Pass
+#===------------------------------------------------------------------===
+
+def constfold(func, env):
+    """
+    Fold constants, propagate them through the control flow, and prune the
+    branches they decide.
+    """
+    if env['numba.state.opaque']:
+        return
+
+    context = env['numba.typing.context']
+    folder = Folder(env['numba.state.envs'])
+    sccp = folder.analyze(func, context)
+    env['numba.state.constfold'] = sccp.summary()
+    rewrite(func, context, folder, sccp)
+
+run = constfold
+
+#===------------------------------------------------------------------===
+# Analysis
+#===------------------------------------------------------------------===
+
+class Folder(object):
+    """
+    Evaluates functions on lattice values, memoizing the results of calls.
+    """
+
+    def __init__(self, envs):
+        self.envs = envs
+        self.calls = {}     # (func, argvalues) -> lattice value
+        self.purity = {}    # func -> bool
+        self.active = set() # functions being evaluated, to break recursion
+
+    def analyze(self, func, context, argvalues=None):
+        sccp = SCCP(self, func, context, argvalues)
+        sccp.run()
+        return sccp
+
+    def call(self, func, argvalues, depth):
+        """Evaluate a call to typed function `func`"""
+        if func not in self.envs or func in self.active or depth > MAX_DEPTH:
+            return overdef
+
+        env = self.envs[func]
+        summary = env.get('numba.state.constfold')
+        if summary is not None and summary[0] == tuple(argvalues):
+            return summary[1]
+
+        key = (func, tuple(argvalues))
+        if key not in self.calls:
+            context = env.get('numba.typing.context') or {}
+            self.active.add(func)
+            try:
+                sccp = SCCP(self, func, context, argvalues, depth + 1)
+                sccp.run()
+                result = sccp.return_value()
+            finally:
+                self.active.discard(func)
+
+            self.calls[key] = returned(result)
+
+        return self.calls[key]
+
+    def is_pure(self, func):
+        """Whether calls to `func` have no side effects"""
+        if func not in self.purity:
+            self.purity[func] = False # recursion
+            pure = True
+            for op in func.ops:
+                if op.opcode == 'call':
+                    f = op.args[0]
+                    pure = isinstance(f, Function) and f in self.envs and \
+                           self.is_pure(f)
+                else:
+                    pure = op.opcode in pure_ops
+                if not pure:
+                    break
+            self.purity[func] = pure
+        return self.purity[func]
+
+
+class SCCP(object):
+    """
+    Sparse conditional constant propagation over a single function.
+
+    Results are in `values` (op -> lattice value) and `executable` (the set
+    of reachable blocks).
+    """
+
+    def __init__(self, folder, func, context, argvalues=None, depth=0):
+        self.folder = folder
+        self.func = func
+        self.context = context
+        self.depth = depth
+
+        self.args = {}
+        for i, arg in enumerate(func.args):
+            if argvalues is None:
+                self.args[arg] = self.typevalue(arg) or overdef
+            else:
+                self.args[arg] = argvalues[i]
+
+        self.values = {}
+        self.executable = set()
+        self.edges = set()
+        self.users = {}
+        for op in func.ops:
+            for arg in flatten(op.args):
+                if isinstance(arg, Op):
+                    self.users.setdefault(arg, []).append(op)
+
+    # -------------------------------------------------
+
+    def run(self):
+        blocks = deque()
+        ops = deque()
+
+        def mark_edge(src, dst):
+            if (src, dst) in self.edges:
+                return
+            self.edges.add((src, dst))
+            if dst not in self.executable:
+                self.executable.add(dst)
+                blocks.append(dst)
+            else:
+                # New incoming edge, revisit phis
+                ops.extend(op for op in dst if op.opcode == 'phi')
+
+        self.executable.add(self.func.startblock)
+        blocks.append(self.func.startblock)
+
+        while blocks or ops:
+            if blocks:
+                block = blocks.popleft()
+                todo = list(block)
+            else:
+                op = ops.popleft()
+                if op.block not in self.executable:
+                    continue
+                todo = [op]
+
+            for op in todo:
+                if op.opcode != 'phi' and any(isinstance(x, Block)
+                                              for x in flatten(op.args)):
+                    for target in self.successors(op):
+                        mark_edge(op.block, target)
+                    continue
+
+                value = self.evaluate(op)
+                old = self.values.get(op, undef)
+                new = meet(old, value)
+                if new != old:
+                    self.values[op] = new
+                    ops.extend(self.users.get(op, ()))
+
+    def successors(self, op):
+        """Blocks reachable from `op`, given the current lattice values"""
+        if op.opcode == 'cbranch':
+            cond, truebr, falsebr = op.args
+            value = self.value(cond)
+            if value is undef:
+                return []
+            elif isinstance(value, Constant):
+                return [truebr if value.value else falsebr]
+            return [truebr, falsebr]
+        return [x for x in flatten(op.args) if isinstance(x, Block)]
+
+    # -------------------------------------------------
+
+    def typevalue(self, value):
+        """Values of type Type[a] are known from their type"""
+        from numba2.runtime.obj import Type
+
+        type = self.context.get(value)
+        if getattr(type, 'impl', None) is Type:
+            return TypeValue(type.parameters[0])
+        return None
+
+    def value(self, x):
+        """Lattice value of an operand"""
+        if isinstance(x, Op):
+            return self.values.get(x, undef)
+        elif isinstance(x, FuncArg):
+            return self.args.get(x, overdef)
+
+        typevalue = self.typevalue(x)
+        if typevalue is not None:
+            return typevalue
+        if isinstance(x, Const) and _is_scalar(x.const):
+            return Constant(x.const)
+        return overdef
+
+    def evaluate(self, op):
+        opcode = op.opcode
+        if opcode == 'phi':
+            result = undef
+            for block, value in zip(*op.args):
+                if (block, op.block) in self.edges:
+                    result = meet(result, self.value(value))
+            return result
+
+        if opcode == 'call':
+            f, args = op.args
+            if not isinstance(f, Function):
+                return overdef
+            argvalues = [self.value(arg) for arg in args]
+            if undef in argvalues:
+                return undef
+            return self.folder.call(f, argvalues, self.depth)
+
+        if opcode == 'ret':
+            return self.value(op.args[0]) if op.args else overdef
+
+        if opcode not in pure_ops or opcode in ('jump', 'cbranch'):
+            return overdef
+
+        args = op.args
+        values = [self.value(arg) for arg in args]
+        if undef in values:
+            return undef
+        if not all(isinstance(v, Constant) for v in values):
+            return overdef
+
+        kind = scalar_kind(op, self.context)
+        if kind is None:
+            return overdef
+        argkinds = [scalar_kind(arg, self.context) for arg in args]
+        try:
+            return Constant(fold(opcode, kind, argkinds,
+                                 [v.value for v in values]))
+        except Unfoldable:
+            return overdef
+
+    def return_value(self):
+        """Lattice value of the returned value over all reachable returns"""
+        result = undef
+        for op in self.func.ops:
+            if op.opcode == 'ret' and op.block in self.executable:
+                result = meet(result, self.values.get(op, undef))
+        return result
+
+    def summary(self):
+        """(argument values, return value) for calls with these arguments"""
+        argvalues = tuple(self.args[arg] for arg in self.func.args)
+        return argvalues, returned(self.return_value())
+
+def returned(value):
+    """Value of a call returning `value`"""
+    # Don't exploit functions that never return
+    return overdef if value is undef else value
+
+#===------------------------------------------------------------------===
+# Folding
+#===------------------------------------------------------------------===
+
+def _is_scalar(value):
+    return isinstance(value, (bool, int, long, float))
+
+def scalar_kind(value, context):
+    """
+    Determine ('int', nbits, unsigned), ('float', nbits) or ('bool',) from
+    the low-level type of a value, or its numba type. Returns None for
+    other types.
+    """
+    from numba2.runtime.obj import Int, Float, Bool
+
+    type = getattr(value, 'type', None)
+    if getattr(type, 'is_bool', False):
+        return ('bool',)
+    elif getattr(type, 'is_int', False):
+        return ('int', type.bits, type.unsigned)
+    elif getattr(type, 'is_float', False):
+        return ('float', type.bits)
+
+    type = context.get(value)
+    impl = getattr(type, 'impl', None)
+    if impl is Bool:
+        return ('bool',)
+    elif impl is Int:
+        nbits, unsigned = type.parameters
+        return ('int', nbits, unsigned)
+    elif impl is Float:
+        return ('float', type.parameters[0])
+    return None
+
+def wrap(value, kind):
+    """Convert a python value to the representation of `kind`"""
+    if kind[0] == 'bool':
+        return bool(value)
+    elif kind[0] == 'int':
+        if isinstance(value, float):
+            if math.isnan(value) or math.isinf(value):
+                raise Unfoldable(value)
+            value = int(value) # truncates
+        nbits, unsigned = kind[1], kind[2]
+        value = int(value) & ((1 << nbits) - 1)
+        if not unsigned and value >= 1 << (nbits - 1):
+            value -= 1 << nbits
+        return value
+    else:
+        value = float(value)
+        if kind[1] == 32 and not (math.isnan(value) or math.isinf(value)):
+            try:
+                value = struct.unpack('f', struct.pack('f', value))[0]
+            except OverflowError:
+                raise Unfoldable(value)
+        return value
+
+def fold(opcode, kind, argkinds, args):
+    """
+    Fold operation `opcode` on constant arguments of scalar kinds `argkinds`,
+    producing a value of scalar kind `kind`.
+    """
+    # Unsigned constants may be given as negative python ints (e.g. -1 for
+    # the largest uint32), use the unsigned value
+    args = [wrap(x, k) if k is not None and k[0] == 'int' and k[2] else x
+                for x, k in zip(args, argkinds)]
+
+    if opcode == 'convert':
+        [value] = args
+        return wrap(value, kind)
+
+    if opcode in compare_ops:
+        operator_func = defs.opcode2operator[opcode]
+        return bool(operator_func(*args))
+
+    if opcode in unary_ops:
+        [x] = args
+        if opcode == 'not_':
+            return not x
+        elif opcode == 'invert':
+            if kind[0] != 'int':
+                raise Unfoldable(opcode)
+            return wrap(~x, kind)
+        elif opcode == 'usub':
+            return wrap(-x, kind)
+        return wrap(x, kind)
+
+    if opcode not in binary_ops:
+        raise Unfoldable(opcode)
+
+    x, y = args
+    if kind[0] == 'float':
+        if opcode in ('div', 'mod'):
+            if y == 0:
+                raise Unfoldable(opcode)
+            result = x / y if opcode == 'div' else math.fmod(x, y)
+        elif opcode in ('add', 'sub', 'mul'):
+            result = defs.opcode2operator[opcode](x, y)
+        else:
+            raise Unfoldable(opcode)
+    else:
+        if kind[0] == 'int' and kind[2]:
+            # Operands of unsigned operations are unsigned
+            x, y = wrap(x, kind), wrap(y, kind)
+        if opcode in ('div', 'mod'):
+            if y == 0:
+                raise Unfoldable(opcode)
+            # C semantics: truncate towards zero
+            q = abs(x) // abs(y)
+            if (x < 0) != (y < 0):
+                q = -q
+            result = q if opcode == 'div' else x - q * y
+        elif opcode in ('lshift', 'rshift'):
+            if kind[0] != 'int' or not 0 <= y < kind[1]:
+                raise Unfoldable(opcode)
+            result = x << y if opcode == 'lshift' else x >> y
+        else:
+            result = defs.opcode2operator[opcode](x, y)
+
+    return wrap(result, kind)
+
+#===------------------------------------------------------------------===
+# Rewriting
+#===------------------------------------------------------------------===
+
+def rewrite(func, context, folder, sccp):
+    """Substitute constants and prune unreachable code"""
+    b = OpBuilder()
+    dead = []
+
+    # -------------------------------------------------
+    # Substitute constants
+
+    for op in list(func.ops):
+        if op.block not in sccp.executable or op.opcode == 'ret':
+            continue
+        value = sccp.values.get(op)
+        if not isinstance(value, Constant) or not _is_scalar(value.value):
+            continue
+        if op.opcode == 'call' and not folder.is_pure(op.args[0]):
+            _replace_uses(op, value.value, context)
+        else:
+            _replace_uses(op, value.value, context)
+            dead.append(op)
+
+    # -------------------------------------------------
+    # Fold branches
+
+    for op in list(func.ops):
+        if op.opcode == 'cbranch' and op.block in sccp.executable:
+            cond, truebr, falsebr = op.args
+            value = sccp.value(cond)
+            if isinstance(value, Constant):
+                target, other = (truebr, falsebr) if value.value else \
+                                (falsebr, truebr)
+                op.replace(b.jump(target))
+                if other is not target:
+                    _remove_incoming(other, op.block)
+
+    # -------------------------------------------------
+    # Delete unreachable blocks
+
+    deadblocks = [block for block in func.blocks
+                      if block not in sccp.executable]
+    for block in deadblocks:
+        for op in block:
+            dead.append(op)
+            for target in flatten(op.args):
+                if isinstance(target, Block) and target in sccp.executable:
+                    _remove_incoming(target, block)
+
+    _delete_ops(dead)
+    for block in deadblocks:
+        func.del_block(block)
+
+def _replace_uses(op, value, context):
+    type = op.type
+    if type is None or type == ptypes.Opaque:
+        type = representation_type(context[op]) if op in context else type
+    const = Const(value, type)
+    if op in context:
+        context[const] = context[op]
+    op.replace_uses(const)
+
+def _remove_incoming(block, pred):
+    """Remove the incoming values from `pred` of the phis of `block`"""
+    for op in block:
+        if op.opcode != 'phi':
+            continue
+        blocks, values = op.args
+        incoming = [(b, v) for b, v in zip(blocks, values) if b is not pred]
+        op.set_args([[b for b, v in incoming], [v for b, v in incoming]])
+
+def _delete_ops(ops):
+    """Delete ops, users before definitions"""
+    todo = list(ops)
+    while todo:
+        used = set()
+        for op in todo:
+            used.update(x for x in flatten(op.args) if isinstance(x, Op))
+        remaining = [op for op in todo if op in used]
+        if len(remaining) == len(todo):
+            # Cycles of dead ops, e.g. phis of an unreachable loop
+            placeholder = Const(None, ptypes.Opaque)
+            for op in remaining:
+                op.set_args(nestedmap(
+                    lambda x: placeholder if isinstance(x, Op) else x,
+                    op.args))
+            remaining = []
+
+        for op in todo:
+            if op not in remaining:
+                op.delete()
+        todo = remaining
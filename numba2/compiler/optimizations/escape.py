@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+"""
+Escape analysis, and stack allocation of objects that do not escape.
+
+Objects are heap allocated through the garbage collector (see
+lower/allocation.py) unless their class is stack-allocated (@sjit). After
+inlining, many objects (e.g. Range and RangeIterator in a for loop) are
+only used locally by the function allocating them. We allocate these on the
+stack instead.
+
+An object escapes if a pointer to it may outlive the function call:
+
+    - it is returned
+    - it is stored (in a field or through a pointer)
+    - it is passed to a function that lets the parameter escape
+    - it flows into a phi, which may keep it alive across loop iterations
+
+Objects of classes with a __del__ method stay on the heap (as with @sjit), so
+no finalizers need to be registered for stack-allocated objects. Stack slots
+are zeroed where the heap allocation was, like the memory of the collector.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from numba2.compiler.utils import Caller
+
+from pykit import types as ptypes
+from pykit.ir import Function, FuncArg, Op, Builder
+from pykit.utils import flatten
+
+# Ops producing an alias of their (first) argument
+alias_ops = set(['convert', 'ptrcast', 'bitcast'])
+
+MAX_DEPTH = 8
+
+#===------------------------------------------------------------------===
+# Pass
+#===------------------------------------------------------------------===
+
+def stackalloc(func, env):
+    """Stack-allocate heap objects that do not escape"""
+    from numba2 import phase
+    from numba2.runtime import ffi
+
+    if env['numba.state.opaque']:
+        return
+
+    context = env['numba.typing.context']
+    analysis = EscapeAnalysis(env['numba.state.envs'])
+    allocations = analysis.local_allocations(func, env)
+
+    b = Builder(func)
+    caller = Caller(b, context)
+    for call, obj, type in allocations:
+        b.position_at_beginning(func.startblock)
+        slot = b.alloca(obj.type)
+        if obj in context:
+            context[slot] = context[obj]
+
+        # The collector zeroes the objects it allocates, so zero the slot
+        # each time the allocation runs
+        b.position_before(call)
+        p = b.convert(call.type, slot)
+        context[p] = context[call]
+        f, [n, ty] = call.args
+        zero = caller.call(phase.lower, ffi.memzero, [p, n, ty])
+        zero.type = ptypes.Void
+
+        obj.replace_uses(slot)
+        obj.delete()
+        call.delete()
+
+    env['numba.state.stack_allocated'] = [type for _, _, type in allocations]
+
+run = stackalloc
+
+#===------------------------------------------------------------------===
+# Analysis
+#===------------------------------------------------------------------===
+
+def heap_allocations(func, env):
+    """
+    Find heap allocations in `func`, yielding (call, obj, type) where `call`
+    calls gc_alloc(1, type) and `obj` converts the result to the object.
+    """
+    from numba2.runtime import gc
+
+    gc_alloc = gc.gc_impl(env['numba.gc.impl']).gc_alloc
+    envs = env['numba.state.envs']
+    context = env['numba.typing.context']
+    users = uses(func)
+
+    for op in func.ops:
+        if op.opcode != 'call':
+            continue
+        f, args = op.args
+        if not isinstance(f, Function) or f not in envs:
+            continue
+        if envs[f]['numba.state.function_wrapper'] is not gc_alloc:
+            continue
+
+        n, ty = args
+        if getattr(n, 'const', None) != 1:
+            continue
+        convs = users.get(op, [])
+        if len(convs) == 1 and convs[0].opcode == 'convert':
+            obj = convs[0]
+            if context.get(obj) is not None:
+                yield op, obj, context[obj]
+
+
+class EscapeAnalysis(object):
+    """
+    Determines which values escape a function, memoizing which parameters
+    of callees escape.
+    """
+
+    def __init__(self, envs):
+        self.envs = envs
+        self.params = {} # (func, index) -> bool
+        self.users = {}  # func -> { value : [op] }
+
+    def local_allocations(self, func, env):
+        """Heap allocations of `func` that do not escape"""
+        result = []
+        for call, obj, type in heap_allocations(func, env):
+            if '__del__' in getattr(type, 'fields', {}):
+                continue
+            if not self.escapes(func, obj):
+                result.append((call, obj, type))
+        return result
+
+    def escapes(self, func, value, depth=0):
+        """Whether `value`, a pointer in `func`, may escape"""
+        if func not in self.users:
+            self.users[func] = uses(func)
+        users = self.users[func]
+
+        seen = set()
+        values = [value]
+        while values:
+            v = values.pop()
+            if v in seen:
+                continue
+            seen.add(v)
+
+            for op in users.get(v, ()):
+                opcode = op.opcode
+                if opcode == 'getfield' and op.args[0] is v:
+                    continue
+                elif opcode == 'setfield' and op.args[0] is v \
+                        and op.args[2] is not v:
+                    continue
+                elif opcode in alias_ops:
+                    values.append(op)
+                elif opcode == 'call':
+                    f, args = op.args
+                    for i, arg in enumerate(args):
+                        if arg is v and self.param_escapes(f, i, depth + 1):
+                            return True
+                else:
+                    # ret, phi, store, pointer arithmetic, ...
+                    return True
+
+        return False
+
+    def param_escapes(self, func, i, depth):
+        """Whether parameter `i` of `func` may escape"""
+        if not isinstance(func, Function) or func not in self.envs:
+            return True
+        if depth > MAX_DEPTH or self.envs[func]['numba.state.opaque']:
+            return True
+
+        key = (func, i)
+        if key not in self.params:
+            self.params[key] = True # recursion
+            self.params[key] = self.escapes(func, func.args[i], depth)
+        return self.params[key]
+
+def uses(func):
+    """Map values (ops and arguments) of `func` to the ops using them"""
+    users = {}
+    for op in func.ops:
+        for arg in flatten(op.args):
+            if isinstance(arg, (Op, FuncArg)):
+                users.setdefault(arg, []).append(op)
+    return users
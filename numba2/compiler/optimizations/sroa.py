@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+Scalar replacement of aggregates.
+
+After inlining and stack allocation (see escape.py), objects such as
+RangeIterator are stack slots that are only accessed through getfield and
+setfield:
+
+    %it = alloca(Pointer(Struct([start, stop, step], ...)))
+    setfield(%it, 'start', %0)
+    %1 = getfield(%it, 'start')
+
+We split these objects into one stack slot per field:
+
+    %it.start = alloca(Pointer(int64))
+    store(%0, %it.start)
+    %1 = load(%it.start)
+
+which the subsequent cfa pass promotes to SSA values, so that LLVM can keep
+the fields in registers.
+
+Objects passed to a call stay in memory, since the callee needs a pointer
+to them. Constructors and methods of such objects must therefore be
+inlined to be split, which is the case for fabricated constructors and
+@ijit methods.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from pykit import types as ptypes
+from pykit.ir import Builder
+
+from .escape import uses
+
+#===------------------------------------------------------------------===
+# Pass
+#===------------------------------------------------------------------===
+
+def sroa(func, env):
+    """Split stack-allocated objects into their fields"""
+    if env['numba.state.opaque']:
+        return
+
+    context = env['numba.typing.context']
+    users = uses(func)
+    b = Builder(func)
+
+    for alloca in aggregates(func, users):
+        struct = alloca.type.base
+        accesses = users[alloca]
+
+        # Allocate a slot for each accessed field in place of the object
+        b.position_after(alloca)
+        slots = {}
+        for op in accesses:
+            attr = fieldname(op)
+            if attr not in slots:
+                ftype = struct.types[struct.names.index(attr)]
+                slots[attr] = b.alloca(ptypes.Pointer(ftype))
+
+        for op in accesses:
+            attr = fieldname(op)
+            b.position_before(op)
+            if op.opcode == 'getfield':
+                value = b.load(slots[attr])
+                if op in context:
+                    context[value] = context[op]
+                op.replace_uses(value)
+            else:
+                b.store(op.args[2], slots[attr])
+            op.delete()
+
+        alloca.delete()
+
+run = sroa
+
+#===------------------------------------------------------------------===
+# Analysis
+#===------------------------------------------------------------------===
+
+def aggregates(func, users):
+    """
+    Find stack-allocated objects in `func` of which only the fields are
+    accessed, and which can therefore be split.
+    """
+    result = []
+    for op in func.ops:
+        if op.opcode != 'alloca' or not op.type.base.is_struct:
+            continue
+        struct = op.type.base
+        accesses = users.get(op, [])
+        if accesses and all(splittable(op, struct, use) for use in accesses):
+            result.append(op)
+    return result
+
+def splittable(alloca, struct, op):
+    """Whether `op` accesses a scalar field of `alloca`"""
+    if op.opcode == 'getfield':
+        pass
+    elif op.opcode == 'setfield':
+        if op.args[2] is alloca:
+            return False
+    else:
+        return False
+
+    attr = fieldname(op)
+    if op.args[0] is not alloca or attr not in struct.names:
+        return False
+    return not struct.types[struct.names.index(attr)].is_struct
+
+def fieldname(op):
+    attr = op.args[1]
+    return getattr(attr, 'const', attr)
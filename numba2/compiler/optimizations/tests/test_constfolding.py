@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, environment, phase, int32
+from numba2.runtime.obj.rangeobject import len_range
+from numba2.compiler.optimizations.constfolding import (
+    fold, wrap, meet, Constant, Unfoldable, undef, overdef)
+
+def optimized(f, argtypes):
+    env = environment.fresh_env(f, argtypes)
+    func, env = phase.opt(f, env)
+    return func
+
+def opcodes(func):
+    return [op.opcode for op in func.ops]
+
+#===------------------------------------------------------------------===
+# Tests
+#===------------------------------------------------------------------===
+
+class TestFold(unittest.TestCase):
+
+    def test_meet(self):
+        self.assertEqual(meet(undef, Constant(1)), Constant(1))
+        self.assertEqual(meet(Constant(1), Constant(1)), Constant(1))
+        self.assertIs(meet(Constant(1), Constant(2)), overdef)
+        self.assertIs(meet(overdef, undef), overdef)
+
+    def test_int_semantics(self):
+        int8 = ('int', 8, False)
+        uint8 = ('int', 8, True)
+        self.assertEqual(fold('add', int8, [int8, int8], [127, 1]), -128)
+        self.assertEqual(fold('sub', uint8, [uint8, uint8], [0, 1]), 255)
+        self.assertEqual(fold('div', int8, [int8, int8], [-7, 2]), -3)
+        self.assertEqual(fold('mod', int8, [int8, int8], [-7, 2]), -1)
+        self.assertRaises(Unfoldable, fold, 'div', int8, [int8, int8], [1, 0])
+        self.assertRaises(Unfoldable, fold, 'lshift', int8, [int8, int8],
+                          [1, 8])
+
+    def test_unsigned_compare(self):
+        uint8 = ('int', 8, True)
+        int32 = ('int', 32, False)
+        bool_ = ('bool',)
+        self.assertEqual(fold('gt', bool_, [uint8, uint8], [-1, 1]), True)
+        self.assertEqual(fold('eq', bool_, [uint8, uint8], [-1, 255]), True)
+        self.assertEqual(fold('convert', int32, [uint8], [-1]), 255)
+
+    def test_float_semantics(self):
+        float64 = ('float', 64)
+        self.assertEqual(fold('mod', float64, [float64] * 2, [-7.0, 2.0]), -1.0)
+        self.assertEqual(fold('lt', ('bool',), [float64] * 2, [1.0, 2.0]), True)
+        self.assertEqual(wrap(2.7, ('int', 32, False)), 2)
+        self.assertEqual(wrap(0.1, ('float', 32)), 0.10000000149011612)
+
+
+class TestConstantPropagation(unittest.TestCase):
+
+    def test_prune_branch(self):
+        @jit
+        def f(x):
+            y = 2
+            if y < 3:
+                return x + y
+            return x - y
+
+        self.assertEqual(f(1), 3)
+        self.assertNotIn('cbranch', opcodes(optimized(f, [int32])))
+
+    def test_fold_call(self):
+        @jit
+        def f():
+            return len_range(0, 10, 3)
+
+        self.assertEqual(f(), 4)
+        self.assertNotIn('call', opcodes(optimized(f, [])))
+
+    def test_call_summary(self):
+        @jit
+        def g(x):
+            return 3
+
+        @jit
+        def f(x):
+            return g(x) + 1
+
+        self.assertEqual(f(2), 4)
+        env = environment.fresh_env(f, [int32])
+        func, env = phase.opt(f, env)
+        summaries = [e['numba.state.constfold']
+                         for e in env['numba.state.envs'].values()
+                             if e['numba.state.func_name'] == 'g']
+        self.assertIn(((overdef,), Constant(3)), summaries)
+
+    def test_loop(self):
+        @jit
+        def f(n):
+            s = 0
+            for i in range(n):
+                s = s + i
+            return s
+
+        self.assertEqual(f(5), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, int32, environment, phase
+
+#===------------------------------------------------------------------===
+# Test code
+#===------------------------------------------------------------------===
+
+@jit
+class C(object):
+    layout = [('x', int32)]
+
+    @jit
+    def __init__(self, x):
+        self.x = x
+
+    @jit
+    def method(self, other):
+        return self.x * other.x
+
+@jit
+class Partial(object):
+    layout = [('x', int32), ('y', int32)]
+
+    @jit
+    def __init__(self, x):
+        self.x = x
+
+@jit
+def uninitialized(n):
+    s = 0
+    for i in range(n):
+        p = Partial(i)
+        s = s + p.x + p.y
+        p.y = 100
+    return s
+
+@jit
+def local_objects(x):
+    return C(x).method(C(2))
+
+@jit
+def return_obj(x):
+    return C(x)
+
+@jit
+def loop(n):
+    s = 0
+    for i in range(n):
+        s = s + i
+    return s
+
+def stack_allocated(f, argtypes):
+    env = environment.fresh_env(f, argtypes)
+    func, env = phase.lower(f, env)
+    return env['numba.state.stack_allocated']
+
+#===------------------------------------------------------------------===
+# Tests
+#===------------------------------------------------------------------===
+
+class TestEscapeAnalysis(unittest.TestCase):
+
+    def test_local(self):
+        self.assertEqual(local_objects(3), 6)
+        self.assertEqual(len(stack_allocated(local_objects, [int32])), 2)
+
+    def test_escaping(self):
+        self.assertEqual(return_obj(3).x, 3)
+        self.assertEqual(stack_allocated(return_obj, [int32]), [])
+
+    def test_zeroed(self):
+        # Fields are zeroed on every allocation, as on the heap
+        self.assertEqual(uninitialized(10), 45)
+        self.assertEqual(len(stack_allocated(uninitialized, [int32])), 1)
+
+    def test_loop(self):
+        self.assertEqual(loop(10), 45)
+        names = [type.impl.__name__ for type in stack_allocated(loop, [int32])]
+        # The counted loop (lower/loops.py) needs no iterator
+        self.assertIn('Range', names)
+        self.assertNotIn('RangeIterator', names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, ijit, int32, environment, phase
+
+#===------------------------------------------------------------------===
+# Test code
+#===------------------------------------------------------------------===
+
+@jit
+class Pair(object):
+    layout = [('a', int32), ('b', int32)]
+
+    @ijit
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+
+    @ijit
+    def swap(self):
+        self.a, self.b = self.b, self.a
+
+    @jit
+    def diff(self):
+        return self.a - self.b
+
+@jit
+class Point(object):
+    layout = [('x', int32), ('y', int32)]
+
+@jit
+def pair(x, y):
+    p = Pair(x, y)
+    p.swap()
+    return p.a - p.b
+
+@jit
+def point(x, y):
+    p = Point(x, y)
+    return p.x * p.y
+
+@jit
+def pair_call(x, y):
+    return Pair(x, y).diff()
+
+@jit
+def loop(n):
+    s = 0
+    for i in range(n):
+        s = s + i
+    return s
+
+def opcodes(f, argtypes):
+    env = environment.fresh_env(f, argtypes)
+    func, env = phase.lower(f, env)
+    return set(op.opcode for op in func.ops)
+
+memory_ops = set(['alloca', 'load', 'store', 'getfield', 'setfield'])
+
+#===------------------------------------------------------------------===
+# Tests
+#===------------------------------------------------------------------===
+
+class TestSROA(unittest.TestCase):
+
+    def test_object(self):
+        self.assertEqual(pair(3, 5), 2)
+        self.assertFalse(opcodes(pair, [int32, int32]) & memory_ops)
+
+    def test_constructor(self):
+        # Fabricated constructors are inlined
+        self.assertEqual(point(3, 5), 15)
+        self.assertFalse(opcodes(point, [int32, int32]) & memory_ops)
+
+    def test_call(self):
+        # Objects passed to a call are not split
+        self.assertEqual(pair_call(3, 5), -2)
+        self.assertIn('alloca', opcodes(pair_call, [int32, int32]))
+
+    def test_loop(self):
+        self.assertEqual(loop(10), 45)
+        self.assertFalse(opcodes(loop, [int32]) & memory_ops)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function, division, absolute_import
 
+import itertools
+
 from numba2.typing import resolve, to_blaze
 
 from blaze import overloading
@@ -49,12 +51,39 @@ def best_match(func_wrapper, argtypes):
     scope = determine_scope(func_wrapper.py_func)
     bound = {} # TODO:
     overloaded = resolve_overloads(o, scope, bound)
-    argtypes = [to_blaze(t) for t in argtypes]
 
-    overload = overloading.best_match(overloaded, argtypes)
+    try:
+        overload = overloading.best_match(overloaded,
+                                          [to_blaze(t) for t in argtypes])
+    except overloading.OverloadError:
+        overload = coerced_match(overloaded, argtypes)
+
     signature = resolve(overload.resolved_sig, scope, bound)
     return (overload.func, signature, overload.kwds)
 
 
+def coerced_match(overloaded, argtypes):
+    """
+    Find an overload after coercing some arguments to their supertypes, e.g.
+    CArray -> Array. Fewer coerced arguments are tried first, so that an
+    argument keeps its type when an overload accepts it.
+    """
+    from numba2.rules import supertype
+
+    coercible = [i for i, t in enumerate(argtypes) if supertype(t) != t]
+    for n in range(1, len(coercible) + 1):
+        for indices in itertools.combinations(coercible, n):
+            coerced = [supertype(t) if i in indices else t
+                           for i, t in enumerate(argtypes)]
+            try:
+                return overloading.best_match(overloaded,
+                                              [to_blaze(t) for t in coerced])
+            except overloading.OverloadError:
+                pass
+
+    # Report the error for the original argument types
+    return overloading.best_match(overloaded, [to_blaze(t) for t in argtypes])
+
+
 def determine_scope(py_func):
     return py_func.__globals__
\ No newline at end of file
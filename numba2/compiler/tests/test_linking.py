@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, int32, environment, utils
+
+def make_functions():
+    @jit
+    def g(x):
+        return x * 2
+
+    @jit
+    def f(x):
+        return g(x) + 1
+
+    return f, g
+
+class TestLinking(unittest.TestCase):
+
+    def test_inline_across_functions(self):
+        f, g = make_functions()
+        self.assertEqual(f(10), 21)
+
+        env = f.envs[(int32,)]
+        lfunc = env["numba.state.llvm_func"]
+        self.assertTrue(env["numba.state.linked"])
+        self.assertNotIn("call", str(lfunc))
+
+    def test_per_function_modules(self):
+        root_env = environment.root_env
+        env = dict(root_env)
+        env['numba.link.mode'] = 'function'
+        environment.root_env = utils.FrozenDict(env)
+        try:
+            f, g = make_functions()
+            self.assertEqual(f(10), 21)
+            self.assertFalse(f.envs[(int32,)].get("numba.state.linked"))
+        finally:
+            environment.root_env = root_env
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, int32, environment, phase
+
+#===------------------------------------------------------------------===
+# Test code
+#===------------------------------------------------------------------===
+
+@jit
+def loop(n):
+    s = 0
+    for i in range(n):
+        s = s + i
+    return s
+
+@jit
+def loop_step(start, stop, step):
+    s = 0
+    for i in range(start, stop, step):
+        s = s * 2 + i
+    return s
+
+@jit
+def loop_break(n):
+    s = 0
+    for i in range(n):
+        if i == 5:
+            break
+        if i == 2:
+            continue
+        s = s + i
+    return s
+
+@jit
+def nested(n):
+    s = 0
+    for i in range(n):
+        for j in range(i):
+            s = s + j
+    return s
+
+@jit
+def grow(lst):
+    for x in lst:
+        if x > 0:
+            lst.append(x - 1)
+    return len(lst)
+
+@jit
+def shrink(lst):
+    n = 0
+    for x in lst:
+        lst.pop()
+        n = n + 1
+    return n
+
+def opcodes(f, argtypes):
+    env = environment.fresh_env(f, argtypes)
+    func, env = phase.typing(f, env)
+    return set(op.opcode for op in func.ops)
+
+#===------------------------------------------------------------------===
+# Tests
+#===------------------------------------------------------------------===
+
+class TestCountedLoops(unittest.TestCase):
+
+    def test_range(self):
+        self.assertEqual(loop(10), 45)
+        self.assertEqual(loop(0), 0)
+        self.assertEqual(loop(-3), 0)
+
+    def test_step(self):
+        for args in [(0, 10, 3), (10, 0, -3), (10, 0, 3), (-5, 5, 2)]:
+            self.assertEqual(loop_step(*args), loop_step.py_func(*args))
+
+    def test_break_continue(self):
+        self.assertEqual(loop_break(10), 8)
+        self.assertEqual(loop_break(3), 1)
+
+    def test_nested(self):
+        self.assertEqual(nested(5), nested.py_func(5))
+
+    def test_mutated_list(self):
+        self.assertEqual(grow([3]), grow.py_func([3]))
+        self.assertEqual(shrink([1, 2, 3, 4]), shrink.py_func([1, 2, 3, 4]))
+
+    def test_no_exceptions(self):
+        ops = opcodes(loop, [int32])
+        self.assertNotIn('exc_setup', ops)
+        self.assertNotIn('exc_catch', ops)
+        self.assertIn('phi', ops)
+
+
+if __name__ == '__main__':
+    unittest.main()
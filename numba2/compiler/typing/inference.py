@@ -37,6 +37,7 @@ from numba2.typing import resolve_simple, TypeVar
 from numba2.functionwrapper import FunctionWrapper
 from numba2.prettyprint import debug_print
 from .resolution import infer_call
+from . import solver
 from .. import opaque
 
 import pykit.types
@@ -82,7 +83,14 @@ class Context(object):
         metadata: { Node : dict }
             extra metadata for graph nodes in the constraint graph
 
-    Only 'context' is mutable after construction!
+        calls: { (Node, func_type, argtypes) : (signature, restype) }
+            resolved call combinations, populated during inference
+
+        resolutions: int
+            number of calls resolved during inference
+
+    Only 'context', 'calls' and 'resolutions' are mutable after
+    construction!
     """
 
     def __init__(self, func, context, constraints, graph, metadata):
@@ -91,6 +99,8 @@ class Context(object):
         self.constraints = constraints
         self.graph = graph
         self.metadata = metadata
+        self.calls = {}
+        self.resolutions = 0
 
     def copy(self):
         return Context(self.func, copy_context(self.context),
@@ -108,8 +118,10 @@ def run(func, env):
     env['numba.typing.signature'] = signature
     env['numba.typing.context'] = ctx.context
     env['numba.typing.constraints'] = ctx.constraints
+    env['numba.typing.calls'] = ctx.resolutions
 
     if debug_print(func, env):
+        print("Call resolutions: %d" % ctx.resolutions)
         print("Type context:".center(90))
         for op, typeset in ctx.context.iteritems():
             print("%s%15s = %s" % (" " * 30, op, typeset))
@@ -134,7 +146,8 @@ def infer(cache, func, env, argtypes):
     if env["numba.state.opaque"]:
         ctx = infer_opaque(func, env, argtypes)
     else:
-        ctx = infer_function(cache, func, argtypes)
+        engine = env["numba.inference.engine"]
+        ctx = infer_function(cache, func, argtypes, engine)
 
     # -------------------------------------------------
     # Cache result
@@ -159,13 +172,25 @@ def infer_opaque(func, env, argtypes):
     envs[func] = env
     return ctx
 
-def infer_function(cache, func, argtypes):
+def infer_function(cache, func, argtypes, engine='indexed'):
+    """
+    Infer a function with the given inference engine:
+
+        'graph':    networkx constraint graph, see infer_graph
+        'indexed':  indexed constraint graph, see solver.infer_indexed
+        'compare':  run both engines, and raise an InferError if they
+                    disagree
+    """
+    if engine == 'compare':
+        return compare_engines(cache, func, argtypes)
+
     # -------------------------------------------------
     # Build template
 
+    indexed = engine == 'indexed'
     ctx = cache.lookup_ctx(func)
-    if ctx is None:
-        ctx = build_graph(func)
+    if ctx is None or isinstance(ctx.graph, solver.IndexedGraph) != indexed:
+        ctx = solver.build_indexed(func) if indexed else build_graph(func)
         cache.ctxs[func] = ctx
 
     ctx = ctx.copy()
@@ -174,17 +199,48 @@ def infer_function(cache, func, argtypes):
     # Infer typing context
 
     seed_context(ctx, argtypes)
-    infer_graph(cache, ctx)
+    if indexed:
+        solver.infer_indexed(cache, ctx)
+    else:
+        infer_graph(cache, ctx)
     return ctx
 
+def compare_engines(cache, func, argtypes):
+    """Infer with both engines and check that the results are the same"""
+    graph_ctx = infer_function(cache, func, argtypes, 'graph')
+    indexed_ctx = infer_function(cache, func, argtypes, 'indexed')
+
+    for node, typeset, other in disagreements(graph_ctx.context,
+                                              indexed_ctx.context):
+        raise InferError(
+            "Inference engines disagree on %s in function %s: %s "
+            "(graph) vs %s (indexed)" % (node, func.name, typeset, other))
+
+    return graph_ctx
+
+def disagreements(context, other):
+    """
+    Yield (node, typeset, other typeset) for the nodes of either typing
+    context whose type sets differ. A node missing from one of the contexts
+    has typeset None there.
+    """
+    for node in set(context) | set(other):
+        typeset, othertypes = context.get(node), other.get(node)
+        if not isinstance(typeset, set) and not isinstance(othertypes, set):
+            continue # not inferred, e.g. constants
+        if typeset is None or othertypes is None or \
+                set(typeset) != set(othertypes):
+            yield node, typeset, othertypes
+
 # ______________________________________________________________________
 
-def build_graph(func):
+def build_graph(func, G=None):
     """
     Build a constraint network and initial context. This is a generic
     templates share-able between input types.
     """
-    G = networkx.DiGraph()
+    if G is None:
+        G = networkx.DiGraph()
     context = initial_context(func)
 
     for op in func.ops:
@@ -403,8 +459,6 @@ def infer_node(cache, ctx, node):
     incoming = ctx.graph.predecessors(node)
     outgoing = ctx.graph.neighbors(node)
 
-    processed = set()
-
     if C == 'pointer':
         for neighbor in incoming:
             for type in ctx.context[neighbor]:
@@ -423,15 +477,7 @@ def infer_node(cache, ctx, node):
         [neighbor] = incoming
         attr = ctx.metadata[node]['attr']
         for type in ctx.context[neighbor]:
-            if attr in type.fields:
-                value = type.fields[attr]
-                func, self = value, type
-                result = Method(func, self)
-            elif attr in type.layout:
-                result = type.resolved_layout[attr]
-            else:
-                raise InferError("Type %s has no attribute %s" % (type, attr))
-
+            result = attribute_type(type, attr)
             changed |= result not in typeset
             typeset.add(result)
 
@@ -441,22 +487,55 @@ def infer_node(cache, ctx, node):
         func_types = ctx.context[func]
         arg_typess = [ctx.context[arg] for arg in ctx.metadata[node]['args']]
 
-        # Iterate over cartesian product, processing only unpreviously
-        # processed combinations
+        # Iterate over cartesian product, processing only combinations
+        # not resolved in previous visits
         for func_type in set(func_types):
             for arg_types in product(*arg_typess):
-                key = (node, func_type, tuple(arg_types))
-                if key not in processed:
-                    processed.add(key)
-                    _, signature, result = infer_call(func, func_type, arg_types)
-                    if isinstance(result, TypeVar):
-                        raise TypeError("Expected a concrete type result, "
-                                        "not a type variable! (%s)" % (func,))
-                    changed |= result not in typeset
-                    typeset.add(result)
-                    if None in func_types:
-                        func_types.remove(None)
-                        func_types.add(signature)
+                resolved = call_type(ctx, node, func, func_type, arg_types)
+                if resolved is None:
+                    continue
+                signature, result = resolved
+                changed |= result not in typeset
+                typeset.add(result)
+                if None in func_types:
+                    func_types.remove(None)
+                    func_types.add(signature)
 
     return changed
 
+# ______________________________________________________________________
+# Rules shared by the inference engines
+
+def attribute_type(type, attr):
+    """Type of attribute `attr` of a value of type `type`"""
+    if attr in type.fields:
+        value = type.fields[attr]
+        func, self = value, type
+        return Method(func, self)
+    elif attr in type.layout:
+        return type.resolved_layout[attr]
+    else:
+        raise InferError("Type %s has no attribute %s" % (type, attr))
+
+def call_type(ctx, node, func, func_type, arg_types):
+    """
+    Infer a call combination of call `node`, returns the signature and
+    result type. Returns None if the combination was resolved before, in
+    which case its result is already part of the typeset of `node`.
+    """
+    key = (node, func_type, tuple(arg_types))
+    if key in ctx.calls:
+        return None
+
+    _, signature, result = infer_call(func, func_type, arg_types)
+    if isinstance(result, TypeVar):
+        raise TypeError("Expected a concrete type result, "
+                        "not a type variable! (%s)" % (func,))
+
+    ctx.resolutions += 1
+    ctx.calls[key] = signature, result
+    if func_type is None:
+        # The function type of the call is replaced by `signature`, which
+        # resolves to the same result
+        ctx.calls[node, signature, tuple(arg_types)] = signature, result
+    return signature, result
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+"""
+Indexed constraint solver for type inference.
+
+This is an alternative to the networkx based engine in inference.py, which
+computes the same typing context:
+
+    - nodes of the constraint graph are numbered densely, and edges are
+      stored as adjacency lists of node indices
+    - types are interned per function, and typesets are represented as
+      bitsets (python ints) over the interned type IDs
+    - nodes are visited in topological order of the strongly connected
+      components of the graph. All predecessors of a component are final by
+      the time we visit it, so acyclic nodes are visited exactly once, and
+      only the nodes of a cycle are iterated to a fixpoint.
+"""
+
+from __future__ import print_function, division, absolute_import
+import collections
+from itertools import product
+
+from numba2.types import Mono
+
+#===------------------------------------------------------------------===
+# Graph
+#===------------------------------------------------------------------===
+
+class IndexedGraph(object):
+    """
+    Constraint graph with densely numbered nodes. Supports the part of the
+    networkx API used by the constraint generator (add_node and add_edge).
+
+    After `freeze`, nodes are in `nodes`, and `preds` and `succs` map node
+    indices to lists of node indices.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.index = {}     # node -> index
+        self.edges = set()  # (src index, dst index)
+        self.preds = None
+        self.succs = None
+        self.order = None   # [[index]], SCCs in topological order
+
+    def id(self, node):
+        idx = self.index.get(node)
+        if idx is None:
+            idx = len(self.nodes)
+            self.index[node] = idx
+            self.nodes.append(node)
+        return idx
+
+    def add_node(self, node):
+        self.id(node)
+
+    def add_edge(self, src, dst):
+        self.edges.add((self.id(src), self.id(dst)))
+
+    def freeze(self):
+        n = len(self.nodes)
+        self.preds = [[] for i in range(n)]
+        self.succs = [[] for i in range(n)]
+        for src, dst in sorted(self.edges):
+            self.succs[src].append(dst)
+            self.preds[dst].append(src)
+        self.order = strongly_connected_components(self.succs)
+        return self
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        return len(self.edges)
+
+
+def strongly_connected_components(succs):
+    """
+    Compute the strongly connected components of a graph given as adjacency
+    lists, in topological order (Tarjan's algorithm, iteratively).
+    """
+    n = len(succs)
+    index = [None] * n
+    lowlink = [0] * n
+    onstack = [False] * n
+    stack = []
+    result = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] is not None:
+            continue
+
+        work = [(root, 0)]
+        while work:
+            v, i = work[-1]
+            if i == 0:
+                index[v] = lowlink[v] = counter
+                counter += 1
+                stack.append(v)
+                onstack[v] = True
+
+            if i < len(succs[v]):
+                work[-1] = (v, i + 1)
+                w = succs[v][i]
+                if index[w] is None:
+                    work.append((w, 0))
+                elif onstack[w]:
+                    lowlink[v] = min(lowlink[v], index[w])
+                continue
+
+            work.pop()
+            if work:
+                u = work[-1][0]
+                lowlink[u] = min(lowlink[u], lowlink[v])
+
+            if lowlink[v] == index[v]:
+                scc = []
+                while True:
+                    w = stack.pop()
+                    onstack[w] = False
+                    scc.append(w)
+                    if w == v:
+                        break
+                result.append(scc)
+
+    # Components are found in reverse topological order
+    result.reverse()
+    return result
+
+#===------------------------------------------------------------------===
+# Typesets
+#===------------------------------------------------------------------===
+
+class TypeTable(object):
+    """
+    Interned types, mapping typesets to bitsets over type IDs and back.
+    """
+
+    def __init__(self):
+        self.types = []
+        self.ids = {}
+        self.decoded = {}
+
+    def id(self, type):
+        tid = self.ids.get(type)
+        if tid is None:
+            tid = len(self.types)
+            self.ids[type] = tid
+            self.types.append(type)
+        return tid
+
+    def bits(self, typeset):
+        result = 0
+        for type in typeset:
+            result |= 1 << self.id(type)
+        return result
+
+    def members(self, bits):
+        result = self.decoded.get(bits)
+        if result is None:
+            result = []
+            tid, rest = 0, bits
+            while rest:
+                if rest & 1:
+                    result.append(self.types[tid])
+                rest >>= 1
+                tid += 1
+            self.decoded[bits] = result
+        return result
+
+#===------------------------------------------------------------------===
+# Solver
+#===------------------------------------------------------------------===
+
+def build_indexed(func):
+    """Build an inference context with an IndexedGraph"""
+    from .inference import build_graph
+
+    ctx = build_graph(func, IndexedGraph())
+    ctx.graph.freeze()
+    return ctx
+
+def infer_indexed(cache, ctx):
+    """
+    Type inference on an indexed constraint graph. Updates the typesets of
+    `ctx.context` in place.
+    """
+    G = ctx.graph
+    nodes = G.nodes
+    succs = G.succs
+    table = TypeTable()
+
+    # -------------------------------------------------
+    # Initialize typesets and constraints
+
+    fixed = [isinstance(node, Mono) for node in nodes]
+    sets = [table.bits([node] if is_fixed else ctx.context[node])
+                for node, is_fixed in zip(nodes, fixed)]
+    constraints = [ctx.constraints.get(node, 'flow') for node in nodes]
+
+    solver = _Solver(cache, ctx, table, sets, fixed, constraints)
+
+    # -------------------------------------------------
+    # Visit components in topological order
+
+    for scc in G.order:
+        if len(scc) == 1 and scc[0] not in succs[scc[0]]:
+            solver.visit(scc[0])
+            continue
+
+        members = set(scc)
+        W = collections.deque(scc)
+        queued = set(scc)
+        while W:
+            node = W.popleft()
+            queued.discard(node)
+            if solver.visit(node):
+                for neighbor in succs[node]:
+                    if neighbor in members and neighbor not in queued:
+                        queued.add(neighbor)
+                        W.append(neighbor)
+
+    # -------------------------------------------------
+    # Update context
+
+    for idx, node in enumerate(nodes):
+        if not fixed[idx]:
+            typeset = ctx.context[node]
+            typeset.clear()
+            typeset.update(table.members(sets[idx]))
+
+
+class _Solver(object):
+    """Inference rules over bitsets, see inference.infer_node"""
+
+    def __init__(self, cache, ctx, table, sets, fixed, constraints):
+        self.cache = cache
+        self.ctx = ctx
+        self.table = table
+        self.sets = sets
+        self.fixed = fixed
+        self.constraints = constraints
+        self.index = ctx.graph.index
+        self.preds = ctx.graph.preds
+        self.attrs = {}     # (type, attr) -> type
+
+    def visit(self, node):
+        """Visit a node, returns whether its typeset changed"""
+        if self.fixed[node]:
+            return False
+
+        C = self.constraints[node]
+        sets = self.sets
+        old = sets[node]
+
+        if C == 'pointer' or C == 'flow':
+            new = old
+            for neighbor in self.preds[node]:
+                new |= sets[neighbor]
+        elif C == 'attr':
+            new = old | self.infer_attr(node)
+        else:
+            assert C == 'call'
+            new = old | self.infer_call(node)
+
+        sets[node] = new
+        return new != old
+
+    def infer_attr(self, node):
+        from .inference import attribute_type
+
+        [neighbor] = self.preds[node]
+        op = self.ctx.graph.nodes[node]
+        attr = self.ctx.metadata[op]['attr']
+        result = 0
+        for type in self.table.members(self.sets[neighbor]):
+            key = (type, attr)
+            if key not in self.attrs:
+                self.attrs[key] = attribute_type(type, attr)
+            result |= 1 << self.table.id(self.attrs[key])
+        return result
+
+    def infer_call(self, node):
+        from .inference import call_type
+
+        table, sets = self.table, self.sets
+        op = self.ctx.graph.nodes[node]
+        metadata = self.ctx.metadata[op]
+        func = metadata['func']
+        func_node = self.index[func]
+        arg_typess = [table.members(sets[self.index[arg]])
+                          for arg in metadata['args']]
+
+        result = 0
+        for func_type in table.members(sets[func_node]):
+            for arg_types in product(*arg_typess):
+                resolved = call_type(self.ctx, op, func, func_type, arg_types)
+                if resolved is None:
+                    continue
+                signature, restype = resolved
+                result |= 1 << table.id(restype)
+                none = 1 << table.id(None)
+                if sets[func_node] & none:
+                    sets[func_node] &= ~none
+                    sets[func_node] |= 1 << table.id(signature)
+
+        return result
@@ -70,6 +70,21 @@ class TestInfer(unittest.TestCase):
         type = resolve(type, globals(), {})
         #self.assertEqual(type, set([Bool]))
 
+    def test_call_resolutions(self):
+        def loop(a, b):
+            result = a
+            while a > b:
+                result = b
+            return result
+
+        f = jit(loop)
+        env = environment.fresh_env(f, [int32, int32])
+        env['numba.inference.engine'] = 'graph'
+        func, env = phase.typing(f, env)
+
+        # Revisiting the loop must not resolve the comparison again
+        self.assertEqual(env['numba.typing.calls'], 1)
+
 
 if __name__ == '__main__':
     #TestInfer('test_simple').debug()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+import unittest
+
+from numba2 import jit, phase, environment
+from numba2.types import Function, Int
+from numba2.compiler.typing.solver import (strongly_connected_components,
+                                           TypeTable)
+from numba2.compiler.typing.inference import disagreements
+
+int32 = Int[32, False]
+
+def get(f, argtypes, engine):
+    f = jit(f)
+    env = environment.fresh_env(f, argtypes)
+    env['numba.inference.engine'] = engine
+    func, env = phase.typing(f, env)
+    return env['numba.typing.signature']
+
+class TestSCC(unittest.TestCase):
+
+    def test_topological_order(self):
+        # 0 -> 1 -> 2 -> 1, 2 -> 3
+        succs = [[1], [2], [1, 3], []]
+        sccs = strongly_connected_components(succs)
+        self.assertEqual([sorted(scc) for scc in sccs], [[0], [1, 2], [3]])
+
+    def test_typetable(self):
+        table = TypeTable()
+        bits = table.bits(['a', 'b'])
+        self.assertEqual(table.bits(['b']) | bits, bits)
+        self.assertEqual(sorted(table.members(bits)), ['a', 'b'])
+
+
+class TestEngines(unittest.TestCase):
+
+    def test_compare_loop(self):
+        def loop(a, b):
+            result = a
+            while a > b:
+                result = b
+                a = a - 1
+            return result
+
+        signature = get(loop, [int32, int32], 'compare')
+        self.assertEqual(signature, Function[int32, int32, int32])
+
+    def test_disagreements(self):
+        int64 = Int[64, False]
+        context = {'a': set([int32]), 'b': set([int32])}
+        self.assertEqual(list(disagreements(context, dict(context))), [])
+        self.assertEqual(
+            sorted(disagreements(context, {'a': set([int64]),
+                                           'b': set([int32]),
+                                           'c': set([int32])})),
+            [('a', set([int32]), set([int64])), ('c', None, set([int32]))])
+        self.assertEqual(list(disagreements(context, {'a': set([int32])})),
+                         [('b', set([int32]), None)])
+
+    def test_indexed(self):
+        def branch(a, b):
+            if a > b:
+                result = a
+            else:
+                result = b * 2.0
+            return result
+
+        self.assertEqual(get(branch, [int32, int32], 'indexed'),
+                         get(branch, [int32, int32], 'graph'))
+
+
+if __name__ == '__main__':
+    unittest.main()
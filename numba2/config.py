@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function, division, absolute_import
+import os
 
 class Config(object):
     # Add color to printed source code
@@ -8,4 +9,17 @@ class Config(object):
     # Terminal background colour ("light" or "dark")
     terminal_background = "dark"
 
-config = Config()
\ No newline at end of file
+    # Directory of the persistent compilation cache, None to disable
+    cache_dir = os.environ.get("NUMBA_CACHE_DIR") or None
+
+    # Type inference engine: "indexed", "graph" (networkx), or "compare" to
+    # run both and check that they agree
+    inference_engine = os.environ.get("NUMBA_INFERENCE_ENGINE", "indexed")
+
+    # Number of threads compiling independent functions, 0 for serial
+    compile_threads = int(os.environ.get("NUMBA_COMPILE_THREADS", 0))
+
+    # Number of threads running prange loops, 0 for the number of CPUs
+    num_threads = int(os.environ.get("NUMBA_NUM_THREADS", 0))
+
+config = Config()
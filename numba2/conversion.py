@@ -54,6 +54,9 @@ def toctypes(value, type, keepalive, valmemo=None, typememo=None):
     if id(value) in valmemo:
         return valmemo[id(value)]
 
+    # Values the object points to outside of its own fields, see tobuffer()
+    keepalive.extend(getattr(value, 'keepalive', ()))
+
     cls = type.impl
     if hasattr(cls, 'toctypes'):
         result = cls.toctypes(value, type)
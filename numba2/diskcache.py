@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+
+"""
+Persistent on-disk cache of compiled functions.
+
+Compiled specializations are stored as self-contained LLVM bitcode modules,
+keyed by a fingerprint of:
+
+    - the bytecode of the function and of everything it may call: globals,
+      closure cells and module attributes it refers to, recursively, and the
+      methods of the classes of its argument types
+    - the argument types
+    - the pass pipeline and compilation flags
+    - the numba runtime and compiler sources
+
+A hit skips the frontend, typing, optimization, lowering and codegen phases
+entirely. Since any change in a (transitive) callee changes the fingerprint of
+the caller, stale entries are simply never looked up again.
+
+Code that embeds process-specific addresses (e.g. calls through cffi or
+ctypes function pointers, or constant Python objects) is never persisted,
+and neither is code that refers to globals we cannot fingerprint by value
+(see value_fingerprint()).
+
+The cache is enabled by setting `numba2.config.cache_dir` (initialized from
+the NUMBA_CACHE_DIR environment variable).
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import sys
+import types
+import pickle
+import hashlib
+import tempfile
+from itertools import count
+
+from numba2.config import config
+
+#===------------------------------------------------------------------===
+# Cache
+#===------------------------------------------------------------------===
+
+FORMAT_VERSION = 1
+
+class Uncacheable(Exception):
+    """Raised when compiled code depends on a value we cannot fingerprint"""
+
+class DiskCache(object):
+    """
+    File system cache mapping fingerprints to pickled entries.
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+
+    @property
+    def path(self):
+        return self._path or config.cache_dir
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def filename(self, key):
+        return os.path.join(self.path, key[:2], key + '.nbc')
+
+    def lookup(self, key):
+        fn = self.filename(key)
+        if not os.path.exists(fn):
+            return None
+
+        try:
+            with open(fn, 'rb') as f:
+                entry = pickle.load(f)
+        except Exception:
+            # Corrupt or incompatible entry, recompile
+            return None
+
+        if entry.get('version') != FORMAT_VERSION:
+            return None
+        return entry
+
+    def insert(self, key, entry):
+        fn = self.filename(key)
+        dirname = os.path.dirname(fn)
+        if not os.path.exists(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                if not os.path.isdir(dirname):
+                    raise
+
+        entry = dict(entry, version=FORMAT_VERSION)
+
+        # Write atomically so concurrent processes never see partial entries
+        fd, tmpname = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmpname, fn)
+        except Exception:
+            if os.path.exists(tmpname):
+                os.unlink(tmpname)
+            raise
+
+    __contains__ = lookup
+    __getitem__ = lookup
+
+#===------------------------------------------------------------------===
+# Loading and storing compiled code
+#===------------------------------------------------------------------===
+
+_suffixes = count()
+
+def load(func, argtypes, env):
+    """
+    Load a compiled specialization of FunctionWrapper `func` from disk.
+
+    Returns (llvm_func, ctypes_func, restype), or None on a cache miss.
+    """
+    from numba2.compiler.backend import llvm
+
+    cache = env['numba.disk.cache']
+    if not cache.enabled:
+        return None
+
+    try:
+        key = fingerprint(func, argtypes, env)
+    except Uncacheable:
+        return None
+
+    entry = cache.lookup(key)
+    if entry is None:
+        return None
+
+    suffix = '.cached%d' % next(_suffixes)
+    lfunc, cfunc = llvm.load_bitcode(entry['bitcode'], entry['name'], env,
+                                     suffix)
+    return lfunc, cfunc, entry['restype']
+
+def store(func, argtypes, llvm_func, env):
+    """
+    Store a compiled specialization of FunctionWrapper `func`. Returns whether
+    the specialization could be persisted.
+    """
+    from numba2.compiler.backend import llvm
+
+    cache = env['numba.disk.cache']
+    if not cache.enabled:
+        return False
+
+    restype = env['numba.typing.restype']
+    try:
+        pickle.dumps(restype, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+
+    lfuncs = [llvm_func] + [e['numba.state.llvm_func']
+                                for e in _dependences(env)]
+    module = llvm.extract_module(lfuncs, llvm_func.name)
+    if llvm.embeds_addresses(module):
+        return False
+
+    try:
+        key = fingerprint(func, argtypes, env)
+    except Uncacheable:
+        return False
+
+    cache.insert(key, {
+        'name':     llvm_func.name,
+        'bitcode':  llvm.to_bitcode(module),
+        'restype':  restype,
+    })
+    return True
+
+def _dependences(env):
+    """Yield the environments of the compiled callees of `env`'s function"""
+    from pykit.analysis import callgraph
+
+    envs = env['numba.state.envs']
+    funcs = [f for f, e in envs.items() if e is env]
+    if not funcs:
+        return
+
+    func = funcs[0]
+    for f in callgraph.callgraph(func).node:
+        if f is not func and f in envs:
+            e = envs[f]
+            if e.get('numba.state.llvm_func') is not None:
+                yield e
+
+#===------------------------------------------------------------------===
+# Fingerprinting
+#===------------------------------------------------------------------===
+
+def fingerprint(func, argtypes, env):
+    """
+    Compute the cache key for FunctionWrapper `func` applied to `argtypes`.
+    Raises Uncacheable if it depends on values we cannot fingerprint.
+    """
+    memo = {}
+    h = hashlib.sha1()
+    h.update(runtime_fingerprint().encode('ascii'))
+    h.update(pipeline_fingerprint(env).encode('ascii'))
+    h.update(repr(tuple(str(t) for t in argtypes)).encode('utf-8'))
+    h.update(value_fingerprint(func, memo).encode('ascii'))
+    for t in argtypes:
+        h.update(type_fingerprint(t, memo).encode('ascii'))
+    return h.hexdigest()
+
+_runtime_fingerprint = []
+
+def runtime_fingerprint():
+    """
+    Fingerprint of the numba sources, which includes the runtime library as
+    well as the compiler itself.
+    """
+    if not _runtime_fingerprint:
+        import numba2
+
+        h = hashlib.sha1()
+        h.update(numba2.__version__.encode('ascii'))
+        root = os.path.dirname(os.path.abspath(numba2.__file__))
+        sources = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            for fn in filenames:
+                if fn.endswith(('.py', '.pyx', '.so')):
+                    sources.append(os.path.join(dirpath, fn))
+
+        for fn in sorted(sources):
+            h.update(os.path.relpath(fn, root).encode('utf-8'))
+            with open(fn, 'rb') as f:
+                h.update(f.read())
+
+        _runtime_fingerprint.append(h.hexdigest())
+
+    return _runtime_fingerprint[0]
+
+def pipeline_fingerprint(env):
+    """
+    Fingerprint of the pass pipeline and the flags influencing compilation.
+    """
+    from numba2 import passes
+
+    names = []
+    for ps in passes.all_passes + [passes.backend_optimize,
+                                   passes.backend_emit]:
+        names.append([_passname(p) for p in ps])
+
+    flags = [env.get(flag) for flag in ('numba.optimize', 'numba.target',
+                                        'numba.gc.impl', 'numba.link.mode')]
+
+    try:
+        import llvm
+        llvm_version = getattr(llvm, '__version__', None)
+    except ImportError:
+        llvm_version = None
+
+    data = repr((names, flags, llvm_version, sys.version_info[:2]))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def _passname(p):
+    if isinstance(p, types.ModuleType):
+        return p.__name__
+    return '%s.%s' % (getattr(p, '__module__', None),
+                      getattr(p, '__name__', type(p).__name__))
+
+# ______________________________________________________________________
+
+def value_fingerprint(value, memo):
+    """
+    Fingerprint a value that compiled code may depend on. Functions and
+    classes are fingerprinted by their code and, recursively, by whatever
+    their code refers to. Containers and arrays are fingerprinted by their
+    contents, so that mutating them invalidates the code.
+
+    Classes and builtin functions are fingerprinted by name. Other values
+    (e.g. instances of arbitrary classes) may change in ways we cannot
+    detect, and raise Uncacheable.
+    """
+    from numba2.functionwrapper import FunctionWrapper
+    from numba2.rules import is_numba_type
+    from blaze.datashape import Mono, TypeVar
+    import numpy as np
+
+    key = id(value)
+    if key in memo:
+        return memo[key]
+
+    # Break cycles (e.g. mutually recursive functions)
+    memo[key] = 'cycle'
+
+    if isinstance(value, FunctionWrapper):
+        parts = ['FunctionWrapper']
+        for py_func, signature, kwds in value.overloads:
+            parts.append(str(signature))
+            parts.append(repr(sorted(str(k) for k in kwds)))
+            parts.append(value_fingerprint(py_func, memo))
+        result = _digest(parts)
+    elif isinstance(value, types.FunctionType):
+        result = function_fingerprint(value, memo)
+    elif is_numba_type(value) and hasattr(value, 'type'):
+        result = type_fingerprint(value.type, memo)
+    elif isinstance(value, (Mono, TypeVar)):
+        result = type_fingerprint(value, memo)
+    elif isinstance(value, (int, long, float, complex, bool, str, unicode,
+                            type(None))):
+        result = _digest([_qualname(type(value)), repr(value)])
+    elif isinstance(value, np.generic):
+        result = _digest([_qualname(type(value)), str(value.dtype),
+                          repr(value.item())])
+    elif isinstance(value, (tuple, list)):
+        result = _digest([_qualname(type(value))] +
+                         [value_fingerprint(x, memo) for x in value])
+    elif isinstance(value, (set, frozenset)):
+        result = _digest([_qualname(type(value))] +
+                         sorted(value_fingerprint(x, memo) for x in value))
+    elif isinstance(value, dict):
+        result = _digest([_qualname(type(value))] + sorted(
+            value_fingerprint(k, memo) + ':' + value_fingerprint(v, memo)
+                for k, v in value.items()))
+    elif isinstance(value, np.ndarray):
+        data = hashlib.sha1(np.ascontiguousarray(value)).hexdigest()
+        result = _digest([_qualname(type(value)), str(value.dtype),
+                          repr(value.shape), data])
+    elif isinstance(value, (type, types.ClassType, types.BuiltinFunctionType)):
+        result = _qualname(value)
+    else:
+        del memo[key]
+        raise Uncacheable("Cannot fingerprint %r of type %s" % (
+            value, _qualname(type(value))))
+
+    memo[key] = result
+    return result
+
+def function_fingerprint(py_func, memo):
+    """Fingerprint a python function and everything it refers to"""
+    code = py_func.__code__
+    parts = [code_fingerprint(code), repr(py_func.__defaults__)]
+
+    # Closure cells
+    for cell in py_func.__closure__ or ():
+        parts.append(value_fingerprint(cell.cell_contents, memo))
+
+    # Globals, and attributes of referenced modules
+    func_globals = py_func.__globals__
+    names = _all_names(code)
+    modules = []
+    for name in names:
+        if name in func_globals:
+            value = func_globals[name]
+            if isinstance(value, types.ModuleType):
+                modules.append(value)
+            else:
+                parts.append(name)
+                parts.append(value_fingerprint(value, memo))
+
+    for module in modules:
+        for name in names:
+            value = getattr(module, name, None)
+            if value is not None and not isinstance(value, types.ModuleType):
+                parts.append(name)
+                parts.append(value_fingerprint(value, memo))
+
+    return _digest(parts)
+
+def type_fingerprint(type, memo):
+    """
+    Fingerprint a numba type by the methods of its class and the types of
+    its layout.
+    """
+    key = ('type', type)
+    if key in memo:
+        return memo[key]
+    memo[key] = 'cycle'
+
+    parts = [str(type)]
+    impl = getattr(type, 'impl', None)
+    if impl is not None:
+        parts.append(_qualname(impl))
+        for name, method in sorted(getattr(impl, 'fields', {}).items()):
+            parts.append(name)
+            parts.append(value_fingerprint(method, memo))
+
+        try:
+            layout = type.resolved_layout
+        except Exception:
+            layout = {}
+        for name, ty in sorted(layout.items()):
+            parts.append(name)
+            parts.append(type_fingerprint(ty, memo))
+
+    result = _digest(parts)
+    memo[key] = result
+    return result
+
+def code_fingerprint(code):
+    """Fingerprint a code object, including nested code objects"""
+    consts = []
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            consts.append(code_fingerprint(const))
+        else:
+            consts.append(repr(const))
+
+    return _digest([code.co_code, repr(consts), repr(code.co_names),
+                    repr(code.co_varnames), repr(code.co_freevars),
+                    repr(code.co_argcount), repr(code.co_flags)])
+
+def _all_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(_all_names(const))
+    return sorted(names)
+
+def _qualname(obj):
+    return '%s.%s' % (getattr(obj, '__module__', None),
+                      getattr(obj, '__name__', None))
+
+def _digest(parts):
+    h = hashlib.sha1()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = part.encode('utf-8')
+        h.update(part)
+        h.update(b'\0')
+    return h.hexdigest()
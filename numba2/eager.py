@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""
+Eager compilation of declared signatures, to move compilation out of the
+first call, e.g. into the warm-up of a deployment:
+
+    @jit('int32 -> int32', eager=True)  # compiled when decorated
+    def f(x): ...
+
+    @jit('float64 -> float64')
+    def g(x): ...
+
+    precompile(mymodule)                # compile all declared signatures
+    precompile([g], {g: ['int32 -> float64']}, threads=4)
+
+Polymorphic signatures (e.g. 'a -> a') cannot be compiled ahead of the
+first call and are skipped, unless concrete signatures are given.
+
+Eagerly compiled functions must only call functions that are already
+defined. Use precompile() at the end of a module otherwise.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import types
+
+from numba2.config import config
+
+def precompile(funcs_or_module, signatures=None, threads=None):
+    """
+    Compile FunctionWrappers for their declared signatures, or the
+    signatures given as { function or name : [signature] }.
+
+    Callees shared between specializations are compiled once, and with
+    `threads` > 1 (default config.compile_threads) independent
+    specializations compile in parallel.
+
+    Returns the list of (FunctionWrapper, argtypes) compiled.
+    """
+    from numba2 import scheduling
+
+    funcs = wrappers(funcs_or_module)
+    specializations = []
+    for func in funcs:
+        if signatures is None:
+            sigs = declared_signatures(func)
+        else:
+            sigs = (signatures.get(func) or
+                    signatures.get(func.py_func.__name__) or [])
+        for sig in sigs:
+            spec = (func, argtypes(func, sig))
+            if spec not in specializations:
+                specializations.append(spec)
+
+    if threads is None:
+        threads = config.compile_threads
+    scheduling.parallel_map(lambda spec: spec[0].translate(spec[1]),
+                            specializations, threads or 0)
+    return specializations
+
+def wrappers(funcs_or_module):
+    """FunctionWrappers of a module, or given as a function or list"""
+    from numba2.functionwrapper import FunctionWrapper
+
+    if isinstance(funcs_or_module, types.ModuleType):
+        values = [value for name, value in sorted(vars(funcs_or_module).items())]
+    elif isinstance(funcs_or_module, FunctionWrapper):
+        values = [funcs_or_module]
+    else:
+        values = list(funcs_or_module)
+
+    return [v for v in values
+                if isinstance(v, FunctionWrapper) and not v.abstract]
+
+def declared_signatures(func, overload=None):
+    """
+    The resolved signatures of func's overloads without type variables, or
+    of the overload of python function `overload` only.
+    """
+    from numba2.typing import resolve, free
+    from numba2.compiler.overloading import determine_scope
+
+    result = []
+    for py_func, signature, kwds in func.overloads:
+        if signature is None or overload not in (None, py_func):
+            continue
+        signature = resolve(signature, determine_scope(py_func), {})
+        if not any(free(t) for t in signature.argtypes):
+            result.append(signature)
+    return result
+
+def argtypes(func, signature):
+    """Argument types of a signature, which may be a string"""
+    from numba2.aot import parse_signature
+
+    if isinstance(signature, (list, tuple)):
+        return tuple(signature)
+    scope = dict(func.py_func.__globals__)
+    return tuple(parse_signature(signature, scope).argtypes)
@@ -13,7 +13,7 @@ from .functionwrapper import wrap
 from .typing import MetaType
 from .utils import applyable_decorator
 
-def jit(f, *args, **kwds):
+def jit(f=None, *args, **kwds):
     """
     @jit entry point:
 
@@ -23,6 +23,15 @@ def jit(f, *args, **kwds):
         @jit('a -> b')
         def myfunc(a, b): return a + b
 
+        @jit(nogil=True) # Release the GIL when called from Python
+        def myfunc(a, b): return a + b
+
+        @jit(background=True) # Compile in the background, see background.py
+        def myfunc(a, b): return a + b
+
+        @jit('int32 -> int32 -> int32', eager=True) # Compile right away
+        def myfunc(a, b): return a + b
+
         @jit
         class Foo(object): pass
 
@@ -31,6 +40,8 @@ def jit(f, *args, **kwds):
     """
     kwds['scope'] = kwds.pop('scope', sys._getframe(1).f_locals)
 
+    if f is None:
+        return lambda f: _jit(f, *args, **kwds)
     if isinstance(f, (type, types.FunctionType, types.ClassType)):
         return _jit(f, *args, **kwds)
 
@@ -97,5 +108,26 @@ def sjit(cls, *args, **kwds):
             "Cannot stack-allocate instances with __del__: %s" % (cls,))
     return jit_class(cls, *args, stackallocate=True, **kwds)
 
+def vectorize(f=None, **kwds):
+    """
+    @vectorize entry point, build an elementwise function over arrays from
+    a scalar function:
+
+        @vectorize
+        def f(x, y): return x * y + 1
+
+        f(np.arange(10.0), 2.0)         # broadcasts like NumPy ufuncs
+        f(x, y, out=z)                  # store the result in z
+
+    Keyword arguments are passed to @jit for the scalar function. Existing
+    @jit functions can be vectorized too, e.g. vectorize(mathlib.sin).
+    """
+    from .ufunc import UFunc
+
+    if f is None:
+        return lambda f: UFunc(f, **kwds)
+    return UFunc(f, **kwds)
+
+
 #ijit = partial(jit, inline=True)
 #sjit = partial(jit, stackallocate=True)
\ No newline at end of file
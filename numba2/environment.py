@@ -7,7 +7,10 @@ Numba compilation environment.
 from __future__ import print_function, division, absolute_import
 
 from .utils import FrozenDict
+from .config import config
+from . import caching
 from .caching import Cache, InferenceCache, TypingCache
+from .diskcache import DiskCache
 
 from pykit import environment as pykit_env
 from pykit.codegen import llvm as llvm_codegen
@@ -24,6 +27,7 @@ _env = {
     'numba.opt.cache':          Cache(),
     'numba.lowering.cache':     Cache(),
     'numba.codegen.cache':      Cache(),
+    'numba.disk.cache':         DiskCache(),    # Persistent, see config.cache_dir
 
     # General state
     'numba.state.func_name':    None,
@@ -36,12 +40,15 @@ _env = {
     'numba.state.copies':       None,
     'numba.state.crnt_func':    None,
     'numba.state.options':      None,
+    'numba.state.gil_calls':    (),     # C-API functions called
+    'numba.state.constfold':    None,   # Return value for unknown arguments
 
     # GC
     'numba.gc.impl':            "boehm",
 
     # Global state
-    'numba.state.envs':         {},     # All cached environments
+    'numba.state.envs':         {},     # All cached environments, released
+                                        # on cache eviction (see caching.py)
 
     # Typing
     'numba.typing.restype': None,       # Input/Output
@@ -49,11 +56,17 @@ _env = {
     'numba.typing.signature': None,     # Output
     'numba.typing.context': None,       # Output
     'numba.typing.constraints': None,   # Output
+    'numba.typing.calls': None,         # Output, number of call resolutions
 
     # Flags
     'numba.verify':         True,
     'numba.optimize':       True,
     'numba.target':         'cpu',
+    'numba.inference.engine': config.inference_engine,
+    'numba.parallel.threads': config.compile_threads,
+    'numba.link.mode':      'module',   # Link callgraphs into one module and
+                                        # optimize across functions, or keep
+                                        # 'function' modules (debugging)
 
     # Codegen
     "codegen.llvm.opt":     None,
@@ -67,6 +80,7 @@ _env.update(pykit_env.fresh_env())
 llvm_codegen.install(_env)
 
 root_env = FrozenDict(_env)
+caching.install(root_env)
 
 #===------------------------------------------------------------------===
 # New envs
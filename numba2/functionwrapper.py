@@ -8,14 +8,22 @@ from __future__ import print_function, division, absolute_import
 import types
 import ctypes
 from functools import partial
-from itertools import starmap
 
 from numba2.rules import typeof
+from numba2.utils import LockTable
 from numba2.compiler.overloading import (lookup_previous, overload, Dispatcher,
                                          flatargs)
 
 # TODO: Reuse numba.numbawrapper.pyx for autojit Python entry points
 
+CO_VARARGS = 0x0004
+
+# Locks of compilations in flight, keyed on (FunctionWrapper, argtypes)
+compile_locks = LockTable()
+
+# Python types for which typeof() does not depend on the value
+fastpath_types = frozenset([bool, int, float, complex, str])
+
 class FunctionWrapper(object):
     """
     Result of @jit for functions.
@@ -30,81 +38,163 @@ class FunctionWrapper(object):
         self.llvm_funcs = {}
         self.ctypes_funcs = {}
         self.envs = {}
+        self.stubs = {}         # (argtypes) -> CallStub
+        self.fastpath = {}      # (python types) -> CallStub
+        self.futures = {}       # (argtypes) -> CompileFuture
+        self.matches = {}       # (argtypes, #overloads) -> best_match()
 
         self.opaque = opaque
         self.implementor = None
 
     def __call__(self, *args, **kwargs):
-        from numba2.representation import byref, stack_allocate
-        from numba2.conversion import (
-            toctypes, fromctypes, toobject, fromobject, ctype)
-        from numba2.ctypes_support import CTypesStruct
-        from numba2.types import Function
+        # Fast path: repeated calls with arguments of the same python types
+        if not kwargs:
+            stub = self.fastpath.get(tuple(map(type, args)))
+            if stub is not None:
+                return stub(*args)
 
         # Keep this alive for the duration of the call
         keepalive = list(args) + list(kwargs.values())
 
         # Order arguments
+        pyargs = args
         args = flatargs(self.dispatcher.f, args, kwargs)
         argtypes = [typeof(x) for x in args]
 
-        # Translate
-        cfunc, restype = self.translate(argtypes)
-
-        # Construct numba values
-        arg_objs = list(starmap(fromobject, zip(args, argtypes)))
-
-        # Map numba values to a ctypes representation
-        args = []
-        for arg, argtype in zip(arg_objs, argtypes):
-            c_arg = toctypes(arg, argtype, keepalive)
-            if byref(argtype) and stack_allocate(argtype):
-                c_arg = ctypes.pointer(c_arg)
-            args.append(c_arg)
+        # Run in the interpreter while compiling in the background
+        key = tuple(argtypes)
+        if key not in self.stubs and self._compiles_async(key):
+            future = self.compile_async(argtypes)
+            if not future.done() or future.exception() is not None:
+                return self.interpret(argtypes, pyargs, kwargs)
 
-        # We need this cast since the ctypes function constructed from LLVM
-        # IR has different structs (which are structurally equivalent)
-        c_restype = ctype(restype)
-        if byref(restype):
-            c_result = c_restype() # dummy result value
-            args.append(ctypes.pointer(c_result))
-            c_restype = None # void
+        # Translate
+        stub = self.translate_stub(argtypes)
 
-        c_signature = ctypes.PYFUNCTYPE(c_restype, *[type(arg) for arg in args])
-        cfunc = ctypes.cast(cfunc, c_signature)
+        if not kwargs and self._fastpath_applies(pyargs):
+            self.fastpath[tuple(map(type, pyargs))] = stub
 
-        # Handle calling convention
-        if byref(restype):
-            cfunc(*args)
-        else:
-            c_result = cfunc(*args)
+        return stub.call(args, keepalive)
 
-        # Map ctypes result back to a python value
-        result = fromctypes(c_result, restype)
-        result_obj = toobject(result, restype)
+    def _fastpath_applies(self, args):
+        """
+        Determine whether the specialization for `args` can be found from the
+        python types of `args` alone.
+        """
+        code = self.dispatcher.f.__code__
+        if code.co_flags & CO_VARARGS or len(args) != code.co_argcount:
+            return False
+        return all(type(arg) in fastpath_types for arg in args)
 
-        return result_obj
+    def translate_stub(self, argtypes):
+        """Get the call stub for the specialization of argtypes"""
+        key = tuple(argtypes)
+        stub = self.stubs.get(key)
+        if stub is None:
+            cfunc, restype = self.translate(argtypes)
+            nogil = self.options(argtypes).get('nogil', False)
+            stub = CallStub(cfunc, argtypes, restype, nogil)
+            self.stubs[key] = stub
+        return stub
+
+    def _compiles_async(self, key):
+        return key in self.futures or self.options(key).get('background')
+
+    def compile_async(self, argtypes):
+        """
+        Compile the specialization for argtypes in the background, returns
+        a CompileFuture.
+        """
+        from . import background
+        return background.submit(self, argtypes)
+
+    def interpret(self, argtypes, args, kwargs):
+        """Call the python implementation matching argtypes"""
+        py_func, signature, kwds = self.match(argtypes)
+        return py_func(*args, **kwargs)
+
+    def options(self, argtypes):
+        """Options given to the overload matching argtypes (e.g. nogil)"""
+        py_func, signature, kwds = self.match(argtypes)
+        return kwds
+
+    def match(self, argtypes):
+        """
+        The overload matching argtypes, see best_match(). Cached, since
+        it is needed on calls that do not find a compiled specialization
+        (e.g. while compiling in the background). Overloads added later
+        (which share our dispatcher) invalidate the result.
+        """
+        from numba2.compiler.overloading import best_match
+
+        key = (tuple(argtypes), len(self.overloads))
+        result = self.matches.get(key)
+        if result is None:
+            result = self.matches[key] = best_match(self, list(argtypes))
+        return result
 
     def translate(self, argtypes):
-        from . import phase, environment
+        from . import caching
 
         key = tuple(argtypes)
-        if key in self.ctypes_funcs:
-            env = self.envs[key]
-            return self.ctypes_funcs[key], env["numba.typing.restype"]
+        result = self._lookup(key)
+        if result is not None:
+            return result
+
+        # Concurrent callers wait for a single compilation of (self, key)
+        with compile_locks.lock((self, key)):
+            result = self._lookup(key)
+            if result is not None:
+                return result
+            with caching.compiling():
+                return self._translate(argtypes)
+
+    def _lookup(self, key):
+        env = self.envs.get(key)
+        cfunc = self.ctypes_funcs.get(key)
+        if env is None or cfunc is None:
+            return None
+        return cfunc, env["numba.typing.restype"]
 
-        # Translate
+    def _translate(self, argtypes):
+        from . import phase, environment, diskcache
+
+        key = tuple(argtypes)
         env = environment.fresh_env(self, argtypes)
-        llvm_func, env = phase.codegen(self, env)
-        cfunc = env["codegen.llvm.ctypes"]
 
-        # Cache
+        cached = diskcache.load(self, argtypes, env)
+        if cached is not None:
+            # Reuse code compiled by a previous process
+            llvm_func, cfunc, restype = cached
+            env["numba.typing.restype"] = restype
+        else:
+            # Translate
+            llvm_func, env = phase.codegen(self, env)
+            cfunc = env["codegen.llvm.ctypes"]
+            diskcache.store(self, argtypes, llvm_func, env)
+
+        # Cache, publish the compiled function last
         self.llvm_funcs[key] = llvm_func
-        self.ctypes_funcs[key] = cfunc
         self.envs[key] = env
+        self.ctypes_funcs[key] = cfunc
 
         return cfunc, env["numba.typing.restype"]
 
+    def release(self, envs):
+        """
+        Forget the specializations compiled in any of the given environments.
+        """
+        for key, env in list(self.envs.items()):
+            if any(env is e for e in envs):
+                del self.envs[key]
+                self.llvm_funcs.pop(key, None)
+                self.ctypes_funcs.pop(key, None)
+                stub = self.stubs.pop(key, None)
+                self.futures.pop(key, None)
+                for pykey, pystub in list(self.fastpath.items()):
+                    if pystub is stub:
+                        del self.fastpath[pykey]
+
     @property
     def signatures(self):
         return [signature for func, signature, _ in self.overloads]
@@ -122,9 +212,114 @@ class FunctionWrapper(object):
         return self
 
 
-def wrap(py_func, signature, scope, inline=False, opaque=False, abstract=False, **kwds):
+class CallStub(object):
+    """
+    Calls a compiled specialization from Python. Everything that depends
+    only on the argument types is computed once: the argument converters,
+    the ctypes signature and cast function, and the return value handling.
+
+    Functions compiled with nogil=True are called through CFUNCTYPE, which
+    releases the GIL for the duration of the call.
+
+    Compiled code may allocate through the collector, so the calling thread
+    is registered with it first (see runtime/lib/threads.py).
+    """
+
+    def __init__(self, cfunc, argtypes, restype, nogil=False):
+        from numba2.representation import byref
+        from numba2.conversion import ctype
+        from numba2.runtime.lib.threads import register_thread
+
+        self.register_thread = register_thread
+
+        self.argtypes = list(argtypes)
+        self.restype = restype
+        self.typememo = {}
+
+        # Arguments and return value passed by reference
+        self.pass_byref = [byref(t) for t in self.argtypes]
+        self.return_byref = byref(restype)
+
+        c_argtypes = [ctype(t, self.typememo) for t in self.argtypes]
+        c_argtypes = [ctypes.POINTER(cty) if ref else cty
+                          for cty, ref in zip(c_argtypes, self.pass_byref)]
+
+        # We need this cast since the ctypes function constructed from LLVM
+        # IR has different structs (which are structurally equivalent)
+        c_restype = ctype(restype, self.typememo)
+        if self.return_byref:
+            self.c_restype = c_restype
+            c_argtypes.append(ctypes.POINTER(c_restype))
+            c_restype = None # void
+
+        functype = ctypes.CFUNCTYPE if nogil else ctypes.PYFUNCTYPE
+        c_signature = functype(c_restype, *c_argtypes)
+        self.cfunc = ctypes.cast(cfunc, c_signature)
+
+        # Primitive arguments are converted by ctypes itself
+        self.primitive = all(_is_primitive(t) for t in self.argtypes)
+        self.primitive_result = _is_primitive(restype)
+
+    def __call__(self, *args):
+        self.register_thread()
+        if self.primitive and not self.return_byref:
+            c_result = self.cfunc(*args)
+            if self.primitive_result:
+                return c_result
+            return self.result(c_result)
+        return self.call(args, list(args))
+
+    def call(self, args, keepalive):
+        """
+        Call the compiled function with arguments given in order, keeping
+        values alive in `keepalive`.
+        """
+        from numba2.conversion import toctypes, fromobject
+
+        self.register_thread()
+
+        # Map python values to numba values, and then to a ctypes representation
+        c_args = []
+        for arg, argtype, ref in zip(args, self.argtypes, self.pass_byref):
+            arg = fromobject(arg, argtype)
+            c_arg = toctypes(arg, argtype, keepalive, {}, self.typememo)
+            if ref:
+                c_arg = ctypes.pointer(c_arg)
+            c_args.append(c_arg)
+
+        # Handle calling convention
+        if self.return_byref:
+            c_result = self.c_restype() # dummy result value
+            c_args.append(ctypes.pointer(c_result))
+            self.cfunc(*c_args)
+        else:
+            c_result = self.cfunc(*c_args)
+
+        return self.result(c_result)
+
+    def result(self, c_result):
+        """Map ctypes result back to a python value"""
+        from numba2.conversion import fromctypes, toobject
+
+        result = fromctypes(c_result, self.restype)
+        return toobject(result, self.restype)
+
+
+def _is_primitive(type):
+    """
+    Whether ctypes can convert python values of this type to and from its
+    low-level representation (e.g. python int -> c_int32).
+    """
+    from numba2.runtime.obj import Int, Float, Bool
+
+    return type.impl in (Int, Float, Bool)
+
+
+def wrap(py_func, signature, scope, inline=False, opaque=False, abstract=False,
+         eager=False, **kwds):
     """
-    Wrap a function in a FunctionWrapper. Take care of overloading.
+    Wrap a function in a FunctionWrapper. Take care of overloading. With
+    eager=True, compile the declared signatures right away.
     """
     func = lookup_previous(py_func, [scope])
 
@@ -139,8 +334,14 @@ def wrap(py_func, signature, scope, inline=False, opaque=False, abstract=False,
     dispatcher = overload(signature, func=func, inline=inline, **kwds)(py_func)
 
     if isinstance(py_func, types.FunctionType):
-        return FunctionWrapper(dispatcher, py_func,
-                               opaque=opaque, abstract=abstract)
+        wrapper = FunctionWrapper(dispatcher, py_func,
+                                  opaque=opaque, abstract=abstract)
+        if eager:
+            # Previous overloads were compiled when they were declared
+            from .eager import precompile, declared_signatures
+            signatures = declared_signatures(wrapper, py_func)
+            precompile(wrapper, {wrapper: signatures})
+        return wrapper
     else:
         assert isinstance(py_func, FunctionWrapper), py_func
         return py_func
\ No newline at end of file
@@ -7,15 +7,18 @@ Numba passes that perform translation, type inference, code generation, etc.
 from __future__ import print_function, division, absolute_import
 
 from numba2.compiler.backend import lltyping, llvm, lowering, rewrite_lowlevel_constants
-from .compiler.frontend import translate, simplify_exceptions
+from .compiler.frontend import (translate, simplify_exceptions, fuse_generators,
+                                outline_parallel_loops)
 from .compiler import simplification, transition
 from .compiler.typing import inference, typecheck
 from .compiler.typing.resolution import (resolve_context, resolve_restype)
-from .compiler.optimizations import optimize, inliner, throwing
+from .compiler.optimizations import (optimize, inliner, throwing, constfold,
+                                     stackalloc, sroa)
 from .compiler.lower import (rewrite_calls, rewrite_raise_exc_type,
                              rewrite_constructors, explicit_coercions,
                              rewrite_optional_args, rewrite_constants,
-                             convert_retval, rewrite_obj_return, allocator)
+                             convert_retval, rewrite_obj_return, allocator,
+                             check_nogil, rewrite_loops)
 from .prettyprint import dump, dump_cfg, dump_llvm, dump_optimized
 
 from pykit.analysis import cfa
@@ -28,8 +31,10 @@ from pykit.codegen.llvm import verify, optimize, llvm_postpasses
 #===------------------------------------------------------------------===
 
 frontend = [
+    outline_parallel_loops,
     translate,
     simplify_exceptions,
+    fuse_generators,
     dump_cfg,
     simplification.rewrite_ops,
     simplification.rewrite_overlays,
@@ -46,6 +51,7 @@ typing = [
     # numba.compiler.lower.*
     rewrite_calls,
     rewrite_raise_exc_type,
+    rewrite_loops,
     rewrite_constructors,
     allocator,
     rewrite_optional_args,
@@ -56,6 +62,7 @@ typing = [
 ]
 
 optimizations = [
+    constfold,
     dce,
     #cfa,
     optimize,
@@ -65,7 +72,12 @@ optimizations = [
 lowering = [
     inliner,
     cfa,
+    constfold,
+    stackalloc,
+    sroa,
+    cfa,
     throwing.rewrite_local_exceptions,
+    check_nogil,
     rewrite_lowlevel_constants,
     #lowering.lower_fields,
 ]
@@ -81,14 +93,19 @@ backend_run = [
     llvm.codegen_link,
 ]
 
-backend_finalize = [
+backend_optimize = [
     verify,
     dump_llvm,
     optimize,
     dump_optimized,
+]
+
+backend_emit = [
     llvm.get_ctypes,
 ]
 
+backend_finalize = backend_optimize + backend_emit
+
 all_passes = [frontend, typing, optimizations, lowering,
               backend_init, backend_run]
 passes = sum(all_passes, [])
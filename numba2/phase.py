@@ -6,13 +6,18 @@ Numba compiler phases (groupings of passes).
 
 from __future__ import print_function, division, absolute_import
 
+from contextlib import contextmanager
 from functools import partial, wraps
 
 from .pipeline import run_pipeline
 from .passes import (frontend, typing, optimizations, lowering, backend_init,
-                     backend_run, backend_finalize)
+                     backend_run, backend_optimize, backend_emit)
+from . import scheduling, profiling
 from .compiler.overloading import best_match
 from .environment import fresh_env
+from .caching import compiling
+from .utils import LockTable
+from .compiler.backend import llvm
 
 from pykit.analysis import callgraph
 
@@ -20,8 +25,26 @@ from pykit.analysis import callgraph
 # Phases
 #===------------------------------------------------------------------===
 
+# Locks of phase applications in flight, keyed on (cache name, cache key).
+# A thread holds the lock of a function only while applying a phase to that
+# function. Callees, including mutually recursive ones, are handled before
+# the lock of their caller is taken (see _scheduled()). A thread holding a
+# lock therefore never waits for the compilation pool, whose workers may
+# be waiting for that lock. Passes may apply an earlier phase (e.g. typing)
+# to other functions while holding a lock, so that locks of different
+# phases are taken in phase order.
+#
+# Code generation handles a callgraph at once, and holds the locks of all
+# functions it generates (see _codegen_phase()). It optimizes them on a
+# separate pool whose workers never take phase locks. Calls into the shared
+# execution engine are serialized by llvm.engine_lock.
+phase_locks = LockTable()
+
 def cached(phase_name, key=lambda func, env: func):
-    """Helper to perform caching for a phase"""
+    """
+    Helper to perform caching for a phase. Concurrent applications of the
+    phase to the same cache key wait for the first one to finish.
+    """
     cache_name = '.'.join([phase_name, 'cache'])
 
     def decorator(f):
@@ -29,25 +52,28 @@ def cached(phase_name, key=lambda func, env: func):
         def wrapper(func, env, *args):
             cache = env[cache_name]
             cache_key = key(func, env)
-
-            # -------------------------------------------------
-            # Check cache
-
             env['numba.state.phase'] = phase_name
 
-            if cache.lookup(cache_key):
-                new_func, new_env = cache.lookup(cache_key)
-                if phase_name == 'numba.frontend':
-                    # TODO: This is a hack! Do manual caching in
-                    # translation_phase below!
-                    new_env = env # Don't lose the argtypes
-                return new_func, new_env
+            with phase_locks.lock((cache_name, cache_key)):
+                # -------------------------------------------------
+                # Check cache
+
+                entry = cache.lookup(cache_key)
+                if entry:
+                    new_func, new_env = entry
+                    if phase_name == 'numba.frontend':
+                        # TODO: This is a hack! Do manual caching in
+                        # translation_phase below!
+                        new_env = env # Don't lose the argtypes
+                    profiling.phase_hit(phase_name, func, env)
+                    return new_func, new_env
 
-            # -------------------------------------------------
-            # Apply phase & cache
+                # -------------------------------------------------
+                # Apply phase & cache
 
-            new_func, new_env = f(func, env, *args)
-            cache.insert(cache_key, (new_func, new_env))
+                with profiling.phase(phase_name, func, env):
+                    new_func, new_env = f(func, env, *args)
+                cache.insert(cache_key, (new_func, new_env))
 
             return new_func, new_env
 
@@ -106,52 +132,125 @@ def translation_phase(func, env, passes=frontend):
 def typing_phase(func, env, passes=typing):
     return run_pipeline(func, env, passes)
 
-@cached('numba.opt')
-def optimization_phase(func, env, passes=optimizations, dependences=None):
-    envs = env["numba.state.envs"]
-    if dependences is None:
-        dependences = _deps(func)
+def optimization_phase(func, env, passes=optimizations):
+    """Optimize `func` after its callees, see _scheduled()"""
+    return _scheduled(_optimize, func, env, passes)
 
-    for f in dependences:
-        if f != func:
-            optimization_phase(f, envs[f], passes, [])
+@cached('numba.opt')
+def _optimize(func, env, passes=optimizations):
     run_pipeline(func, env, passes)
-
     return func, env
 
-@cached('numba.lowering')
-def lowering_phase(func, env, passes=lowering, dependences=None):
-    envs = env["numba.state.envs"]
-    if dependences is None:
-        dependences = _deps(func)
+def lowering_phase(func, env, passes=lowering):
+    """Lower `func` after its callees, see _scheduled()"""
+    return _scheduled(_lower, func, env, passes)
 
-    for f in dependences:
-        if f != func:
-            lowering_phase(f, envs[f], passes, [])
+@cached('numba.lowering')
+def _lower(func, env, passes=lowering):
     run_pipeline(func, env, passes)
-
     return func, env
 
+def _scheduled(phase, func, env, passes):
+    """
+    Apply `phase` to the callees of `func` in the order of the schedule, and
+    then to `func`. The phase lock of a function is only held while the
+    phase runs on that function, and not while waiting for its callees,
+    which may run on the compilation pool.
+    """
+    envs = env["numba.state.envs"]
+    others = [f for f in _deps(func) if f != func]
+    scheduling.run_scheduled(
+        lambda f: phase(f, envs[f], passes),
+        callgraph.callgraph(func), others, env)
+    return phase(func, env, passes)
+
 def codegen_phase(func, env):
+    if func in env['numba.codegen.cache']:
+        profiling.phase_hit('numba.codegen', func, env)
+        return env['numba.codegen.cache'][func]
+    with profiling.phase('numba.codegen', func, env):
+        return _codegen_phase(func, env)
+
+def _codegen_phase(func, env):
     cache = env['numba.codegen.cache']
-    envs = env["numba.state.envs"]
 
-    if func in cache:
-        return cache[func]
+    graph = callgraph.callgraph(func)
+    funcs = [f for wave in scheduling.waves(graph, graph.node)
+                   for task in wave
+                       for f in task
+                           if f not in cache]
+
+    # Functions of overlapping callgraphs are generated by one thread, and
+    # unrelated functions in parallel
+    keys = sorted(funcs, key=id)
+    with _locked([('numba.codegen.cache', f) for f in keys]):
+        dependences = [f for f in funcs if f not in cache]
+        _generate(graph, dependences, env)
+
+    return env["numba.state.llvm_func"], env
 
-    dependences = [d for d in _deps(func) if d not in cache]
+@contextmanager
+def _locked(keys):
+    """Hold the phase locks of all `keys`, taken in the given order"""
+    held = []
+    try:
+        for key in keys:
+            lock = phase_locks.lock(key)
+            lock.__enter__()
+            held.append(lock)
+        yield
+    finally:
+        for lock in reversed(held):
+            lock.__exit__(None, None, None)
+
+def _generate(graph, dependences, env):
+    """Generate, optimize and emit `dependences`, callees first"""
+    cache = env['numba.codegen.cache']
+    envs = env["numba.state.envs"]
 
     for f in dependences:
         run_pipeline(f, envs[f], backend_init)
     for f in dependences:
         run_pipeline(f, envs[f], backend_run)
+
+    # -------------------------------------------------
+    # Verify and optimize functions of different modules in parallel. In
+    # module link mode this happens before linking, and the linked module
+    # is then optimized as a whole (inlining and IPO), which is serial
+
+    def optimize(fs):
+        for f in fs:
+            run_pipeline(envs[f]["numba.state.llvm_func"], envs[f],
+                         backend_optimize)
+
+    groups = _group_by_module(dependences, envs)
+    scheduling.parallel_map(optimize, groups, scheduling.threads(env),
+                            pool='codegen')
+
+    if dependences and env["numba.link.mode"] == 'module':
+        compiled = [d for d in graph.node if d not in dependences]
+        llvm.link(dependences, compiled, envs, env)
+
+    # -------------------------------------------------
+    # Emit code
+
     for f in dependences:
         e = envs[f]
         lfunc = e["numba.state.llvm_func"]
-        run_pipeline(lfunc, envs[f], backend_finalize)
+        run_pipeline(lfunc, e, backend_emit)
         cache.insert(f, (lfunc, e))
 
-    return env["numba.state.llvm_func"], env
+def _group_by_module(funcs, envs):
+    """Group functions by llvm module, preserving order"""
+    groups = {}
+    order = []
+    for f in funcs:
+        key = id(envs[f]["numba.state.llvm_func"].module)
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(f)
+    return [groups[key] for key in order]
 
 # ______________________________________________________________________
 # Phase application
@@ -204,4 +303,5 @@ phases = {
 
 def apply_phase(phase, nb_func, argtypes):
     env = fresh_env(nb_func, argtypes)
-    return phase(nb_func, env)
\ No newline at end of file
+    with compiling():
+        return phase(nb_func, env)
\ No newline at end of file
@@ -10,6 +10,8 @@ import dis
 import types
 import pykit.ir
 
+from numba2 import profiling
+
 #===------------------------------------------------------------------===
 # Pipeline
 #===------------------------------------------------------------------===
@@ -27,6 +29,10 @@ def run_pipeline(func, env, passes):
 
 
 def apply_transform(transform, func, env):
+    return profiling.apply_transform(_apply_transform, transform, func, env)
+
+
+def _apply_transform(transform, func, env):
     if isinstance(transform, types.ModuleType):
         result = transform.run(func, env)
     else:
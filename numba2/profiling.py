@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compile-time profiling of passes and phases.
+
+    from numba2 import profiling
+
+    with profiling.profile() as p:
+        f(10)
+    print(p.report())
+    records = p.stats()     # [{'kind', 'name', 'function', 'calls', ...}]
+
+or from the command line:
+
+    bin/numba --time-passes myfile.py
+
+For each pass and each phase we record, per function, the number of
+applications, the wall time and the number of phase cache hits. For passes
+we also record the number of IR ops before and after the transformation.
+
+Times are inclusive: a pass or phase that triggers compilation of other
+functions (e.g. type inference of a call) includes the time spent there.
+When a transform applies another transform to the same function (e.g. the
+verbose printing of bin/numba), only the inner transform is recorded.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import time
+import types
+import threading
+from contextlib import contextmanager
+
+#===------------------------------------------------------------------===
+# Profile
+#===------------------------------------------------------------------===
+
+class Record(object):
+    """Statistics of a pass or phase applied to a single function"""
+
+    __slots__ = ('kind', 'name', 'function', 'calls', 'time',
+                 'ops_before', 'ops_after', 'cache_hits')
+
+    def __init__(self, kind, name, function):
+        self.kind = kind            # 'pass' or 'phase'
+        self.name = name
+        self.function = function
+        self.calls = 0
+        self.time = 0.0
+        self.ops_before = 0
+        self.ops_after = 0
+        self.cache_hits = 0
+
+    def asdict(self):
+        return dict((attr, getattr(self, attr)) for attr in self.__slots__)
+
+
+class Profile(object):
+    """
+    Collects records of passes and phases, keyed on (kind, name, function).
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind, name, function, duration=0.0,
+               ops_before=None, ops_after=None, hit=False):
+        key = (kind, name, function)
+        with self.lock:
+            rec = self.records.get(key)
+            if rec is None:
+                rec = self.records[key] = Record(kind, name, function)
+            if hit:
+                rec.cache_hits += 1
+            else:
+                rec.calls += 1
+                rec.time += duration
+                rec.ops_before += ops_before or 0
+                rec.ops_after += ops_after or 0
+
+    def reset(self):
+        with self.lock:
+            self.records.clear()
+
+    def stats(self):
+        """Records as a list of dicts, ordered by kind, name and function"""
+        with self.lock:
+            records = sorted(self.records.items())
+        return [rec.asdict() for key, rec in records]
+
+    def summary(self, kind='pass'):
+        """Records of `kind` summed over functions, by decreasing time"""
+        totals = {}
+        for rec in self.stats():
+            if rec['kind'] != kind:
+                continue
+            total = totals.setdefault(rec['name'], dict(
+                rec, function=None, calls=0, time=0.0, ops_before=0,
+                ops_after=0, cache_hits=0, functions=0))
+            total['functions'] += 1
+            for attr in ('calls', 'time', 'ops_before', 'ops_after',
+                         'cache_hits'):
+                total[attr] += rec[attr]
+
+        return sorted(totals.values(), key=lambda t: (-t['time'], t['name']))
+
+    def report(self):
+        """Format a report of time spent per phase and per pass"""
+        lines = []
+        for kind, title in (('phase', 'Phase'), ('pass', 'Pass')):
+            summary = self.summary(kind)
+            if not summary:
+                continue
+
+            total = sum(t['time'] for t in summary) or 1.0
+            lines.append("%-40s %6s %6s %10s %6s %9s %9s" % (
+                title, 'funcs', 'calls', 'time (s)', '%', 'ops', 'hits'))
+            lines.append("-" * 92)
+            for t in summary:
+                ops = ""
+                if kind == 'pass':
+                    ops = "%d>%d" % (t['ops_before'], t['ops_after'])
+                lines.append("%-40s %6d %6d %10.4f %5.1f%% %9s %9d" % (
+                    t['name'][-40:], t['functions'], t['calls'], t['time'],
+                    100.0 * t['time'] / total, ops, t['cache_hits']))
+            lines.append("")
+
+        return "\n".join(lines)
+
+#===------------------------------------------------------------------===
+# Global profile
+#===------------------------------------------------------------------===
+
+_profile = [None]
+_state = threading.local()
+
+def enable(profile=None):
+    """Start recording into `profile` (a new Profile by default)"""
+    _profile[0] = profile or Profile()
+    return _profile[0]
+
+def disable():
+    """Stop recording, returns the Profile recorded into"""
+    profile, _profile[0] = _profile[0], None
+    return profile
+
+def current():
+    """The active Profile, or None"""
+    return _profile[0]
+
+@contextmanager
+def profile(p=None):
+    """Record compilation within the with block into a Profile"""
+    previous = _profile[0]
+    p = enable(p)
+    try:
+        yield p
+    finally:
+        _profile[0] = previous
+
+def stats():
+    """Records of the active profile, see Profile.stats"""
+    p = current()
+    return p.stats() if p is not None else []
+
+#===------------------------------------------------------------------===
+# Hooks
+#===------------------------------------------------------------------===
+
+def apply_transform(apply, transform, func, env):
+    """Apply `transform` through `apply`, recording it in the profile"""
+    profile = current()
+    if profile is None:
+        return apply(transform, func, env)
+
+    stack = _stack()
+    frame = [func, False] # [function, applies nested transforms to func]
+    if stack and stack[-1][0] is func:
+        stack[-1][1] = True
+    stack.append(frame)
+
+    before = count_ops(func)
+    start = time.time()
+    try:
+        result = apply(transform, func, env)
+    finally:
+        duration = time.time() - start
+        stack.pop()
+
+    if not frame[1]:
+        profile.record('pass', passname(transform), funcname(func, env),
+                       duration, before, count_ops(result[0]))
+    return result
+
+def phase_hit(phase_name, func, env):
+    """Record a phase cache hit"""
+    profile = current()
+    if profile is not None:
+        profile.record('phase', phase_name, funcname(func, env), hit=True)
+
+@contextmanager
+def phase(phase_name, func, env):
+    """Record the application of a phase within the with block"""
+    profile = current()
+    if profile is None:
+        yield
+        return
+
+    start = time.time()
+    yield
+    profile.record('phase', phase_name, funcname(func, env),
+                   time.time() - start)
+
+def _stack():
+    stack = getattr(_state, 'stack', None)
+    if stack is None:
+        stack = _state.stack = []
+    return stack
+
+# ______________________________________________________________________
+
+def count_ops(func):
+    """Number of IR operations in `func`, or None if not an IR function"""
+    import pykit.ir
+
+    if isinstance(func, pykit.ir.Function):
+        return sum(1 for op in func.ops)
+    return None
+
+def passname(transform):
+    if isinstance(transform, types.ModuleType):
+        return transform.__name__
+    name = getattr(transform, '__name__', None)
+    if name is None:
+        return type(transform).__name__
+    return '%s.%s' % (getattr(transform, '__module__', None), name)
+
+def funcname(func, env):
+    argtypes = env.get('numba.typing.argtypes') or ()
+    name = env.get('numba.state.func_name') or getattr(
+        func, 'name', None) or getattr(func, '__name__', None) or str(func)
+    return '%s(%s)' % (name, ", ".join(map(str, argtypes)))
@@ -16,6 +16,13 @@ def c_primitive(type):
     return type.impl in (nb.Bool, nb.Int, nb.Float, nb.Pointer, nb.Void,
                          nb.Function, nb.ForeignFunction)
 
+def pointerfree(type):
+    """
+    Determine whether values of this type never point to other memory, so
+    that memory holding them need not be scanned by the garbage collector.
+    """
+    return type.impl in (nb.Bool, nb.Int, nb.Float)
+
 def stack_allocate(type):
     """
     Determine whether values of this type should be stack-allocated and partake
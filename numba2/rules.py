@@ -6,6 +6,7 @@ User-defined typing rules:
     typeof(const) -> type
     convert(value, type) -> value
     promote(type1, type2) -> type3
+    supertype(type1) -> type2
 """
 
 from __future__ import print_function, division, absolute_import
@@ -93,10 +94,24 @@ def promote(type1, type2):
     """Promote two types to a common type"""
     if type1 == type2:
         return type1
+    elif supertype(type1) != type1 or supertype(type2) != type2:
+        return promote(supertype(type1), supertype(type2))
     else:
         raise TypeError("Cannot promote %s and %s" % (type1, type2))
 
 
+def supertype(type):
+    """
+    The type values of `type` coerce to when a more general type is
+    expected, e.g. CArray[T, n] -> Array[T, n]. Classes define this
+    through a `supertype` staticmethod.
+    """
+    cls = getattr(type, 'impl', None)
+    if hasattr(cls, 'supertype'):
+        return cls.supertype(type)
+    return type
+
+
 def typejoin(type1, type2):
     """
     Join two types to a type encompassing both. We promote them, join them to
@@ -8,9 +8,11 @@ except ImportError:
 
 from .. import jit, ijit, overlay, overload
 from .interfaces import Sequence, Iterable, Iterator
-from .obj import Range, List, Type
+from .obj import Range, List, Type, Slice, Array, ValueError
+from .obj.listobject import newlist
+from .special import elemtype, pointee
 from .casting import cast
-from numba2.types import int32, float64
+from numba2.types import int32, int64, float64
 from . import ffi
 
 # ____________________________________________________________
@@ -39,6 +41,10 @@ def next(x):
 def len(x):
     return x.__len__()
 
+@ijit('a -> int64')
+def hash(x):
+    return x.__hash__()
+
 # ____________________________________________________________
 
 @jit
@@ -88,11 +94,19 @@ def range(start, stop=0xdeadbeef, step=1):
 
     return Range(start, stop, step)
 
+@ijit
+def prange(start, stop=0xdeadbeef, step=1):
+    """
+    range() whose iterations may run in parallel. Loops `for i in prange(n)`
+    are outlined and run on the worker pool, see runtime/parallel.py.
+    """
+    return range(start, stop, step)
+
 # ____________________________________________________________
 
 @ijit('Iterable[x] -> List[x]')
 def list(value):
-    result = []
+    result = newlist(elemtype(value), 0)
     result.extend(value)
     return result
 
@@ -101,12 +115,217 @@ def list(value):
 #def list():
 #    return []
 
+# ____________________________________________________________
+# Reductions
+
+# Sequences with a known length (List, Array) use counted loops over their
+# items, with four independent accumulators for sum(), which breaks the
+# chain of dependent floating point additions. Ranges use closed forms, and
+# other iterables a plain loop. Arrays are reduced over their items when
+# they have one dimension.
+#
+# min() and max() of an empty sequence abort the process (see ffi.check()),
+# where Python raises ValueError.
+
+@jit('Iterable[a] -> a')
+def sum(xs):
+    result = cast(0, elemtype(xs))
+    for x in xs:
+        result = result + x
+    return result
+
+@jit('List[a] -> a')
+def sum(xs):
+    return sum_items(xs, len(xs), cast(0, elemtype(xs)))
+
+@jit('Array[a, 1] -> a')
+def sum(xs):
+    return sum_items(xs, len(xs), cast(0, pointee(xs.data)))
+
+@jit('Range -> int64')
+def sum(r):
+    n = cast(len(r), int64)
+    return n * r.start + cast(r.step, int64) * (n * (n - 1) // 2)
+
+@jit('a -> int64 -> b -> b')
+def sum_items(xs, n, zero):
+    """Sum the `n` items of `xs`, starting from `zero`"""
+    s0 = zero
+    s1 = zero
+    s2 = zero
+    s3 = zero
+    m = n - n % 4
+    for i in range(0, m, 4):
+        s0 = s0 + xs[i]
+        s1 = s1 + xs[i + 1]
+        s2 = s2 + xs[i + 2]
+        s3 = s3 + xs[i + 3]
+    for i in range(m, n):
+        s0 = s0 + xs[i]
+    return (s0 + s1) + (s2 + s3)
+
+@jit('Iterable[a] -> a')
+def prod(xs):
+    """The product of the items of `xs`, 1 if it is empty"""
+    result = cast(1, elemtype(xs))
+    for x in xs:
+        result = result * x
+    return result
+
+@jit('List[a] -> a')
+def prod(xs):
+    return prod_items(xs, len(xs), cast(1, elemtype(xs)))
+
+@jit('Array[a, 1] -> a')
+def prod(xs):
+    return prod_items(xs, len(xs), cast(1, pointee(xs.data)))
+
+@jit('a -> int64 -> b -> b')
+def prod_items(xs, n, one):
+    result = one
+    for i in range(n):
+        result = result * xs[i]
+    return result
+
+# ____________________________________________________________
+
+@jit('Iterable[a] -> a')
+def min(xs):
+    """
+    The smallest item of `xs`. Empty sequences abort the process, where Python
+    raises ValueError (see ffi.check()).
+    """
+    result = cast(0, elemtype(xs))
+    empty = True
+    for x in xs:
+        if empty or x < result:
+            result = x
+            empty = False
+    ffi.check(not empty)
+    return result
+
+@jit('List[a] -> a')
+def min(xs):
+    return min_items(xs, len(xs))
+
+@jit('Array[a, 1] -> a')
+def min(xs):
+    return min_items(xs, len(xs))
+
+@jit('Range -> int64')
+def min(r):
+    n = len(r)
+    ffi.check(n > 0)
+    if r.step > 0:
+        return cast(r.start, int64)
+    return cast(r.start, int64) + cast(n - 1, int64) * cast(r.step, int64)
+
+@jit('a -> int64 -> b')
+def min_items(xs, n):
+    ffi.check(n > 0)
+    result = xs[0]
+    for i in range(1, n):
+        x = xs[i]
+        if x < result:
+            result = x
+    return result
+
+@jit('Iterable[a] -> a')
+def max(xs):
+    """
+    The largest item of `xs`. Empty sequences abort the process, where Python
+    raises ValueError (see ffi.check()).
+    """
+    result = cast(0, elemtype(xs))
+    empty = True
+    for x in xs:
+        if empty or x > result:
+            result = x
+            empty = False
+    ffi.check(not empty)
+    return result
+
+@jit('List[a] -> a')
+def max(xs):
+    return max_items(xs, len(xs))
+
+@jit('Array[a, 1] -> a')
+def max(xs):
+    return max_items(xs, len(xs))
+
+@jit('Range -> int64')
+def max(r):
+    n = len(r)
+    ffi.check(n > 0)
+    if r.step < 0:
+        return cast(r.start, int64)
+    return cast(r.start, int64) + cast(n - 1, int64) * cast(r.step, int64)
+
+@jit('a -> int64 -> b')
+def max_items(xs, n):
+    ffi.check(n > 0)
+    result = xs[0]
+    for i in range(1, n):
+        x = xs[i]
+        if x > result:
+            result = x
+    return result
+
+# ____________________________________________________________
+
+@jit('Iterable[a] -> bool')
+def any(xs):
+    zero = cast(0, elemtype(xs))
+    for x in xs:
+        if x != zero:
+            return True
+    return False
+
+@jit('List[a] -> bool')
+def any(xs):
+    return any_items(xs, len(xs), cast(0, elemtype(xs)))
+
+@jit('Array[a, 1] -> bool')
+def any(xs):
+    return any_items(xs, len(xs), cast(0, pointee(xs.data)))
+
+@jit('a -> int64 -> b -> bool')
+def any_items(xs, n, zero):
+    for i in range(n):
+        if xs[i] != zero:
+            return True
+    return False
+
+@jit('Iterable[a] -> bool')
+def all(xs):
+    zero = cast(0, elemtype(xs))
+    for x in xs:
+        if x == zero:
+            return False
+    return True
+
+@jit('List[a] -> bool')
+def all(xs):
+    return all_items(xs, len(xs), cast(0, elemtype(xs)))
+
+@jit('Array[a, 1] -> bool')
+def all(xs):
+    return all_items(xs, len(xs), cast(0, pointee(xs.data)))
+
+@jit('a -> int64 -> b -> bool')
+def all_items(xs, n, zero):
+    for i in range(n):
+        if xs[i] == zero:
+            return False
+    return True
+
 # ____________________________________________________________
 
 overlay(builtins.isinstance, isinstance)
 overlay(builtins.iter, iter)
 overlay(builtins.next, next)
 overlay(builtins.len, len)
+overlay(builtins.hash, hash)
 overlay(builtins.str, str)
 overlay(builtins.repr, repr)
 overlay(builtins.unicode, unicode)
@@ -114,4 +333,10 @@ overlay(builtins.int, int)
 overlay(builtins.float, float)
 overlay(builtins.range, range)
 overlay(builtins.list, list)
+overlay(builtins.sum, sum)
+overlay(builtins.min, min)
+overlay(builtins.max, max)
+overlay(builtins.any, any)
+overlay(builtins.all, all)
+overlay(builtins.slice, Slice)
 overlay(builtins.print, print)
\ No newline at end of file
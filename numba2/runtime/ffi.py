@@ -9,12 +9,14 @@ import ctypes
 
 from numba2 import jit
 from numba2 import jit, overlay
+from numba2 import representation
 from numba2.conversion import ctype
 from .obj import Type
 from .casting import cast
 from .obj import Type, Pointer, Void
 from .lib import libc
 from .lowlevel_impls import add_impl
+from .special import typeof
 
 from pykit import ir
 from pykit import types as ptypes
@@ -32,10 +34,45 @@ def malloc(items, type):
     p = libc.malloc(items * sizeof(type))
     return cast(p, Pointer[type])
 
+@jit('Pointer[a] -> int64 -> Pointer[a]')
+def realloc(p, items):
+    q = libc.realloc(cast(p, Pointer[void]), items * itemsize(p))
+    return cast(q, typeof(p))
+
 @jit('Pointer[a] -> void')
 def free(p):
     libc.free(p)
 
+@jit('Pointer[a] -> Pointer[a] -> int64 -> void')
+def memcpy(dst, src, items):
+    """Copy `items` non-overlapping items from src to dst"""
+    libc.memcpy(cast(dst, Pointer[void]), cast(src, Pointer[void]),
+                items * itemsize(dst))
+
+@jit('Pointer[a] -> Pointer[a] -> int64 -> void')
+def memmove(dst, src, items):
+    """Copy `items` items from src to dst, which may overlap"""
+    libc.memmove(cast(dst, Pointer[void]), cast(src, Pointer[void]),
+                 items * itemsize(dst))
+
+@jit('Pointer[a] -> int64 -> Type[b] -> void')
+def memzero(p, items, type):
+    """Zero `items` items of type `type` at `p`"""
+    libc.memset(cast(p, Pointer[void]), 0, items * sizeof(type))
+
+@jit('bool -> void')
+def check(cond):
+    """
+    Abort the process unless `cond` holds.
+
+    Compiled code cannot raise exceptions yet. Operations that raise in
+    Python (e.g. IndexError, KeyError or ValueError) check their arguments
+    with this instead of accessing memory they do not own, or returning a
+    wrong result.
+    """
+    if not cond:
+        libc.abort()
+
 @jit('Pointer[a] -> Pointer[b] -> int64 -> bool')
 def memcmp(a, b, size):
     p1 = cast(a, Pointer[void])
@@ -50,6 +87,20 @@ def sizeof(obj):
 def sizeof(obj):
     raise NotImplementedError("Not implemented at the python level")
 
+@jit('Pointer[a] -> int64', opaque=True)
+def itemsize(p):
+    """Size of the items pointed to by `p`"""
+    raise NotImplementedError("Not implemented at the python level")
+
+@jit('Type[a] -> bool', opaque=True)
+def pointerfree(type):
+    """Whether values of type `type` never point to other memory"""
+    raise NotImplementedError("Not implemented at the python level")
+
+@jit('Pointer[a] -> bool', opaque=True)
+def pointerfree(p):
+    raise NotImplementedError("Not implemented at the python level")
+
 #===------------------------------------------------------------------===
 # Low-level implementations
 #===------------------------------------------------------------------===
@@ -66,3 +117,19 @@ def implement_sizeof(builder, argtypes, obj):
     return builder.ret(result)
 
 add_impl(sizeof, "sizeof", implement_sizeof, ptypes.Int64)
+
+def implement_itemsize(builder, argtypes, p):
+    [argtype] = argtypes
+    [base] = argtype.parameters
+    size = ctypes.sizeof(ctype(base))
+    return builder.ret(ir.Const(size, ptypes.Int64))
+
+add_impl(itemsize, "itemsize", implement_itemsize, ptypes.Int64)
+
+def implement_pointerfree(builder, argtypes, obj):
+    [argtype] = argtypes
+    [base] = argtype.parameters # Unpack 'a' from 'Type[a]' or 'Pointer[a]'
+    result = ir.Const(representation.pointerfree(base), ptypes.Bool)
+    return builder.ret(result)
+
+add_impl(pointerfree, "pointerfree", implement_pointerfree, ptypes.Bool)
@@ -11,6 +11,7 @@ from numba2 import abstract, jit
 from numba2.runtime.lowlevel_impls import add_impl_cls
 
 from pykit import types as ptypes
+from pykit.ir import Const
 
 __all__ = ['Number', 'Real', 'Complex', 'Rational', 'Irrational',
            'Integer', 'Floating']
@@ -142,6 +143,14 @@ class Number(object):
     def __rshift__(self, other):
         return self >> other
 
+    #===------------------------------------------------------------------===
+    # Hashing
+    #===------------------------------------------------------------------===
+
+    @jit('a -> int64', opaque=True)
+    def __hash__(self):
+        raise NotImplementedError("Not implemented at the python level")
+
     #===------------------------------------------------------------------===
     # Unary
     #===------------------------------------------------------------------===
@@ -204,3 +213,20 @@ add_binop(Number, "or")
 add_binop(Number, "xor")
 add_binop(Number, "lshift")
 add_binop(Number, "rshift")
+
+#===------------------------------------------------------------------===
+# Hashing
+#===------------------------------------------------------------------===
+
+def implement_hash(b, argtypes, x):
+    """
+    Integers hash to their value, floats to their bit pattern. Adding 0.0
+    first maps -0.0 to 0.0, which compares equal.
+    """
+    if x.type.is_float:
+        x = b.add(b.convert(ptypes.Float64, x), Const(0.0, ptypes.Float64))
+        b.ret(b.bitcast(ptypes.Int64, x))
+    else:
+        b.ret(b.convert(ptypes.Int64, x))
+
+add_impl_cls(Number, "__hash__", implement_hash, ptypes.Int64)
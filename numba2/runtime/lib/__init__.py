@@ -6,4 +6,6 @@ Foreign library interfaces.
 
 from __future__ import print_function, division, absolute_import
 
-from .c import libc
\ No newline at end of file
+from .c import libc
+from .gc import libgc
+from . import threads
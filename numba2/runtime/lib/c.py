@@ -15,8 +15,13 @@ import cffi
 ffi = cffi.FFI()
 ffi.cdef("""
 void *malloc(size_t size);
+void *realloc(void *ptr, size_t size);
 void free(void *ptr);
+void abort(void);
+void *memcpy(void *dst, void *src, size_t n);
+void *memmove(void *dst, void *src, size_t n);
 int memcmp(void *s1, void *s2, size_t n);
+void *memset(void *s, int c, size_t n);
 int printf(char *s, ...);
 int puts(char *s);
 size_t strlen(char *s);
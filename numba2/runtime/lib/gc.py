@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+"""
+Boehm collector bindings, for runtime objects that keep pointers to
+collected objects outside of objects allocated by the compiler (see
+bufferobject.py).
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import cffi
+
+#===------------------------------------------------------------------===
+# Decls
+#===------------------------------------------------------------------===
+
+ffi = cffi.FFI()
+ffi.cdef("""
+void *GC_malloc(size_t size);
+void *GC_malloc_atomic(size_t size);
+void *GC_malloc_uncollectable(size_t size);
+void *GC_realloc(void *ptr, size_t size);
+void GC_free(void *ptr);
+void GC_gcollect(void);
+size_t GC_get_heap_size(void);
+""")
+
+libgc = ffi.dlopen("gc")
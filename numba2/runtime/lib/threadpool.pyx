@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""
+Native worker pool running the chunks of prange loops, see
+numba2/runtime/parallel.py.
+
+A loop of n iterations is split statically into `nchunks` contiguous
+chunks. The calling thread runs chunk 0 and worker k runs chunk k. Workers
+wait on a condition variable between loops, so starting a loop costs a
+broadcast rather than creating threads.
+
+Chunks are compiled numba functions
+
+    void chunk(void *env, int64_t lo, int64_t hi, int64_t k)
+
+and nothing here needs the GIL. Chunks may allocate objects through the
+Boehm collector, so workers register themselves with it, which makes it
+scan their stacks and allows them to allocate. Python threads calling
+compiled code register through numba_register_thread(), see threads.py.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+cimport cython
+from libc.stdint cimport int64_t, intptr_t
+
+cdef extern from "pthread.h" nogil:
+    ctypedef struct pthread_t:
+        pass
+    ctypedef struct pthread_attr_t:
+        pass
+    ctypedef struct pthread_mutex_t:
+        pass
+    ctypedef struct pthread_mutexattr_t:
+        pass
+    ctypedef struct pthread_cond_t:
+        pass
+    ctypedef struct pthread_condattr_t:
+        pass
+
+    int pthread_create(pthread_t *thread, pthread_attr_t *attr,
+                       void *(*start)(void *) nogil, void *arg)
+    int pthread_detach(pthread_t thread)
+
+    int pthread_mutex_init(pthread_mutex_t *mutex, pthread_mutexattr_t *attr)
+    int pthread_mutex_lock(pthread_mutex_t *mutex)
+    int pthread_mutex_trylock(pthread_mutex_t *mutex)
+    int pthread_mutex_unlock(pthread_mutex_t *mutex)
+
+    int pthread_cond_init(pthread_cond_t *cond, pthread_condattr_t *attr)
+    int pthread_cond_wait(pthread_cond_t *cond, pthread_mutex_t *mutex)
+    int pthread_cond_signal(pthread_cond_t *cond)
+    int pthread_cond_broadcast(pthread_cond_t *cond)
+
+cdef extern from "gc.h" nogil:
+    struct GC_stack_base:
+        pass
+
+    void GC_INIT()
+    void GC_allow_register_threads()
+    int GC_get_stack_base(GC_stack_base *sb)
+    int GC_register_my_thread(GC_stack_base *sb)
+    int GC_unregister_my_thread()
+    int GC_thread_is_registered()
+
+cdef extern from "unistd.h" nogil:
+    long sysconf(int name)
+    enum: _SC_NPROCESSORS_ONLN
+
+ctypedef void (*chunk_t)(void *env, int64_t lo, int64_t hi, int64_t k) nogil
+
+# ______________________________________________________________________
+# State
+
+cdef pthread_mutex_t lock       # protects the job and counters below
+cdef pthread_cond_t start_cond  # a job was posted
+cdef pthread_cond_t done_cond   # the last worker finished its chunk
+cdef pthread_mutex_t run_lock   # held while a loop runs on the pool
+
+cdef chunk_t job_chunk
+cdef void *job_env
+cdef int64_t job_n
+cdef int64_t job_nchunks
+cdef int64_t generation = 0     # number of jobs posted
+cdef int64_t pending = 0        # workers that did not finish the job
+
+cdef int64_t size = 1           # number of threads, including the caller
+cdef int64_t nstarted = 0       # number of workers started
+
+pthread_mutex_init(&lock, NULL)
+pthread_mutex_init(&run_lock, NULL)
+pthread_cond_init(&start_cond, NULL)
+pthread_cond_init(&done_cond, NULL)
+
+# ______________________________________________________________________
+# Workers
+
+@cython.cdivision(True)
+cdef void run_chunk(chunk_t chunk, void *env, int64_t n, int64_t nchunks,
+                    int64_t k) nogil:
+    cdef int64_t lo = n * k // nchunks
+    cdef int64_t hi = n * (k + 1) // nchunks
+    if lo < hi:
+        chunk(env, lo, hi, k)
+
+cdef void *work(void *arg) nogil:
+    global pending
+
+    cdef int64_t k = <intptr_t> arg
+    cdef int64_t seen = 0 # workers start before the first job is posted
+    cdef chunk_t chunk
+    cdef void *env
+    cdef int64_t n, nchunks
+    cdef GC_stack_base stack
+
+    GC_get_stack_base(&stack)
+    GC_register_my_thread(&stack)
+
+    while True:
+        pthread_mutex_lock(&lock)
+        while generation == seen:
+            pthread_cond_wait(&start_cond, &lock)
+        seen = generation
+        chunk = job_chunk
+        env = job_env
+        n = job_n
+        nchunks = job_nchunks
+        pthread_mutex_unlock(&lock)
+
+        if k < nchunks:
+            run_chunk(chunk, env, n, nchunks, k)
+
+        pthread_mutex_lock(&lock)
+        pending -= 1
+        if pending == 0:
+            pthread_cond_signal(&done_cond)
+        pthread_mutex_unlock(&lock)
+
+    return NULL
+
+cdef void start_workers() nogil:
+    global size, nstarted
+
+    cdef pthread_t thread
+    while nstarted < size - 1:
+        if pthread_create(&thread, NULL, work,
+                          <void *> <intptr_t> (nstarted + 1)) != 0:
+            break
+        pthread_detach(thread)
+        nstarted += 1
+
+    size = nstarted + 1
+
+# ______________________________________________________________________
+# Entry points
+
+cdef public void numba_pool_init(int64_t nthreads) nogil:
+    """
+    Set the number of threads, 0 for the number of CPUs. This must be called
+    from the main thread, which initializes the collector.
+    """
+    global size
+    GC_INIT()
+    GC_allow_register_threads()
+    if nthreads <= 0:
+        nthreads = sysconf(_SC_NPROCESSORS_ONLN)
+    if nstarted == 0:
+        size = max(nthreads, 1)
+
+cdef public int numba_register_thread() nogil:
+    """
+    Register the calling thread with the collector. Returns 1 if it was
+    not registered before, and 0 otherwise.
+    """
+    cdef GC_stack_base stack
+    if GC_thread_is_registered():
+        return 0
+    GC_get_stack_base(&stack)
+    GC_register_my_thread(&stack)
+    return 1
+
+cdef public void numba_unregister_thread() nogil:
+    """Unregister a thread registered by numba_register_thread()"""
+    GC_unregister_my_thread()
+
+cdef public int64_t numba_pool_size() nogil:
+    return size
+
+cdef public void numba_parallel_for(int64_t chunk, void *env, int64_t n,
+                                    int64_t nchunks) nogil:
+    """
+    Run the `nchunks` chunks of range(n) on the pool and wait for them to
+    finish. Loops started while another loop runs, such as nested loops,
+    run their chunks serially in the calling thread.
+    """
+    global job_chunk, job_env, job_n, job_nchunks, generation, pending
+
+    cdef chunk_t f = <chunk_t> <intptr_t> chunk
+    cdef int64_t k
+
+    if nchunks <= 1 or pthread_mutex_trylock(&run_lock) != 0:
+        for k in range(nchunks):
+            run_chunk(f, env, n, nchunks, k)
+        return
+
+    start_workers()
+
+    pthread_mutex_lock(&lock)
+    job_chunk = f
+    job_env = env
+    job_n = n
+    job_nchunks = nchunks
+    pending = nstarted
+    generation += 1
+    pthread_cond_broadcast(&start_cond)
+    pthread_mutex_unlock(&lock)
+
+    # Chunk 0, and any chunks for workers that failed to start
+    run_chunk(f, env, n, nchunks, 0)
+    for k in range(nstarted + 1, nchunks):
+        run_chunk(f, env, n, nchunks, k)
+
+    pthread_mutex_lock(&lock)
+    while pending > 0:
+        pthread_cond_wait(&done_cond, &lock)
+    pthread_mutex_unlock(&lock)
+
+    pthread_mutex_unlock(&run_lock)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+Threads calling compiled code, which allocates through the Boehm collector.
+
+The collector and the worker pool of threadpool.pyx are initialized when
+this module is imported, which happens when numba2 itself is imported,
+normally from the main thread. The collector only scans the stacks of
+registered threads, and threads may only allocate once registered, so
+other Python threads register themselves the first time they call compiled
+code (see CallStub), and unregister when they exit.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import threading
+
+from numba2.config import config
+from . import threadpool
+
+import cffi
+
+#===------------------------------------------------------------------===
+# Decls
+#===------------------------------------------------------------------===
+
+ffi = cffi.FFI()
+ffi.cdef("""
+void numba_pool_init(int64_t nthreads);
+int numba_register_thread(void);
+void numba_unregister_thread(void);
+""")
+
+pool = ffi.dlopen(threadpool.__file__)
+pool.numba_pool_init(config.num_threads)
+
+#===------------------------------------------------------------------===
+# Registration
+#===------------------------------------------------------------------===
+
+local = threading.local()
+
+class Registration(object):
+    """
+    Unregisters the thread that created it. The thread-local state holding
+    it is cleared by the exiting thread itself.
+    """
+
+    def __del__(self):
+        pool.numba_unregister_thread()
+
+def register_thread():
+    """Register the calling thread with the collector, if needed"""
+    if not getattr(local, 'registered', False):
+        if pool.numba_register_thread():
+            local.registration = Registration()
+        local.registered = True
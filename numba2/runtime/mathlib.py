@@ -14,7 +14,7 @@ except ImportError:
     import builtins
 
 
-from numba2 import jit, overlay
+from numba2 import jit, overlay, vectorize
 from numba2.types import Complex
 from numba2.compiler import lltype
 from numba2.runtime.lowlevel_impls import add_impl
@@ -88,6 +88,8 @@ ufunc2math = dict((v, k) for k, v in math2ufunc.items())
 # Low-level implementations
 #===------------------------------------------------------------------===
 
+functions = {} # name -> declared function
+
 def declare(name, signatures, mathname=None):
     """
     Declare a unary math function named `name` for the given signatures.
@@ -100,7 +102,7 @@ def declare(name, signatures, mathname=None):
             return getattr(math, name)(*args) # pure python
 
     def impl(builder, argtypes, *args):
-        [ty] = argtypes
+        ty = argtypes[0]
         lty = lltype(ty)
         return builder.ret(builder.call_math(lty, mathname, list(args)))
 
@@ -108,6 +110,7 @@ def declare(name, signatures, mathname=None):
     add_impl(func, "numba_" + name, impl)
 
     func.__name__ = name
+    functions[name] = func
     return func
 
 #===------------------------------------------------------------------===
@@ -141,11 +144,11 @@ ceil       = declare('ceil'    , [ufloating, ucomplex])
 trunc      = declare('trunc'   , [ufloating, ucomplex])
 floor      = declare('floor'   , [ufloating, ucomplex])
 
-pow             = declare('pow'          , [ufloating, ucomplex])
-hypot           = declare('hypot'        , [ufloating])
-atan2           = declare('atan2'        , [ufloating])
-logaddexp       = declare('logaddexp'    , [ufloating])
-logaddexp2      = declare('logaddexp2'   , [ufloating])
+pow             = declare('pow'          , [bfloating, bcomplex])
+hypot           = declare('hypot'        , [bfloating])
+atan2           = declare('atan2'        , [bfloating])
+logaddexp       = declare('logaddexp'    , [bfloating])
+logaddexp2      = declare('logaddexp2'   , [bfloating])
 
 #===------------------------------------------------------------------===
 # Overlays
@@ -161,4 +164,11 @@ def math_overlay(mod, getname):
 
 math_overlay(math,  lambda name: name)
 math_overlay(cmath, lambda name: name)
-math_overlay(np,    lambda name: math2ufunc.get(name, name))
\ No newline at end of file
+math_overlay(np,    lambda name: math2ufunc.get(name, name))
+
+#===------------------------------------------------------------------===
+# UFuncs
+#===------------------------------------------------------------------===
+
+# Elementwise versions of all math functions, e.g. ufuncs['sin'](array)
+ufuncs = dict((name, vectorize(func)) for name, func in functions.items())
@@ -6,14 +6,18 @@ from .boolobject import Bool
 from .intobject import Int
 from .floatobject import Float
 from .complexobject import Complex
+from .typeobject import Type, Constructor
+from .dummy import Void, Function, ForeignFunction, NULL
 from .tupleobject import Tuple, StaticTuple, GenericTuple
 from .listobject import List
 from .rangeobject import Range
+from .sliceobject import Slice
 from .noneobject import NoneType, NoneValue
-from .typeobject import Type, Constructor
 from .structobject import struct_
-from .dummy import Void, Function, ForeignFunction, NULL
 from .exceptions import *
 from .pyobject import Object
 from .bufferobject import Buffer
-from .stringobject import String, from_cstring
\ No newline at end of file
+from .stringobject import String, from_cstring
+from .dictobject import Dict
+from .setobject import Set
+from .array import Array
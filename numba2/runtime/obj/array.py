@@ -2,59 +2,364 @@
 
 """
 Arrays and NumPy conversion.
+
+Arrays point straight at the data of the NumPy array they are converted
+from, and hold a reference to it in `base` to keep the data alive. Shape
+and strides are copied, so that views can be created without affecting the
+parent array. Strides are in bytes, like NumPy strides.
+
+The shape and strides of converted arrays are owned by the converted
+object (see toctypes()), and those of views are allocated in collected
+memory, which is freed along with the last view that refers to it.
+
+Contiguous arrays have the types CArray and FArray, which index without
+strides, and coerce to Array.
 """
 
 from __future__ import print_function, division, absolute_import
 
-from numba2 import jit, char
+import ctypes
+
+import numba2
+from numba2 import jit, typeof
+from numba2.conversion import toobject
+from numba2.errors import CompileError
+from numba2.runtime import ffi
+from numba2.runtime.lowlevel_impls import add_impl
+from numba2.runtime.lib import libgc
+from numba2.runtime.casting import cast
+from numba2.runtime.special import typeof as typeof_
+from .boolobject import Bool
+from .intobject import Int
+from .floatobject import Float
+from .pointerobject import Pointer
+from .bufferobject import Buffer, frombuffer
+from .tupleobject import StaticTuple, EmptyTuple
+from .sliceobject import Slice
+from .pyobject import Object
+
+from pykit import types as ptypes
 
 import numpy as np
 
-@jit('Array[type T, Int n]')
-class Array(object):
+char = Int[8, False]
 
-    layout = [('data', char.pointer()),
-              ('shape', 'Tuple[Int, n]'),
-              ('strides', 'Tuple[Int, n]'),
-              ('keep_alive', 'Object')]
+@jit('Array[T, n]')
+class Array(object):
+    layout = [('data', 'Pointer[T]'),
+              ('shape', 'Buffer[int64]'),
+              ('strides', 'Buffer[int64]'),
+              ('base', 'Object')]
 
-    def __init__(self, data, shape, strides, keep_alive=None):
-        # NOTE: we should generate constructors if not present from the layout struct
+    @jit('Array[T, n] -> Pointer[T] -> Buffer[int64] -> Buffer[int64] -> Object -> void')
+    def __init__(self, data, shape, strides, base):
         self.data = data
         self.shape = shape
         self.strides = strides
-        self.keep_alive = keep_alive
+        self.base = base
+
+    # __________________________________________________________________
 
-    @jit('Array[T, n] -> a -> b')
+    @jit('a -> int64')
+    def __len__(self):
+        return self.shape.p.deref()
+
+    @jit('a -> b : integral -> T')
+    def __getitem__(self, idx):
+        # Types for 1D arrays only, see item()
+        return self.item(idx).deref()
+
+    @jit('a -> StaticTuple[b, c] -> d')
     def __getitem__(self, indices):
-        ptr = self.data
-        for i, index in unroll(enumerate(indices)):
-            ptr += index * self.shape[i]
-        return ptr[0]
+        return getitem(self, indices.hd, indices)
+
+    @jit('a -> Slice[b, c, d] -> Array[T, n]')
+    def __getitem__(self, s):
+        return self.view(StaticTuple(s, EmptyTuple()))
+
+    @jit('a -> b : integral -> T -> void')
+    def __setitem__(self, idx, value):
+        self.item(idx).store(value)
+
+    @jit('a -> StaticTuple[b, c] -> T -> void')
+    def __setitem__(self, indices, value):
+        self.pointer(indices).store(value)
+
+    # __________________________________________________________________
+
+    @jit('Array[T, 1] -> a : integral -> Pointer[T]')
+    def item(self, idx):
+        """
+        Pointer to item `idx` of a 1D array. Integer indices of arrays with
+        more dimensions do not type, since they would select a row in NumPy.
+        """
+        idx = normalize(idx, self.shape.p.deref())
+        return byteoffset(self.data, idx * self.strides.p.deref())
+
+    @jit('Array[T, n] -> StaticTuple[a, b] -> Pointer[T]')
+    def pointer(self, indices):
+        """Pointer to the item at integer `indices`"""
+        check_indices(self, indices)
+        return byteoffset(self.data, offset(indices, self.shape.p,
+                                            self.strides.p))
+
+    @jit('a -> StaticTuple[b, c] -> Array[T, n]')
+    def view(self, slices):
+        """Create a view for a tuple of slices, sharing the data"""
+        check_slices(self, slices)
+        ndim = self.shape.size
+        shape = newextents(ndim)
+        strides = newextents(ndim)
+        ffi.memcpy(shape.p, self.shape.p, ndim)
+        ffi.memcpy(strides.p, self.strides.p, ndim)
+        start = slice_dims(slices, shape.p, strides.p)
+        return Array(byteoffset(self.data, start), shape, strides, self.base)
+
+    # __________________________________________________________________
+
+    @staticmethod
+    def fromobject(ndarray, type):
+        dtype, ndim = type.parameters
+        data = Pointer.fromobject(ndarray.ctypes.data, Pointer[dtype])
+        shape = (ctypes.c_int64 * ndim)(*ndarray.shape)
+        strides = (ctypes.c_int64 * ndim)(*ndarray.strides)
+        base = Object.fromobject(ndarray, Object[()])
+        array = type.impl(data, extents(shape), extents(strides), base)
+        array.keepalive = [shape, strides]
+        return array
+
+    @staticmethod
+    def toobject(obj, type):
+        dtype, ndim = type.parameters
+        base = toobject(obj.base, Object[()])
+        shape = frombuffer(obj.shape.p, ndim, numba2.int64)
+        strides = frombuffer(obj.strides.p, ndim, numba2.int64)
+        data = ctypes.cast(getattr(obj.data, 'p', obj.data), ctypes.c_void_p)
+        return np.asarray(ArrayView(base, data.value, shape, strides))
+
+
+@jit('CArray[T, n]')
+class CArray(Array):
+    """
+    C-contiguous array. Items are indexed from the shape and the item size,
+    so that inner loops have a unit stride which LLVM can vectorize.
+
+    Indexing checks the number of dimensions when compiling, since it is
+    known from the types of the array and the indices. It loads only the data
+    pointer and the extents, which LLVM hoists out of loops when it can tell
+    that the loop does not store to them.
+    """
+
+    @jit('CArray[T, 1] -> a : integral -> Pointer[T]')
+    def item(self, idx):
+        return self.data + normalize(idx, self.shape.p.deref())
+
+    @jit('CArray[T, n] -> StaticTuple[a, b] -> Pointer[T]')
+    def pointer(self, indices):
+        check_indices(self, indices)
+        return self.data + c_index(indices, self.shape.p, 0)
+
+    @staticmethod
+    def supertype(type):
+        return Array[tuple(type.parameters)]
+
+
+@jit('FArray[T, n]')
+class FArray(Array):
+    """Fortran-contiguous array, see CArray"""
+
+    @jit('FArray[T, 1] -> a : integral -> Pointer[T]')
+    def item(self, idx):
+        return self.data + normalize(idx, self.shape.p.deref())
+
+    @jit('FArray[T, n] -> StaticTuple[a, b] -> Pointer[T]')
+    def pointer(self, indices):
+        check_indices(self, indices)
+        return self.data + f_index(indices, self.shape.p)
+
+    @staticmethod
+    def supertype(type):
+        return Array[tuple(type.parameters)]
+
+
+class ArrayView(object):
+    """
+    Exposes the data of an array to NumPy, referring to the owning ndarray
+    so that NumPy keeps it alive.
+    """
+
+    def __init__(self, base, data, shape, strides):
+        self.base = base
+        self.__array_interface__ = {
+            'data': (data or 0, False),
+            'shape': tuple(shape),
+            'strides': tuple(strides),
+            'typestr': base.dtype.str,
+            'version': 3,
+        }
+
+#===------------------------------------------------------------------===
+# Extents
+#===------------------------------------------------------------------===
+
+@jit('int64 -> Buffer[int64]')
+def newextents(ndim):
+    """
+    Allocate `ndim` extents in collected memory. The collector does not scan
+    it, and frees it once no array refers to it.
+    """
+    p = libgc.GC_malloc_atomic(ndim * ffi.sizeof(numba2.int64))
+    return Buffer(cast(p, Pointer[numba2.int64]), ndim)
+
+def extents(array):
+    """Buffer referring to the ctypes int64 array `array`"""
+    p = ctypes.cast(array, ctypes.POINTER(ctypes.c_int64))
+    return Buffer(Pointer(p), len(array))
+
+#===------------------------------------------------------------------===
+# Indexing
+#===------------------------------------------------------------------===
+
+@jit('a -> b : integral -> StaticTuple[c, d] -> e')
+def getitem(array, first, indices):
+    return array.pointer(indices).deref()
+
+@jit('a -> Slice[b, c, d] -> StaticTuple[e, f] -> g')
+def getitem(array, first, indices):
+    return array.view(indices)
+
+@jit('StaticTuple[a, b] -> Pointer[int64] -> Pointer[int64] -> int64')
+def offset(indices, shape, strides):
+    """Byte offset of the item at `indices`"""
+    idx = normalize(indices.hd, shape.deref())
+    return idx * strides.deref() + offset(indices.tl, shape + 1, strides + 1)
+
+@jit('EmptyTuple -> Pointer[int64] -> Pointer[int64] -> int64')
+def offset(indices, shape, strides):
+    return numba2.cast(0, numba2.int64)
+
+@jit('StaticTuple[a, b] -> Pointer[int64] -> int64 -> int64')
+def c_index(indices, shape, index):
+    """Index of the item at `indices` in a C-contiguous array"""
+    index = index * shape.deref() + normalize(indices.hd, shape.deref())
+    return c_index(indices.tl, shape + 1, index)
+
+@jit('EmptyTuple -> Pointer[int64] -> int64 -> int64')
+def c_index(indices, shape, index):
+    return index
+
+@jit('StaticTuple[a, b] -> Pointer[int64] -> int64')
+def f_index(indices, shape):
+    """Index of the item at `indices` in a Fortran-contiguous array"""
+    idx = normalize(indices.hd, shape.deref())
+    return idx + shape.deref() * f_index(indices.tl, shape + 1)
+
+@jit('EmptyTuple -> Pointer[int64] -> int64')
+def f_index(indices, shape):
+    return numba2.cast(0, numba2.int64)
+
+@jit('StaticTuple[a, b] -> Pointer[int64] -> Pointer[int64] -> int64')
+def slice_dims(slices, shape, strides):
+    """
+    Apply `slices` to the given shape and strides, and return the byte
+    offset of the start of the view.
+    """
+    s = slices.hd.indices(shape.deref())
+    stride = strides.deref()
+    shape.store(len(s))
+    strides.store(stride * s.step)
+    return s.start * stride + slice_dims(slices.tl, shape + 1, strides + 1)
+
+@jit('EmptyTuple -> Pointer[int64] -> Pointer[int64] -> int64')
+def slice_dims(slices, shape, strides):
+    return numba2.cast(0, numba2.int64)
+
+@jit('a : integral -> int64 -> int64')
+def normalize(idx, extent):
+    """Resolve a negative index, the index must be in bounds"""
+    if idx < 0:
+        idx = idx + extent
+    ffi.check(idx >= 0 and idx < extent)
+    return idx
+
+@jit('a -> StaticTuple[b, c] -> void', opaque=True)
+def check_indices(array, indices):
+    """Require an index for each dimension, checked when compiling"""
+    raise NotImplementedError("Not implemented at the python level")
+
+@jit('a -> StaticTuple[b, c] -> void', opaque=True)
+def check_slices(array, slices):
+    """Require at most a slice per dimension, checked when compiling"""
+    raise NotImplementedError("Not implemented at the python level")
+
+@jit('Pointer[a] -> int64 -> Pointer[a]')
+def byteoffset(p, nbytes):
+    """Offset pointer `p` by `nbytes` bytes"""
+    return cast(cast(p, Pointer[char]) + nbytes, typeof_(p))
+
+#===------------------------------------------------------------------===
+# Low-level implementations
+#===------------------------------------------------------------------===
+
+def static_length(type):
+    """Number of items of a StaticTuple type"""
+    n = 0
+    while type.impl is StaticTuple:
+        n += 1
+        type = type.parameters[1]
+    return n
+
+def implement_check_indices(builder, argtypes, array, indices):
+    ndim = argtypes[0].parameters[1]
+    if static_length(argtypes[1]) != ndim:
+        raise CompileError("Expected %d indices for array of type %s, got %s"
+                           % (ndim, argtypes[0], argtypes[1]))
+    builder.ret(None)
+
+def implement_check_slices(builder, argtypes, array, slices):
+    ndim = argtypes[0].parameters[1]
+    if static_length(argtypes[1]) > ndim:
+        raise CompileError("Too many indices for array of type %s: %s"
+                           % (argtypes[0], argtypes[1]))
+    builder.ret(None)
+
+add_impl(check_indices, "check_indices", implement_check_indices, ptypes.Void)
+add_impl(check_slices, "check_slices", implement_check_slices, ptypes.Void)
+
+#===------------------------------------------------------------------===
+# Typing
+#===------------------------------------------------------------------===
 
-    @signature('Rep[Array[T, ?]] -> Rep[Tuple[Slice | Int, n]] -> Rep[T]')
-    def __getslice__(self, s_indices):
-        # Note: This could be an opague method and emit a compiler operator, which later resolves
-        # ndim = ...
-        # new_data = ...
-        # new_shape = ...
-        # new_strides = ...
-        return quote[Array(escape[new_data], escape[new_shape],
-                           escape[new_strides], escape[self].keep_alive)]
+def fromdtype(dtype):
+    """Get the numba type for a NumPy dtype"""
+    bits = dtype.itemsize * 8
+    if dtype.kind in 'iu':
+        return Int[bits, dtype.kind == 'u']
+    elif dtype.kind == 'f':
+        return Float[bits]
+    elif dtype.kind == 'b':
+        return Bool[()]
+    raise TypeError("Unsupported dtype: %s" % (dtype,))
 
+def todtype(type):
+    """Get the NumPy dtype for a numba type"""
+    if type.impl is Int:
+        nbits, unsigned = type.parameters
+        return np.dtype('%sint%d' % ('u' if unsigned else '', nbits))
+    elif type.impl is Float:
+        [nbits] = type.parameters
+        return np.dtype('float%d' % nbits)
+    elif type.impl is Bool:
+        return np.dtype(np.bool_)
+    raise TypeError("No dtype for type %s" % (type,))
 
 
-@overload(np.ndarray)
+@typeof.case(np.ndarray)
 def typeof(array):
-    # if array.flags['C_CONTIGUOUS']:
-    #     return ContigArray[typeof(array.dtype)]
-    # else:
-    return Array[typeof(array.dtype), array.ndim]
-
-@overload(np.ndarray, Array)
-@signature('Object -> Array[T, n]')
-def convert(ndarray):
-    data = convert(ndarray.ctypes.data, 'Pointer[T]')
-    shape = convert(ndarray.shape, 'Tuple[Int, n]')
-    strides = convert(ndarray.strides, 'Tuple[Int, n]')
-    return Array(data, shape, strides, ndarray)
\ No newline at end of file
+    if array.flags.c_contiguous:
+        cls = CArray
+    elif array.flags.f_contiguous:
+        cls = FArray
+    else:
+        cls = Array
+    return cls[fromdtype(array.dtype), array.ndim]
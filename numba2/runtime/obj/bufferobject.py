@@ -2,14 +2,29 @@
 
 """
 Buffer objects.
+
+Buffers are allocated through the garbage collector, which frees them once
+nothing refers to them. Buffers of items that may point to objects are
+scanned for pointers, other buffers are allocated as atomic memory, which
+is not scanned. See allocate().
 """
 
 from __future__ import print_function, division, absolute_import
 
+import ctypes
+
 import numba2
 from numba2 import jit
+from numba2.conversion import ctype, fromobject, toobject, toctypes, fromctypes
+from numba2.representation import c_primitive, pointerfree
 from numba2.runtime import ffi
+from numba2.runtime.lib import libgc
+from numba2.runtime.casting import cast
+from numba2.runtime.special import typeof, pointee
 from . import Pointer
+from .dummy import Void
+
+void = Void[()]
 
 @jit('Buffer[base]')
 class Buffer(object):
@@ -48,12 +63,116 @@ class Buffer(object):
     #def __del__(self):
     #    self.free(self.p)
 
-    @jit
-    def resize(self):
-        raise NotImplementedError
+    @jit('a -> int64 -> void')
+    def resize(self, size):
+        self.p = reallocate(self.p, size)
+        self.size = size
+
+    @jit('a -> void')
+    def free(self):
+        deallocate(self.p)
 
 
 @jit('Type[a] -> int64 -> Buffer[a]')
 def newbuffer(basetype, size):
-    p = ffi.malloc(size, basetype)
-    return Buffer(p, size)
\ No newline at end of file
+    return Buffer(allocate(basetype, size), size)
+
+@jit('Buffer[a] -> int64 -> Buffer[a]')
+def newbuffer_like(buf, size):
+    """Allocate a Buffer of `size` items of the same type as `buf`"""
+    return Buffer(allocate(pointee(buf.p), size), size)
+
+#===------------------------------------------------------------------===
+# Allocation
+#===------------------------------------------------------------------===
+
+@jit('Type[a] -> int64 -> Pointer[a]')
+def allocate(type, items):
+    """
+    Allocate `items` items of type `type` through the collector. Items that
+    may point to objects are scanned by the collector and zeroed.
+    """
+    nbytes = items * ffi.sizeof(type)
+    if ffi.pointerfree(type):
+        p = libgc.GC_malloc_atomic(nbytes)
+    else:
+        p = libgc.GC_malloc(nbytes)
+    return cast(p, Pointer[type])
+
+@jit('Pointer[a] -> int64 -> Pointer[a]')
+def reallocate(p, items):
+    """Resize memory from allocate() to `items` items"""
+    q = libgc.GC_realloc(cast(p, Pointer[void]), items * ffi.itemsize(p))
+    return cast(q, typeof(p))
+
+@jit('Pointer[a] -> void')
+def deallocate(p):
+    """Free memory from allocate() before the collector would"""
+    libgc.GC_free(cast(p, Pointer[void]))
+
+#===------------------------------------------------------------------===
+# Conversion
+#===------------------------------------------------------------------===
+
+def tobuffer(items, base):
+    """
+    Copy the Python values `items` to a Buffer, which can be resized like
+    Buffers from allocate(). Primitive items are converted in bulk, and None
+    items are left zeroed.
+
+    Objects pointed to by non-primitive items are kept alive by the
+    returned Buffer, and by any ctypes conversion of it (see toctypes()).
+    The memory of the items is kept alive by a Root, which the Buffer keeps
+    alive in the same way.
+    """
+    from numba2.runtime.lib.gc import libgc, ffi as gcffi
+
+    cty = ctype(base)
+    keepalive = []
+    if c_primitive(base) and None not in items:
+        array = (cty * len(items))(*items)
+    else:
+        array = (cty * len(items))()
+        for i, x in enumerate(items):
+            if x is not None:
+                array[i] = toctypes(fromobject(x, base), base, keepalive)
+
+    size = ctypes.sizeof(array)
+    if pointerfree(base):
+        p = libgc.GC_malloc_atomic(max(size, 1))
+    else:
+        p = libgc.GC_malloc(max(size, 1))
+    p = int(gcffi.cast('uintptr_t', p))
+    ctypes.memmove(p, array, size)
+    keepalive.append(Root(p))
+    buf = Buffer(Pointer(ctypes.cast(p, ctypes.POINTER(cty))), len(items))
+    buf.keepalive = keepalive
+    return buf
+
+class Root(object):
+    """
+    Keeps collected memory that Python refers to alive, through a pointer
+    in uncollectable memory, which the collector scans. The memory becomes
+    collectable once the Root is deleted and compiled code no longer refers
+    to it. Compiled code may resize or free the memory (see reallocate()),
+    since we never free it ourselves.
+    """
+
+    def __init__(self, p):
+        from numba2.runtime.lib.gc import libgc, ffi as gcffi
+
+        self.root = libgc.GC_malloc_uncollectable(gcffi.sizeof('void *'))
+        gcffi.cast('uintptr_t *', self.root)[0] = p
+        self.free = libgc.GC_free # module globals may be gone in __del__
+
+    def __del__(self):
+        self.free(self.root)
+
+def frombuffer(p, size, base):
+    """Convert `size` items pointed to by `p` to a Python list"""
+    cty = ctype(base)
+    p = getattr(p, 'p', p) # Pointer or ctypes pointer
+    items = ctypes.cast(p, ctypes.POINTER(cty * size)).contents
+    if c_primitive(base):
+        return list(items)
+    return [toobject(fromctypes(x, base), base) for x in items]
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+"""
+dict implementation, see hashtable.py.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import numba2
+from numba2 import jit, typeof
+from numba2.runtime import ffi
+from ..interfaces import Iterator
+from .bufferobject import Buffer, newbuffer, tobuffer, frombuffer
+from .hashtable import (DUMMY, MIN_SIZE, keyhash, lookup, insert, overfull,
+                        rehash, moveitems, newhashes, tablesize, pytable,
+                        pyslots)
+
+@jit('Dict[K, V]')
+class Dict(object):
+    layout = [('hashes', 'Buffer[int64]'), ('keybuf', 'Buffer[K]'),
+              ('valbuf', 'Buffer[V]'), ('used', 'int64'), ('fill', 'int64')]
+
+    @jit('Dict[K, V] -> Buffer[int64] -> Buffer[K] -> Buffer[V] -> int64 -> int64 -> void')
+    def __init__(self, hashes, keybuf, valbuf, used, fill):
+        self.hashes = hashes
+        self.keybuf = keybuf
+        self.valbuf = valbuf
+        self.used = used
+        self.fill = fill
+
+    # __________________________________________________________________
+
+    @jit('Dict[K, V] -> int64')
+    def __len__(self):
+        return self.used
+
+    @jit('Dict[K, V] -> K -> bool')
+    def __contains__(self, key):
+        return lookup(self.hashes, self.keybuf, key, keyhash(key)) >= 0
+
+    @jit('Dict[K, V] -> K -> V')
+    def __getitem__(self, key):
+        i = lookup(self.hashes, self.keybuf, key, keyhash(key))
+        ffi.check(i >= 0)
+        return (self.valbuf.p + i).deref()
+
+    @jit('Dict[K, V] -> K -> V -> V')
+    def get(self, key, default):
+        i = lookup(self.hashes, self.keybuf, key, keyhash(key))
+        if i < 0:
+            return default
+        return (self.valbuf.p + i).deref()
+
+    @jit('Dict[K, V] -> K -> V -> void')
+    def __setitem__(self, key, value):
+        h = keyhash(key)
+        i = lookup(self.hashes, self.keybuf, key, h)
+        if i >= 0:
+            (self.valbuf.p + i).store(value)
+            return
+
+        i = -(i + 1)
+        if insert(self.hashes, self.keybuf, i, key, h):
+            self.fill += 1
+        (self.valbuf.p + i).store(value)
+        self.used += 1
+
+        if overfull(self.fill, self.hashes):
+            self.resize(self.used * 2)
+
+    @jit('Dict[K, V] -> K -> void')
+    def __delitem__(self, key):
+        i = lookup(self.hashes, self.keybuf, key, keyhash(key))
+        ffi.check(i >= 0)
+        (self.hashes.p + i).store(DUMMY)
+        self.used -= 1
+
+    @jit('Dict[K, V] -> DictIterator[K, V]')
+    def __iter__(self):
+        return DictIterator(self, 0)
+
+    # __________________________________________________________________
+
+    @jit('Dict[K, V] -> int64 -> void')
+    def resize(self, used):
+        """Move the items to a table for `used` items, dropping deleted keys"""
+        hashes = newhashes(tablesize(used))
+        slots = rehash(self.hashes, hashes)
+        self.keybuf = moveitems(slots, self.keybuf, hashes.size)
+        self.valbuf = moveitems(slots, self.valbuf, hashes.size)
+        slots.free()
+        self.hashes.free()
+        self.hashes = hashes
+        self.fill = self.used
+
+    # __________________________________________________________________
+
+    @staticmethod
+    def fromobject(dct, type):
+        ktype, vtype = type.parameters
+        keys = list(dct)
+        hashes, slots = pytable(keys, ktype)
+        keybuf = [None] * len(hashes)
+        valbuf = [None] * len(hashes)
+        for key, i in zip(keys, slots):
+            keybuf[i] = key
+            valbuf[i] = dct[key]
+
+        return Dict(tobuffer(hashes, numba2.int64), tobuffer(keybuf, ktype),
+                    tobuffer(valbuf, vtype), len(dct), len(dct))
+
+    @staticmethod
+    def toobject(obj, type):
+        ktype, vtype = type.parameters
+        size = obj.hashes.size
+        slots = pyslots(frombuffer(obj.hashes.p, size, numba2.int64))
+        keys = frombuffer(obj.keybuf.p, size, ktype)
+        values = frombuffer(obj.valbuf.p, size, vtype)
+        return dict((keys[i], values[i]) for i in slots)
+
+
+@jit('DictIterator[K, V]')
+class DictIterator(Iterator):
+    layout = [('dct', 'Dict[K, V]'), ('idx', 'int64')]
+
+    @jit('DictIterator[K, V] -> K')
+    def __next__(self):
+        hashes = self.dct.hashes
+        while self.idx < hashes.size:
+            i = self.idx
+            self.idx += 1
+            if (hashes.p + i).deref() >= 0:
+                return (self.dct.keybuf.p + i).deref()
+        raise StopIteration
+
+
+@jit('Type[K] -> Type[V] -> Dict[K, V]')
+def newdict(ktype, vtype):
+    """Create an empty dict"""
+    return Dict(newhashes(MIN_SIZE), newbuffer(ktype, MIN_SIZE),
+                newbuffer(vtype, MIN_SIZE), 0, 0)
+
+
+@typeof.case(dict)
+def typeof(pyval):
+    if not pyval:
+        raise TypeError("Cannot infer key and value types of empty dict")
+    ktypes = set(typeof(x) for x in pyval)
+    vtypes = set(typeof(x) for x in pyval.values())
+    if len(ktypes) != 1 or len(vtypes) != 1:
+        raise TypeError("Got multiple types for keys or values, %s and %s" % (
+            ktypes, vtypes))
+    [ktype], [vtype] = ktypes, vtypes
+    return Dict[ktype, vtype]
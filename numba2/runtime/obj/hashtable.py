@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""
+Open addressing hash tables, shared by Dict and Set.
+
+A table of size 2**n stores the hash of each key in `hashes`, next to the
+keys (and values) in separate buffers, `keybuf` and `valbuf`. Slots are probed linearly from
+`hash & (size - 1)`. Hashes of keys are made non-negative, which leaves
+negative values to mark free slots:
+
+    EMPTY:  never used, ends the probe sequence
+    DUMMY:  used by a deleted key, the probe sequence continues
+
+Comparing the cached hash before comparing keys avoids most key
+comparisons, and allows resizing without re-hashing keys.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import struct
+import ctypes
+
+import numba2
+from numba2 import jit
+from .boolobject import Bool
+from .intobject import Int
+from .floatobject import Float
+from .stringobject import String
+from .tupleobject import StaticTuple, EmptyTuple
+from .bufferobject import Buffer, newbuffer, newbuffer_like
+
+EMPTY = -1
+DUMMY = -2
+MIN_SIZE = 8
+
+#===------------------------------------------------------------------===
+# Probing
+#===------------------------------------------------------------------===
+
+@jit('a -> int64')
+def keyhash(key):
+    """Non-negative hash of `key`"""
+    h = hash(key)
+    if h < 0:
+        h = -(h + 1)
+    return h
+
+@jit('Buffer[int64] -> Buffer[a] -> a -> int64 -> int64')
+def lookup(hashes, keys, key, h):
+    """
+    Find `key` with hash `h`. Returns its slot if found, or -(slot + 1) for
+    the slot to insert the key in otherwise.
+    """
+    mask = hashes.size - 1
+    i = h & mask
+    free = -1
+    while True:
+        slot = (hashes.p + i).deref()
+        if slot == EMPTY:
+            if free < 0:
+                free = i
+            return -(free + 1)
+        elif slot == DUMMY:
+            if free < 0:
+                free = i
+        elif slot == h and (keys.p + i).deref() == key:
+            return i
+        i = (i + 1) & mask
+
+@jit('Buffer[int64] -> int64 -> int64')
+def emptyslot(hashes, h):
+    """Find an empty slot for hash `h` in a table without deleted keys"""
+    mask = hashes.size - 1
+    i = h & mask
+    while (hashes.p + i).deref() != EMPTY:
+        i = (i + 1) & mask
+    return i
+
+@jit('Buffer[int64] -> Buffer[a] -> int64 -> a -> int64 -> bool')
+def insert(hashes, keys, i, key, h):
+    """
+    Store `key` with hash `h` in free slot `i`, as found by lookup().
+    Returns whether the slot was never used before, which adds to the fill.
+    """
+    empty = (hashes.p + i).deref() == EMPTY
+    (hashes.p + i).store(h)
+    (keys.p + i).store(key)
+    return empty
+
+@jit('int64 -> Buffer[int64] -> bool')
+def overfull(fill, hashes):
+    """Whether a table with `fill` used or deleted slots must be resized"""
+    return fill * 3 >= hashes.size * 2
+
+#===------------------------------------------------------------------===
+# Resizing
+#===------------------------------------------------------------------===
+
+@jit('Buffer[int64] -> Buffer[int64] -> Buffer[int64]')
+def rehash(hashes, newhashes):
+    """
+    Insert the hashes of the keys in `hashes` into the empty table
+    `newhashes`, dropping deleted keys. Returns the new slot of each old
+    slot, or -1 for free slots, to move the keys and values with
+    moveitems().
+    """
+    slots = newbuffer(numba2.int64, hashes.size)
+    for j in range(hashes.size):
+        h = (hashes.p + j).deref()
+        i = -1
+        if h >= 0:
+            i = emptyslot(newhashes, h)
+            (newhashes.p + i).store(h)
+        (slots.p + j).store(i)
+    return slots
+
+@jit('Buffer[int64] -> Buffer[a] -> int64 -> Buffer[a]')
+def moveitems(slots, items, size):
+    """
+    Move `items` to their new slots from rehash() in a new buffer of `size`
+    items, and free the old buffer.
+    """
+    result = newbuffer_like(items, size)
+    for j in range(slots.size):
+        i = (slots.p + j).deref()
+        if i >= 0:
+            (result.p + i).store((items.p + j).deref())
+    items.free()
+    return result
+
+@jit('int64 -> Buffer[int64]')
+def newhashes(size):
+    hashes = newbuffer(numba2.int64, size)
+    for i in range(size):
+        (hashes.p + i).store(EMPTY)
+    return hashes
+
+@jit('int64 -> int64')
+def tablesize(used):
+    """Smallest table size to hold `used` keys below 2/3 load"""
+    size = MIN_SIZE
+    while size * 2 <= used * 3:
+        size = size * 2
+    return size
+
+#===------------------------------------------------------------------===
+# Python
+#===------------------------------------------------------------------===
+
+def wrap(x):
+    """Wrap Python integer `x` to int64"""
+    return ctypes.c_int64(x).value
+
+def pyhash(value, type):
+    """Compute the hash of `value` of numba type `type`, like hash()"""
+    cls = type.impl
+    if cls is Int or cls is Bool:
+        return wrap(int(value))
+    elif cls is Float:
+        [nbits] = type.parameters
+        if nbits == 32:
+            value = ctypes.c_float(value).value
+        return struct.unpack('q', struct.pack('d', value + 0.0))[0]
+    elif cls is String:
+        h = 5381
+        for c in bytearray(value):
+            h = wrap(h * 33 + (c - 256 if c >= 128 else c))
+        return h
+    elif cls is StaticTuple:
+        head, tail = type.parameters
+        return wrap(pyhash(value[0], head) * 1000003) ^ pyhash(value[1:], tail)
+    elif cls is EmptyTuple:
+        return 0
+    raise TypeError("unhashable type: %s" % (type,))
+
+def pykeyhash(value, type):
+    h = pyhash(value, type)
+    return -(h + 1) if h < 0 else h
+
+def pytable(keys, type):
+    """
+    Build the slots of a table for Python `keys` of numba type `type`.
+    Returns (hashes, slots) with the slot of each key.
+    """
+    size = MIN_SIZE
+    while size * 2 <= len(keys) * 3:
+        size *= 2
+
+    mask = size - 1
+    hashes = [EMPTY] * size
+    slots = []
+    for key in keys:
+        h = pykeyhash(key, type)
+        i = h & mask
+        while hashes[i] != EMPTY:
+            i = (i + 1) & mask
+        hashes[i] = h
+        slots.append(i)
+
+    return hashes, slots
+
+def pyslots(hashes):
+    """Indices of the used slots of a table"""
+    return [i for i, h in enumerate(hashes) if h >= 0]
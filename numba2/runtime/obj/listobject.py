@@ -2,23 +2,160 @@
 
 """
 List implementation.
+
+Lists are backed by a Buffer holding the items, which grows geometrically
+so that append() takes amortized constant time.
 """
 
 from __future__ import print_function, division, absolute_import
 
 from numba2 import jit, typeof
+from numba2.runtime import ffi
+from numba2.runtime.special import elemtype
+from ..interfaces import Sequence, Iterable, Iterator
+from .bufferobject import Buffer, newbuffer, tobuffer, frombuffer
 from .pointerobject import Pointer
+from .sliceobject import Slice
 
+MIN_CAPACITY = 4
 
 @jit('List[a]')
-class List(object):
-    layout = [('buf', 'Pointer[a]')]
+class List(Sequence):
+    layout = [('buf', 'Buffer[a]'), ('size', 'int64')]
+
+    @jit('List[a] -> Buffer[a] -> int64 -> void')
+    def __init__(self, buf, size):
+        self.buf = buf
+        self.size = size
+
+    # __________________________________________________________________
+
+    @jit('List[a] -> int64')
+    def __len__(self):
+        return self.size
+
+    @jit('List[a] -> b : integral -> a')
+    def __getitem__(self, idx):
+        return (self.buf.p + self.index(idx)).deref()
+
+    @jit('List[a] -> Slice[b, c, d] -> List[a]')
+    def __getitem__(self, s):
+        s = s.indices(self.size)
+        n = len(s)
+        result = newlist(elemtype(self), n)
+        if s.step == 1:
+            ffi.memcpy(result.buf.p, self.buf.p + s.start, n)
+        else:
+            for i in range(n):
+                (result.buf.p + i).store((self.buf.p + s.start + i * s.step).deref())
+        result.size = n
+        return result
+
+    @jit('List[a] -> b : integral -> a -> void')
+    def __setitem__(self, idx, value):
+        (self.buf.p + self.index(idx)).store(value)
+
+    @jit('List[a] -> ListIterator[a]')
+    def __iter__(self):
+        return ListIterator(self, 0)
+
+    # __________________________________________________________________
+
+    @jit('List[a] -> a -> void')
+    def append(self, value):
+        if self.size == self.buf.size:
+            self.reserve(self.size + 1)
+        (self.buf.p + self.size).store(value)
+        self.size += 1
+
+    @jit('List[a] -> List[a] -> void')
+    def extend(self, other):
+        n = other.size
+        self.reserve(self.size + n)
+        ffi.memmove(self.buf.p + self.size, other.buf.p, n)
+        self.size += n
+
+    @jit('List[a] -> Sequence[a] -> void')
+    def extend(self, other):
+        n = len(other)
+        self.reserve(self.size + n)
+        for i in range(n):
+            (self.buf.p + self.size + i).store(other[i])
+        self.size += n
+
+    @jit('List[a] -> Iterable[a] -> void')
+    def extend(self, other):
+        for item in other:
+            self.append(item)
+
+    @jit('List[a] -> a')
+    def pop(self):
+        return self.pop(-1)
+
+    @jit('List[a] -> b : integral -> a')
+    def pop(self, idx):
+        idx = self.index(idx)
+        p = self.buf.p
+        result = (p + idx).deref()
+        ffi.memmove(p + idx, p + idx + 1, self.size - idx - 1)
+        self.size -= 1
+        return result
+
+    @jit('List[a] -> int64 -> void')
+    def reserve(self, capacity):
+        """Grow the buffer geometrically to hold at least `capacity` items"""
+        if capacity > self.buf.size:
+            newsize = self.buf.size * 2
+            if newsize < capacity:
+                newsize = capacity
+            if newsize < MIN_CAPACITY:
+                newsize = MIN_CAPACITY
+            self.buf.resize(newsize)
+
+    @jit('List[a] -> b : integral -> int64')
+    def index(self, idx):
+        """Resolve a negative index, the index must be in bounds"""
+        if idx < 0:
+            idx = idx + self.size
+        ffi.check(idx >= 0 and idx < self.size)
+        return idx
+
+    # __________________________________________________________________
+
+    @staticmethod
+    def fromobject(lst, type):
+        [base] = type.parameters
+        return List(tobuffer(lst, base), len(lst))
+
+    @staticmethod
+    def toobject(obj, type):
+        [base] = type.parameters
+        return frombuffer(obj.buf.p, obj.size, base)
+
+
+@jit('ListIterator[a]')
+class ListIterator(Iterator):
+    layout = [('lst', 'List[a]'), ('idx', 'int64')]
+
+    @jit('ListIterator[a] -> a')
+    def __next__(self):
+        if self.idx < self.lst.size:
+            self.idx += 1
+            return (self.lst.buf.p + self.idx - 1).deref()
+        raise StopIteration
+
 
 @jit
 class EmptyList(List):
     layout = []
 
 
+@jit('Type[a] -> int64 -> List[a]')
+def newlist(type, capacity):
+    """Create an empty list with room for `capacity` items"""
+    return List(newbuffer(type, capacity), 0)
+
+
 @typeof.case(list)
 def typeof(pyval):
     if pyval:
@@ -27,4 +164,4 @@ def typeof(pyval):
             raise TypeError("Got multiple types for elements, %s" % set(types))
         return List[types[0]]
     else:
-        return EmptyList[()]
\ No newline at end of file
+        return EmptyList[()]
@@ -31,6 +31,10 @@ class Range(Sequence):
     def __len__(self):
         return len_range(self.start, self.stop, self.step)
 
+    @ijit
+    def __getitem__(self, idx):
+        return self.start + idx * self.step
+
 
 @jit
 class RangeIterator(Iterator):
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+set implementation, see hashtable.py.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import numba2
+from numba2 import jit, typeof
+from numba2.runtime import ffi
+from ..interfaces import Iterator
+from .bufferobject import Buffer, newbuffer, tobuffer, frombuffer
+from .hashtable import (DUMMY, MIN_SIZE, keyhash, lookup, insert, overfull,
+                        rehash, moveitems, newhashes, tablesize, pytable,
+                        pyslots)
+
+@jit('Set[T]')
+class Set(object):
+    layout = [('hashes', 'Buffer[int64]'), ('keybuf', 'Buffer[T]'),
+              ('used', 'int64'), ('fill', 'int64')]
+
+    @jit('Set[T] -> Buffer[int64] -> Buffer[T] -> int64 -> int64 -> void')
+    def __init__(self, hashes, keybuf, used, fill):
+        self.hashes = hashes
+        self.keybuf = keybuf
+        self.used = used
+        self.fill = fill
+
+    # __________________________________________________________________
+
+    @jit('Set[T] -> int64')
+    def __len__(self):
+        return self.used
+
+    @jit('Set[T] -> T -> bool')
+    def __contains__(self, key):
+        return lookup(self.hashes, self.keybuf, key, keyhash(key)) >= 0
+
+    @jit('Set[T] -> SetIterator[T]')
+    def __iter__(self):
+        return SetIterator(self, 0)
+
+    # __________________________________________________________________
+
+    @jit('Set[T] -> T -> void')
+    def add(self, key):
+        h = keyhash(key)
+        i = lookup(self.hashes, self.keybuf, key, h)
+        if i >= 0:
+            return
+
+        if insert(self.hashes, self.keybuf, -(i + 1), key, h):
+            self.fill += 1
+        self.used += 1
+
+        if overfull(self.fill, self.hashes):
+            self.resize(self.used * 2)
+
+    @jit('Set[T] -> T -> void')
+    def discard(self, key):
+        i = lookup(self.hashes, self.keybuf, key, keyhash(key))
+        if i >= 0:
+            (self.hashes.p + i).store(DUMMY)
+            self.used -= 1
+
+    @jit('Set[T] -> T -> void')
+    def remove(self, key):
+        i = lookup(self.hashes, self.keybuf, key, keyhash(key))
+        ffi.check(i >= 0)
+        (self.hashes.p + i).store(DUMMY)
+        self.used -= 1
+
+    @jit('Set[T] -> int64 -> void')
+    def resize(self, used):
+        """Move the keys to a table for `used` keys, dropping deleted keys"""
+        hashes = newhashes(tablesize(used))
+        slots = rehash(self.hashes, hashes)
+        self.keybuf = moveitems(slots, self.keybuf, hashes.size)
+        slots.free()
+        self.hashes.free()
+        self.hashes = hashes
+        self.fill = self.used
+
+    # __________________________________________________________________
+
+    @staticmethod
+    def fromobject(keys, type):
+        [ktype] = type.parameters
+        keys = list(keys)
+        hashes, slots = pytable(keys, ktype)
+        keybuf = [None] * len(hashes)
+        for key, i in zip(keys, slots):
+            keybuf[i] = key
+
+        return Set(tobuffer(hashes, numba2.int64), tobuffer(keybuf, ktype),
+                   len(keys), len(keys))
+
+    @staticmethod
+    def toobject(obj, type):
+        [ktype] = type.parameters
+        size = obj.hashes.size
+        slots = pyslots(frombuffer(obj.hashes.p, size, numba2.int64))
+        keys = frombuffer(obj.keybuf.p, size, ktype)
+        return set(keys[i] for i in slots)
+
+
+@jit('SetIterator[T]')
+class SetIterator(Iterator):
+    layout = [('set', 'Set[T]'), ('idx', 'int64')]
+
+    @jit('SetIterator[T] -> T')
+    def __next__(self):
+        hashes = self.set.hashes
+        while self.idx < hashes.size:
+            i = self.idx
+            self.idx += 1
+            if (hashes.p + i).deref() >= 0:
+                return (self.set.keybuf.p + i).deref()
+        raise StopIteration
+
+
+@jit('Type[T] -> Set[T]')
+def newset(type):
+    """Create an empty set"""
+    return Set(newhashes(MIN_SIZE), newbuffer(type, MIN_SIZE), 0, 0)
+
+
+@typeof.case(set)
+def typeof(pyval):
+    if not pyval:
+        raise TypeError("Cannot infer element type of empty set")
+    types = set(typeof(x) for x in pyval)
+    if len(types) != 1:
+        raise TypeError("Got multiple types for elements, %s" % (types,))
+    [type] = types
+    return Set[type]
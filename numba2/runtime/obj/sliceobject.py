@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+slice implementation.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from numba2 import sjit, jit
+from numba2.runtime import ffi
+from .noneobject import NoneType
+from .rangeobject import len_range
+
+@sjit('Slice[start, stop, step]')
+class Slice(object):
+    layout = [('start', 'start'), ('stop', 'stop'), ('step', 'step')]
+
+    @jit
+    def __init__(self, start, stop, step):
+        self.start = start
+        self.stop = stop
+        self.step = step
+
+    @jit('Slice[a, b, c] -> int64 -> Slice[int64, int64, int64]')
+    def indices(self, length):
+        """
+        Resolve missing and negative indices for a sequence of `length`
+        items, like slice.indices().
+        """
+        step = slice_step(self.step)
+        if step < 0:
+            lower = -1
+            upper = length - 1
+            start = slice_bound(self.start, upper, lower, upper, length)
+            stop = slice_bound(self.stop, lower, lower, upper, length)
+        else:
+            lower = 0
+            upper = length
+            start = slice_bound(self.start, lower, lower, upper, length)
+            stop = slice_bound(self.stop, upper, lower, upper, length)
+        return Slice(start, stop, step)
+
+    @jit('Slice[int64, int64, int64] -> int64')
+    def __len__(self):
+        return len_range(self.start, self.stop, self.step)
+
+
+@jit('NoneType -> int64')
+def slice_step(step):
+    return 1
+
+@jit('a : integral -> int64')
+def slice_step(step):
+    ffi.check(step != 0)
+    return step
+
+@jit('NoneType -> int64 -> int64 -> int64 -> int64 -> int64')
+def slice_bound(value, default, lower, upper, length):
+    return default
+
+@jit('a : integral -> int64 -> int64 -> int64 -> int64 -> int64')
+def slice_bound(value, default, lower, upper, length):
+    if value < 0:
+        value = value + length
+        if value < lower:
+            value = lower
+    elif value > upper:
+        value = upper
+    return value
@@ -6,6 +6,7 @@ String implementation.
 
 from __future__ import print_function, division, absolute_import
 
+import numba2
 from numba2 import sjit, jit, typeof
 from numba2.runtime.lib import libc
 from . import librt as lib
@@ -39,6 +40,15 @@ class String(object):
     def __len__(self):
         return len(self.buf) - 1
 
+    @jit('a -> int64')
+    def __hash__(self):
+        # djb2, mirrored by hashtable.pyhash()
+        h = numba2.cast(5381, numba2.int64)
+        p = self.buf.p
+        for i in range(len(self)):
+            h = h * 33 + numba2.cast((p + i).deref(), numba2.int64)
+        return h
+
     # __________________________________________________________________
 
     @staticmethod
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, typeof, int32, float64
+from numba2.errors import error
+from numba2.runtime.obj.array import Array, CArray, FArray
+from numba2.tests.support import aborts
+
+import numpy as np
+
+
+class TestArrays(unittest.TestCase):
+
+    def test_typeof(self):
+        self.assertEqual(typeof(np.zeros(10)), CArray[float64, 1])
+        self.assertEqual(typeof(np.zeros((2, 3), dtype=np.int32)),
+                         CArray[int32, 2])
+        self.assertEqual(typeof(np.zeros((2, 3)).T), FArray[float64, 2])
+        self.assertEqual(typeof(np.zeros(10)[::2]), Array[float64, 1])
+
+    def test_getitem(self):
+        @jit
+        def f(a, i):
+            return a[i]
+
+        a = np.arange(10.0)
+        self.assertEqual(f(a, 3), 3.0)
+        self.assertEqual(f(a, -1), 9.0)
+        self.assertEqual(f(a[::2], 2), 4.0)
+
+    def test_getitem_tuple(self):
+        @jit
+        def f(a, i, j):
+            return a[i, j]
+
+        a = np.arange(12).reshape(3, 4)
+        self.assertEqual(f(a, 1, 2), a[1, 2])
+        self.assertEqual(f(a.T, 2, 1), a[1, 2])
+
+    def test_contiguous(self):
+        @jit
+        def f(a, i, j):
+            return a[i, j]
+
+        a = np.arange(12.0).reshape(3, 4)
+        self.assertEqual(f(a, 2, 3), a[2, 3])
+        self.assertEqual(f(np.asfortranarray(a), 2, 3), a[2, 3])
+        self.assertEqual(f(a[:, 1:], 2, 2), a[2, 3])
+
+    def test_bounds(self):
+        # Out of bounds indices abort instead of raising IndexError
+        for index in ["a[10]", "a[-11]", "a[::2][5]", "b[1, 3]", "b.T[3, 1]"]:
+            self.assertTrue(aborts("""
+                import numpy as np
+                from numba2 import jit
+                @jit
+                def f(a, b):
+                    return %s
+                f(np.arange(10.0), np.zeros((3, 3)))
+                """ % (index,)), index)
+
+    def test_rank(self):
+        @jit
+        def f(a, i):
+            return a[i, i, i]
+
+        @jit
+        def g(a):
+            return a[1:, 1:, 1:]
+
+        self.assertRaises(error, f, np.zeros((3, 3)), 1)
+        self.assertRaises(error, g, np.zeros((3, 3)))
+
+    def test_integer_index_rank(self):
+        @jit
+        def f(a, i):
+            return a[i]
+
+        @jit
+        def g(a, i):
+            a[i] = 1.0
+
+        # NumPy would return or assign a row
+        a = np.zeros((3, 6))
+        for a in (a, a.T, a[:, ::2]):
+            self.assertRaises(error, f, a, 1)
+            self.assertRaises(error, g, a, 1)
+
+    def test_coercion(self):
+        @jit('Array[float64, 1] -> float64')
+        def f(a):
+            return a[1]
+
+        self.assertEqual(f(np.arange(4.0)), 1.0)
+
+    def test_coercion_per_argument(self):
+        @jit('Array[float64, 1] -> CArray[float64, 1] -> float64')
+        def f(a, b):
+            return a[1] + b[1]
+
+        a = np.arange(4.0)
+        self.assertEqual(f(a, a), 2.0)
+
+    def test_setitem(self):
+        @jit
+        def f(a):
+            for i in range(len(a)):
+                a[i] = i * 2.0
+
+        @jit
+        def g(a):
+            a[1, 1] = -1.0
+
+        a = np.zeros(3)
+        f(a)
+        self.assertEqual(list(a), [0.0, 2.0, 4.0])
+
+        b = np.zeros((3, 3))
+        g(b)
+        self.assertEqual(b[1, 1], -1.0)
+
+    def test_zero_copy(self):
+        @jit
+        def f(a):
+            a[0] = 5
+
+        a = np.zeros(4, dtype=np.int32)
+        f(a)
+        self.assertEqual(a[0], 5)
+
+    def test_slice(self):
+        @jit
+        def f(a):
+            return a[1:8:2]
+
+        a = np.arange(10.0)
+        view = f(a)
+        self.assertTrue(np.all(view == a[1:8:2]))
+        view[0] = -1.0
+        self.assertEqual(a[1], -1.0)
+
+    def test_slice_2d(self):
+        @jit
+        def f(a):
+            return a[::-1, 1:3]
+
+        a = np.arange(12).reshape(3, 4)
+        self.assertTrue(np.all(f(a) == a[::-1, 1:3]))
+
+    def test_keepalive(self):
+        @jit
+        def f(a):
+            return a[2:]
+
+        view = f(np.arange(100.0))
+        self.assertEqual(view[0], 2.0)
+        self.assertIsNotNone(view.base)
+
+    def test_conversion_extents(self):
+        a = np.zeros((3, 4))
+        array = Array.fromobject(a, typeof(a))
+        self.assertEqual(array.shape.p[1], 4)
+        self.assertEqual(array.strides.p[0], 32)
+        self.assertEqual(len(array.keepalive), 2)
+
+    def test_views(self):
+        @jit
+        def f(a):
+            n = 0
+            for i in range(len(a)):
+                n += len(a[i:])
+            return n
+
+        self.assertEqual(f(np.arange(100.0)), 5050)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, typeof, int32, float64, Pointer
+from numba2.runtime.obj.dictobject import Dict, newdict
+from numba2.runtime.obj.setobject import Set
+from numba2.runtime.obj.hashtable import pyhash
+from numba2.runtime.special import typeof as typeof_
+from numba2.runtime.gc import boehm as gc
+from numba2.tests.support import aborts
+
+
+@jit
+class Box(object):
+    layout = [('x', int32)]
+
+    @jit
+    def __init__(self, x):
+        self.x = x
+
+
+class TestHashing(unittest.TestCase):
+
+    def test_hash(self):
+        @jit
+        def f(x):
+            return hash(x)
+
+        for value in [0, 10, -5, 2.5, -0.0, "", "hello", (1, 2.0)]:
+            self.assertEqual(f(value), pyhash(value, typeof(value)))
+
+    def test_float_zero(self):
+        self.assertEqual(pyhash(0.0, float64), pyhash(-0.0, float64))
+
+
+class TestDicts(unittest.TestCase):
+
+    def test_typeof(self):
+        self.assertEqual(typeof({1: 2.0}), Dict[int32, float64])
+        self.assertRaises(TypeError, typeof, {1: 2, 3: 4.0})
+
+    def test_conversion(self):
+        @jit
+        def f(d):
+            return d
+
+        d = dict((i, i * 2.0) for i in range(100))
+        self.assertEqual(f(d), d)
+        self.assertEqual(f({"a": 1, "b": 2}), {"a": 1, "b": 2})
+
+    def test_getitem(self):
+        @jit
+        def f(d, key):
+            return d[key]
+
+        self.assertEqual(f({"a": 1, "b": 2}, "b"), 2)
+        self.assertEqual(f({(1, 2): 3}, (1, 2)), 3)
+
+    def test_missing_key(self):
+        # Missing keys abort instead of raising KeyError
+        self.assertTrue(aborts("""
+            from numba2 import jit
+            @jit
+            def f(d, key):
+                return d[key]
+            f({"a": 1}, "b")
+            """))
+        self.assertTrue(aborts("""
+            from numba2 import jit
+            @jit
+            def f(d, key):
+                del d[key]
+            f({1: 2}, 3)
+            """))
+
+    def test_setitem(self):
+        @jit
+        def f(d, n):
+            for i in range(n):
+                d[i] = i * i
+            return d
+
+        self.assertEqual(f({-1: 1}, 100),
+                         dict([(-1, 1)] + [(i, i * i) for i in range(100)]))
+
+    def test_delitem(self):
+        @jit
+        def f(d):
+            del d[1]
+            d[4] = 5
+            return d
+
+        self.assertEqual(f({1: 2, 2: 3}), {2: 3, 4: 5})
+
+    def test_contains(self):
+        @jit
+        def f(d, key):
+            return key in d
+
+        self.assertTrue(f({1.5: 2}, 1.5))
+        self.assertFalse(f({1.5: 2}, 2.5))
+
+    def test_iter(self):
+        @jit
+        def f(d):
+            sum = 0
+            for key in d:
+                sum += key
+            return sum
+
+        self.assertEqual(f({1: 0, 2: 0, 3: 0}), 6)
+
+    def test_collection(self):
+        @jit
+        def f(n):
+            d = newdict(int32, typeof_(Box(0)))
+            for i in range(n):
+                d[i] = Box(i)
+
+            # The boxes are only referenced from the dict's valbuf
+            gc.gc_collect()
+            for i in range(n):
+                p = gc.gc_alloc(100, Pointer[float64])
+
+            sum = 0
+            for i in range(n):
+                sum += d[i].x
+            return sum
+
+        self.assertEqual(f(1000), sum(range(1000)))
+
+
+class TestSets(unittest.TestCase):
+
+    def test_typeof(self):
+        self.assertEqual(typeof(set([1, 2])), Set[int32])
+
+    def test_conversion(self):
+        @jit
+        def f(s):
+            return s
+
+        self.assertEqual(f(set(range(50))), set(range(50)))
+
+    def test_add_discard(self):
+        @jit
+        def f(s, n):
+            for i in range(n):
+                s.add(i)
+            s.discard(0)
+            s.remove(1)
+            return s
+
+        self.assertEqual(f(set([0, -1]), 100), set([-1] + list(range(2, 100))))
+
+    def test_remove_missing(self):
+        # Like KeyError in Python, unlike discard()
+        self.assertTrue(aborts("""
+            from numba2 import jit
+            @jit
+            def f(s, key):
+                s.remove(key)
+            f(set([1]), 2)
+            """))
+
+    def test_contains(self):
+        @jit
+        def f(s, key):
+            return key in s
+
+        self.assertTrue(f(set(["a", "b"]), "a"))
+        self.assertFalse(f(set(["a", "b"]), "c"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, typeof, int32, float64, Pointer
+from numba2.errors import error
+from numba2.tests.support import aborts
+from numba2.runtime.obj.listobject import List, newlist
+from numba2.runtime.special import typeof as typeof_
+from numba2.runtime.gc import boehm as gc
+from numba2.runtime.lib.gc import libgc
+
+
+@jit
+class Box(object):
+    layout = [('x', int32)]
+
+    @jit
+    def __init__(self, x):
+        self.x = x
+
+
+class TestLists(unittest.TestCase):
+
+    def test_typeof(self):
+        self.assertEqual(typeof([1, 2, 3]), List[int32])
+        self.assertEqual(typeof([1.0]), List[float64])
+
+    def test_conversion(self):
+        @jit
+        def f(lst):
+            return lst
+
+        self.assertEqual(f([1, 2, 3]), [1, 2, 3])
+        self.assertEqual(f([1.5, 2.5]), [1.5, 2.5])
+
+    def test_conversion_objects(self):
+        @jit
+        def f(lst):
+            return lst
+
+        # The items point to strings converted along with the list
+        strings = ["a", "bc", "def"]
+        self.assertEqual(f(strings), strings)
+        self.assertEqual(f([(1, 2.0), (3, 4.0)]), [(1, 2.0), (3, 4.0)])
+
+    def test_conversion_keepalive(self):
+        lst = List.fromobject(["a", "bc"], typeof(["a", "bc"]))
+        self.assertTrue(lst.buf.keepalive)
+
+    def test_conversion_memory(self):
+        @jit
+        def f(lst):
+            return len(lst)
+
+        # Converted buffers are collected once Python no longer refers to
+        # them, rather than growing the heap by about 80MB
+        for items in [[1.0] * 10000, [(1, 2.0)] * 5000]:
+            f(items)
+            libgc.GC_gcollect()
+            size = libgc.GC_get_heap_size()
+            for i in range(1000):
+                f(items)
+            libgc.GC_gcollect()
+            self.assertLess(libgc.GC_get_heap_size(), size + 16 * 1024 * 1024)
+
+    def test_getitem(self):
+        @jit
+        def f(lst, i):
+            return lst[i]
+
+        self.assertEqual(f([1, 2, 3], 0), 1)
+        self.assertEqual(f([1, 2, 3], -1), 3)
+
+    def test_setitem(self):
+        @jit
+        def f(lst):
+            lst[1] = 10
+            return lst
+
+        self.assertEqual(f([1, 2, 3]), [1, 10, 3])
+
+    def test_append(self):
+        @jit
+        def f(lst, n):
+            for i in range(n):
+                lst.append(i)
+            return lst
+
+        self.assertEqual(f([-1], 100), [-1] + list(range(100)))
+
+    def test_extend(self):
+        @jit
+        def f(lst, other):
+            lst.extend(other)
+            lst.extend(range(3))
+            return lst
+
+        self.assertEqual(f([1, 2], [3, 4]), [1, 2, 3, 4, 0, 1, 2])
+
+    def test_pop(self):
+        @jit
+        def f(lst):
+            x = lst.pop()
+            y = lst.pop(0)
+            return x + y * 10 + len(lst) * 100
+
+        self.assertEqual(f([1, 2, 3, 4]), 4 + 10 + 200)
+
+    def test_bounds(self):
+        # Out of bounds indices abort instead of raising IndexError
+        self.assertTrue(aborts("""
+            from numba2 import jit
+            @jit
+            def f(lst, i):
+                return lst[i]
+            f([1, 2, 3], 3)
+            """))
+        self.assertTrue(aborts("""
+            from numba2 import jit
+            @jit
+            def f(lst):
+                lst.pop()
+                return lst.pop()
+            f([1])
+            """))
+
+    def test_iter(self):
+        @jit
+        def f(lst):
+            sum = 0
+            for x in lst:
+                sum += x
+            return sum
+
+        self.assertEqual(f([1, 2, 3, 4]), 10)
+
+    def test_slice(self):
+        @jit
+        def f(lst):
+            return lst[1:3]
+
+        @jit
+        def g(lst):
+            return lst[::-2]
+
+        self.assertEqual(f([1, 2, 3, 4]), [2, 3])
+        self.assertEqual(g([1, 2, 3, 4, 5]), [5, 3, 1])
+
+    def test_slice_zero_step(self):
+        @jit
+        def f(lst):
+            return lst[::0]
+
+        self.assertRaises(error, f, [1, 2, 3])
+        self.assertTrue(aborts("""
+            from numba2 import jit
+            @jit
+            def f(lst, step):
+                return lst[::step]
+            f([1, 2, 3], 0)
+            """))
+
+    def test_collection(self):
+        @jit
+        def f(n):
+            boxes = newlist(typeof_(Box(0)), 0)
+            for i in range(n):
+                boxes.append(Box(i))
+
+            # The boxes are only referenced from the list's buffer
+            gc.gc_collect()
+            for i in range(n):
+                p = gc.gc_alloc(100, Pointer[float64])
+
+            sum = 0
+            for box in boxes:
+                sum += box.x
+            return sum
+
+        self.assertEqual(f(1000), sum(range(1000)))
+
+    def test_builtin_list(self):
+        @jit
+        def f(n):
+            return list(range(n))
+
+        self.assertEqual(f(5), [0, 1, 2, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
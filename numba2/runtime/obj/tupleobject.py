@@ -6,6 +6,7 @@ tuple implementation.
 
 from __future__ import print_function, division, absolute_import
 
+import numba2
 from numba2 import jit, sjit, abstract, typeof
 from numba2.conversion import fromobject, toobject
 from .noneobject import NoneType
@@ -54,6 +55,7 @@ class StaticTuple(object):
         else:
             return self.tl[item - 1]
 
+    # TODO: Generator methods are resolved after typing, and are not fused
     @jit('a -> Iterator[T]')
     def __iter__(self):
         yield self.hd
@@ -87,6 +89,10 @@ class StaticTuple(object):
     def __eq__(self, other):
         return self.hd == other.hd and self.tl == other.tl
 
+    @jit('a -> int64')
+    def __hash__(self):
+        return hash(self.hd) * 1000003 ^ hash(self.tl)
+
     @jit('a -> str')
     def __repr__(self):
         return '(%s)' % ", ".join(map(str, self))
@@ -140,6 +146,10 @@ class EmptyTuple(object):
     def __eq__(self, other):
         return isinstance(other, EmptyTuple)
 
+    @jit('a -> int64')
+    def __hash__(self):
+        return numba2.cast(0, numba2.int64)
+
 
 @typeof.case(tuple)
 def typeof(pyval):
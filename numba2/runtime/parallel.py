@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+Runtime support for prange loops, which are outlined by
+compiler/frontend/parallel.py:
+
+    for i in prange(n):             r = range(n)
+        s += f(i)                   nchunks = nthreads(r)
+                                    partials = newpartials(s, 0, nchunks)
+                                    caps = (r, partials)
+                                    run(chunk(caps), caps, r, nchunks)
+                                    for k in range(nchunks):
+                                        s += partials[k]
+
+where chunk(caps) is the address of a native function running the chunks
+of the loop body:
+
+    def body(lo, hi, k, r, partials):
+        s = partials[k]
+        for j in range(lo, hi):
+            i = r[j]
+            s += f(i)
+        partials[k] = s
+
+The worker pool in lib/threadpool.pyx calls the chunk function with a
+pointer to the tuple of captured variables.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import ctypes
+import threading
+
+from numba2 import jit
+from numba2.environment import fresh_env
+from numba2.types import int32, int64
+from numba2.compiler import opaque
+from .obj import Pointer, Void, Buffer
+from .obj.bufferobject import newbuffer
+from .casting import cast
+from .special import typeof
+from .builtins import len, range
+from .lib import threadpool
+
+import cffi
+
+void = Void[()]
+
+#===------------------------------------------------------------------===
+# Decls
+#===------------------------------------------------------------------===
+
+ffi = cffi.FFI()
+
+ffi.cdef("""
+int64_t numba_pool_size(void);
+void numba_parallel_for(void *chunk, void *env, int64_t n, int64_t nchunks);
+""")
+
+# The pool and the collector are initialized by lib/threads.py
+pool = ffi.dlopen(threadpool.__file__)
+
+#===------------------------------------------------------------------===
+# Implementations
+#===------------------------------------------------------------------===
+
+@jit('a -> int64')
+def nthreads(r):
+    """Number of chunks to split the loop over range `r` in"""
+    n = len(r)
+    size = pool.numba_pool_size()
+    if n < 1:
+        return 1
+    elif n < size:
+        return n
+    return size
+
+@jit('a -> int32 -> int64 -> Buffer[a]')
+def newpartials(acc, identity, nchunks):
+    """Partial results of reduction variable `acc`, one for each chunk"""
+    partials = newbuffer(typeof(acc), nchunks)
+    for k in range(nchunks):
+        (partials.p + k).store(cast(identity, typeof(acc)))
+    return partials
+
+@jit('Buffer[a] -> void')
+def freepartials(partials):
+    partials.free()
+
+@jit('Pointer[void] -> a -> b -> int64 -> void')
+def run(chunk, caps, r, nchunks):
+    """Run the chunks of the loop over range `r`, and wait for them"""
+    env = newbuffer(typeof(caps), 1)
+    env.p.store(caps)
+    pool.numba_parallel_for(chunk, cast(env.p, Pointer[void]), len(r),
+                            nchunks)
+    env.free()
+
+#===------------------------------------------------------------------===
+# Chunks
+#===------------------------------------------------------------------===
+
+chunk_template = """
+def chunk(env, lo, hi, k):
+    caps = cast(env, Pointer[T]).deref()
+    body(lo, hi, k, %(args)s)
+"""
+
+def make_chunk(body, ncaps):
+    """
+    Make the opaque function returning the address of the native function
+    that runs chunks of `body`, for the tuple of captured variables:
+
+        chunk(caps) -> Pointer[void]
+
+    `body` takes the `ncaps` captured variables after (lo, hi, k).
+    """
+    @jit('a -> Pointer[void]', opaque=True, scope={})
+    def chunk(caps):
+        raise NotImplementedError("Not implemented at the python level")
+
+    chunks = {} # type of caps -> (jitted chunk, address)
+    lock = threading.Lock()
+
+    def implement(py_func, argtypes):
+        [type] = argtypes
+        with lock:
+            if type not in chunks:
+                chunks[type] = compile_chunk(body, type, ncaps)
+            _, address = chunks[type]
+        return make_address(address, argtypes)
+
+    opaque.implement_opaque(chunk, implement)
+    return chunk
+
+def compile_chunk(body, type, ncaps):
+    """
+    Compile the function called by the worker pool, which unpacks the
+    captured variables of type `type` from its environment.
+    """
+    args = ["caps" + ".tl" * i + ".hd" for i in range(ncaps)]
+    source = chunk_template % {'args': ", ".join(args)}
+    namespace = {'body': body, 'cast': cast, 'Pointer': Pointer, 'T': type}
+    exec(source, namespace)
+
+    chunk = jit(namespace['chunk'], nogil=True)
+    cfunc, restype = chunk.translate((Pointer[void], int64, int64, int64))
+    address = ctypes.cast(cfunc, ctypes.c_void_p)
+    return chunk, address
+
+def make_address(address, argtypes):
+    from numba2 import phase
+
+    @jit
+    def address_impl(caps):
+        return address
+
+    env = fresh_env(address_impl, tuple(argtypes))
+    func, env = phase.opt(address_impl, env)
+    return func
@@ -6,18 +6,44 @@ Special numba functions.
 
 from __future__ import print_function, division, absolute_import
 
-from numba2 import jit, Type, Pointer
+from numba2 import jit
+from numba2.runtime.obj.typeobject import Type
+from numba2.runtime.obj.pointerobject import Pointer
 from numba2.environment import fresh_env
 from numba2.runtime import lowlevel_impls
 from numba2.compiler import opaque
 #from numba2 import phase
 
-__all__ = ['typeof']
+__all__ = ['typeof', 'elemtype', 'pointee']
 
 @jit('a -> Type[a]', opaque=True)
 def typeof(obj):
     raise NotImplementedError("Not implemented at the python level")
 
+def element_type(argtypes):
+    """
+    Infer the type of the items of an iterable, the result type of
+    next(iter(x)).
+    """
+    from numba2 import phase
+    from numba2.runtime import builtins
+
+    [type] = argtypes
+    _, env = phase.apply_phase(phase.typing, builtins.iter, (type,))
+    iterator = env['numba.typing.restype']
+    _, env = phase.apply_phase(phase.typing, builtins.next, (iterator,))
+    return Type[env['numba.typing.restype']]
+
+@jit('a -> Type[b]', opaque=True, infer_restype=element_type)
+def elemtype(obj):
+    """The type of the items of iterable `obj`"""
+    raise NotImplementedError("Not implemented at the python level")
+
+@jit('Pointer[a] -> Type[a]', opaque=True)
+def pointee(p):
+    """The type of the items pointed to by `p`"""
+    raise NotImplementedError("Not implemented at the python level")
+
 @jit('a -> Pointer[void]', opaque=True)
 def addressof(func):
     raise NotImplementedError("Not implemented at the python level")
@@ -30,6 +56,19 @@ def addressof(func):
 
 def make_typeof(py_func, argtypes):
     [type] = argtypes
+    return make_constant(type, argtypes)
+
+def make_elemtype(py_func, argtypes):
+    [type] = element_type(argtypes).parameters
+    return make_constant(type, argtypes)
+
+def make_pointee(py_func, argtypes):
+    [type] = argtypes
+    [base] = type.parameters
+    return make_constant(base, argtypes)
+
+def make_constant(type, argtypes):
+    from numba2 import phase
 
     @jit
     def typeof_impl(obj):
@@ -40,6 +79,8 @@ def make_typeof(py_func, argtypes):
     return func
 
 opaque.implement_opaque(typeof, make_typeof)
+opaque.implement_opaque(elemtype, make_elemtype)
+opaque.implement_opaque(pointee, make_pointee)
 
 ## addressof()
 
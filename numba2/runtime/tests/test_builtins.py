@@ -3,8 +3,11 @@ from __future__ import print_function, division, absolute_import
 
 import unittest
 
-from numba2 import jit
+from numba2 import jit, prod, int32, int64
 from numba2.runtime.obj.rangeobject import len_range
+from numba2.tests.support import aborts
+
+import numpy as np
 
 class TestBuiltins(unittest.TestCase):
 
@@ -24,6 +27,91 @@ class TestBuiltins(unittest.TestCase):
                     self.assertEqual(len_range(start, stop, step),
                                      len(range(start, stop, step)))
 
+    def test_sum(self):
+        @jit
+        def f(xs):
+            return sum(xs)
+
+        # [] has type EmptyList, test the empty case with an array
+        for n in range(1, 10):
+            self.assertEqual(f(list(range(n))), sum(range(n)))
+            self.assertEqual(f([0.5] * n), 0.5 * n)
+        for n in range(10):
+            self.assertEqual(f(np.arange(float(n))), sum(range(n)))
+
+        self.assertEqual(f(np.arange(20.0)[::3]), sum(range(0, 20, 3)))
+
+    def test_sum_range(self):
+        @jit
+        def f(start, stop, step):
+            return sum(range(start, stop, step))
+
+        for start, stop, step in [(0, 10, 1), (-5, 12, 3), (10, -7, -2),
+                                  (3, 3, 1), (5, 0, 1)]:
+            self.assertEqual(f(start, stop, step),
+                             sum(range(start, stop, step)))
+
+    def test_prod(self):
+        @jit
+        def f(xs):
+            return prod(xs)
+
+        self.assertEqual(f([1, 2, 3, 4, 5]), 120)
+        self.assertEqual(f(np.array([0.5, 4.0, 3.0])), 6.0)
+        self.assertEqual(f(np.arange(0.0)), 1.0)
+
+    def test_min_max(self):
+        @jit
+        def f(xs):
+            return min(xs), max(xs)
+
+        self.assertEqual(f([3, -1, 4, 1, -5, 9, 2]), (-5, 9))
+        self.assertEqual(f(np.array([2.5, -0.5, 7.0])), (-0.5, 7.0))
+
+    def test_min_max_range(self):
+        @jit
+        def f(start, stop, step):
+            r = range(start, stop, step)
+            return min(r), max(r)
+
+        for start, stop, step in [(0, 10, 1), (-5, 12, 3), (10, -7, -2)]:
+            r = range(start, stop, step)
+            self.assertEqual(f(start, stop, step), (min(r), max(r)))
+
+    def test_min_max_empty(self):
+        # Python raises ValueError
+        for func in ["min", "max"]:
+            for body, arg in [("%s(xs[1:])", "[1]"),
+                              ("%s(xs)", "np.arange(0.0)"),
+                              ("%s(range(xs))", "0")]:
+                self.assertTrue(aborts("""
+                    import numpy as np
+                    from numba2 import jit
+                    @jit
+                    def f(xs):
+                        return %s
+                    f(%s)
+                    """ % (body % func, arg)), (func, body, arg))
+
+    def test_min_max_range_type(self):
+        @jit
+        def f(n):
+            return min(range(n)) + max(range(n))
+
+        self.assertEqual(f(5), 4)
+        self.assertEqual(f.envs[(int32,)]['numba.typing.restype'], int64)
+
+    def test_any_all(self):
+        @jit
+        def f(xs):
+            return any(xs), all(xs)
+
+        self.assertEqual(f([0, 0, 0]), (False, False))
+        self.assertEqual(f([0, 3, 0]), (True, False))
+        self.assertEqual(f([1, 3, 2]), (True, True))
+        self.assertEqual(f(np.arange(0.0)), (False, True))
+        self.assertEqual(f(np.array([1.0, 0.0])), (True, False))
+
 
 if __name__ == '__main__':
     TestBuiltins('test_isinstance').debug()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""
+Scheduling of compilation work over the callgraph.
+
+Functions are partitioned into waves: a function is scheduled after all of
+its callees, and mutually recursive functions (strongly connected
+components of the callgraph) are processed together as a single task. The
+tasks of a wave are independent, and may run in parallel.
+
+The schedule only depends on the callgraph and the function names and
+argument types (which distinguish specializations of a function), so
+serial and parallel compilation process every function in the same state
+and produce the same results.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+import networkx
+
+#===------------------------------------------------------------------===
+# Schedule
+#===------------------------------------------------------------------===
+
+def waves(graph, funcs):
+    """
+    Partition `funcs` into waves of tasks according to callgraph `graph`
+    (a networkx.DiGraph with edges from callers to callees).
+
+    Returns [[[func]]]: a list of waves, each a list of tasks, each a list
+    of functions.
+    """
+    funcs = set(funcs)
+    subgraph = graph.subgraph(funcs)
+    components = [sorted(scc, key=_funckey)
+                      for scc in networkx.strongly_connected_components(subgraph)]
+    task = {}
+    for i, scc in enumerate(components):
+        for f in scc:
+            task[f] = i
+
+    # -------------------------------------------------
+    # Level: longest chain of callees of each task
+
+    callees = [set() for scc in components]
+    for src, dst in subgraph.edges():
+        if task[src] != task[dst]:
+            callees[task[src]].add(task[dst])
+
+    levels = {}
+    def level(i):
+        if i not in levels:
+            levels[i] = 0 # guard, the condensed graph is acyclic
+            levels[i] = 1 + max([level(j) for j in callees[i]] or [-1])
+        return levels[i]
+
+    result = {}
+    for i, scc in enumerate(components):
+        result.setdefault(level(i), []).append(scc)
+
+    return [sorted(result[l], key=lambda scc: _funckey(scc[0]))
+                for l in sorted(result)]
+
+def _funckey(func):
+    name = getattr(func, 'name', None) or str(func)
+    argtypes = [str(arg.type) for arg in getattr(func, 'args', ())]
+    return (name, argtypes)
+
+#===------------------------------------------------------------------===
+# Execution
+#===------------------------------------------------------------------===
+
+_pools = {}
+_state = threading.local()
+
+def threads(env):
+    """Number of compilation threads to use, 0 for serial compilation"""
+    if env['numba.script'] or getattr(_state, 'worker', False):
+        # Keep debug output ordered, and don't nest pools
+        return 0
+    return env['numba.parallel.threads'] or 0
+
+def parallel_map(f, items, nthreads, pool='compile'):
+    """
+    Map `f` over `items` using `nthreads` threads, returning results in
+    order. If any calls raise an exception, the exception of the first
+    failing item is raised.
+
+    Calls of `f` run on the named thread `pool`. Work that never waits for
+    phase locks may use a pool of its own, so that it can be mapped by
+    threads holding such locks (see phase.py).
+    """
+    items = list(items)
+    if nthreads <= 1 or len(items) <= 1:
+        return [f(item) for item in items]
+
+    key = (pool, nthreads)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = ThreadPool(nthreads)
+
+    def task(item):
+        _state.worker = True
+        try:
+            return True, f(item)
+        except Exception as e:
+            return False, e
+        finally:
+            _state.worker = False
+
+    results = []
+    for ok, result in pool.map(task, items):
+        if not ok:
+            raise result
+        results.append(result)
+    return results
+
+def run_scheduled(f, graph, funcs, env):
+    """
+    Apply `f` to each function in `funcs`, callees before callers, running
+    independent functions in parallel if enabled in `env`.
+    """
+    nthreads = threads(env)
+    for wave in waves(graph, funcs):
+        parallel_map(lambda task: [f(func) for func in task], wave, nthreads)
@@ -5,3 +5,18 @@ Some test support utilities.
 """
 
 from __future__ import print_function, division, absolute_import
+
+import sys
+import signal
+import textwrap
+import subprocess
+
+def aborts(source):
+    """
+    Whether running python `source` in a new process aborts the process,
+    e.g. through a failing ffi.check() in compiled code.
+    """
+    process = subprocess.Popen([sys.executable, '-c', textwrap.dedent(source)],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    process.communicate()
+    return process.returncode == -signal.SIGABRT
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import os
+import imp
+import ctypes
+import shutil
+import tempfile
+import unittest
+
+from numba2 import jit, aot, environment, utils
+from numba2 import int32, float64, uint8, bool_, Pointer
+from numba2.errors import CompileError
+
+@jit
+def add(a, b):
+    return a + b
+
+@jit
+def scale(x):
+    return x * 2.5
+
+class TestAOT(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_mangle(self):
+        self.assertEqual(aot.mangle('f', [int32, float64]), 'f_int32_float64')
+        self.assertEqual(aot.mangle('f', [uint8, bool_, Pointer[float64]]),
+                         'f_uint8_bool_ptr_float64')
+
+    def test_shared_library(self):
+        output = os.path.join(self.dir, 'mylib.so')
+        aot.compile_module(globals(), {
+            'add': ['int32 -> int32 -> int32', 'float64 -> float64 -> float64'],
+            'scale': 'float64 -> float64',
+        }, output)
+
+        lib = ctypes.CDLL(output)
+        cadd = lib.add_int32_int32
+        cadd.restype = ctypes.c_int32
+        self.assertEqual(cadd(2, 3), 5)
+
+        loader = imp.load_source('mylib', os.path.join(self.dir, 'mylib.py'))
+        self.assertEqual(loader.add(2, 3), 5)
+        self.assertEqual(loader.add(2.0, 3.5), 5.5)
+        self.assertEqual(loader.scale(2.0), 5.0)
+
+    def test_function_link_mode(self):
+        @jit
+        def g(x):
+            return x * 3
+
+        @jit
+        def f(x):
+            return g(x) + 1
+
+        root_env = environment.root_env
+        env = dict(root_env)
+        env['numba.link.mode'] = 'function'
+        environment.root_env = utils.FrozenDict(env)
+        try:
+            output = os.path.join(self.dir, 'mylib.so')
+            aot.compile_module({'f': f}, {'f': 'int32 -> int32'}, output)
+        finally:
+            environment.root_env = root_env
+
+        loader = imp.load_source('mylib', os.path.join(self.dir, 'mylib.py'))
+        self.assertEqual(loader.f(2), 7)
+
+    def test_object_file(self):
+        output = os.path.join(self.dir, 'mylib.o')
+        aot.compile_module(globals(), {'add': ['int32 -> int32 -> int32']},
+                           output, emit='object')
+        self.assertTrue(os.path.getsize(output) > 0)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, 'mylib.py')))
+
+    def test_unsupported_signature(self):
+        @jit
+        def first(t):
+            return t[0]
+
+        output = os.path.join(self.dir, 'mylib.so')
+        self.assertRaises(CompileError, aot.compile_module, {'first': first},
+                          {'first': 'Tuple[int32] -> int32'}, output)
+
+
+if __name__ == '__main__':
+    unittest.main()
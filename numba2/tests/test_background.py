@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+import warnings
+
+from numba2 import jit, warmup, int32, float64
+from numba2.background import CompileFuture
+
+class TestBackground(unittest.TestCase):
+
+    def test_fallback(self):
+        @jit(background=True)
+        def f(x):
+            return x * 2
+
+        # The first call runs in the interpreter or the compiled code,
+        # depending on whether the worker already finished
+        self.assertEqual(f(10), 20)
+        [future] = f.futures.values()
+        self.assertIsInstance(future, CompileFuture)
+        self.assertEqual(future.argtypes, [int32])
+        self.assertIn(((int32,), 1), f.matches)
+        stub = future.result(timeout=60)
+        self.assertIs(f.stubs[tuple(future.argtypes)], stub)
+        self.assertEqual(f(10), 20)
+
+    def test_compile_async(self):
+        @jit(background=True)
+        def f(x):
+            return x + 1.0
+
+        future = f.compile_async([float64])
+        self.assertIs(f.compile_async([float64]), future)
+        self.assertTrue(future.wait(60))
+        self.assertIsNone(future.exception())
+
+        done = []
+        future.add_done_callback(done.append)
+        self.assertEqual(done, [future])
+
+    def test_warmup(self):
+        @jit
+        def f(x, y):
+            return x + y
+
+        futures = warmup([(f, 'int32 -> int32 -> int32'),
+                          (f, [float64, float64])], timeout=60)
+        self.assertEqual(len(futures), 2)
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertIn((int32, int32), f.stubs)
+        self.assertIn((float64, float64), f.stubs)
+
+    def test_failure(self):
+        @jit(background=True)
+        def f(x):
+            return undefined_name(x)
+
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            future = f.compile_async([int32])
+            self.assertIsNotNone(future.exception(timeout=60))
+
+        # Keep running in the interpreter
+        self.assertRaises(NameError, f, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
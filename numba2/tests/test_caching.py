@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, int32, float64
+from numba2.caching import LRUDict, release, set_limits, cache_info
+from numba2.environment import root_env
+
+class TestLRUDict(unittest.TestCase):
+
+    def test_maxsize(self):
+        evicted = []
+        d = LRUDict(maxsize=2)
+        d.on_evict.append(lambda key, value: evicted.append(key))
+        d['a'] = 1
+        d['b'] = 2
+        d['a']         # 'b' is now least recently used
+        d['c'] = 3
+        self.assertEqual(sorted(d), ['a', 'c'])
+        self.assertEqual(evicted, ['b'])
+        self.assertEqual(d.info().evictions, 1)
+
+    def test_maxbytes(self):
+        d = LRUDict(maxbytes=10, sizeof=len)
+        d['a'] = 'x' * 6
+        d['b'] = 'x' * 3
+        self.assertEqual(d.nbytes, 9)
+        d['c'] = 'x' * 4
+        self.assertEqual(sorted(d), ['b', 'c'])
+        self.assertEqual(d.nbytes, 7)
+
+    def test_stats(self):
+        d = LRUDict()
+        d['a'] = 1
+        d.get('a')
+        d.get('b')
+        info = d.info()
+        self.assertEqual((info.hits, info.misses, info.size), (1, 1, 1))
+
+
+class TestEviction(unittest.TestCase):
+
+    def tearDown(self):
+        set_limits(None, None)
+
+    def test_release_specialization(self):
+        @jit
+        def f(x):
+            return x * 2
+
+        self.assertEqual(f(2), 4)
+        self.assertEqual(f(2.0), 4.0)
+
+        typings = root_env['numba.typing.cache'].cached
+        keys = dict((key[1], key) for key, (func, env) in typings.items()
+                        if env['numba.state.function_wrapper'] is f)
+        func, env = typings[keys[(int32,)]]
+        release(func, env, root_env)
+
+        # Only the int32 specialization was released
+        self.assertNotIn(keys[(int32,)], typings)
+        self.assertIn(keys[(float64,)], typings)
+        self.assertEqual(list(f.envs), [(float64,)])
+
+        # ... and is recompiled on demand
+        self.assertEqual(f(3), 6)
+        self.assertEqual(set(f.envs), set([(int32,), (float64,)]))
+
+    def test_set_limits(self):
+        @jit
+        def g(x):
+            return x + 1
+
+        self.assertEqual(g(2), 3)
+        self.assertEqual(g(2.0), 3.0)
+
+        # Make the int32 typing of g the least recently used entry
+        typings = root_env['numba.typing.cache'].cached
+        keys = dict((key[1], key) for key, (func, env) in typings.items()
+                        if env['numba.state.function_wrapper'] is g)
+        for key in typings.keys():
+            if key != keys[(int32,)]:
+                typings[key]
+
+        evictions = cache_info()['numba.typing.cache'].evictions
+        set_limits(maxsize=len(typings) - 1, caches=['numba.typing.cache'])
+
+        # The int32 specialization was evicted and released
+        info = cache_info()['numba.typing.cache']
+        self.assertEqual(info.evictions, evictions + 1)
+        self.assertNotIn(keys[(int32,)], typings)
+        self.assertIn(keys[(float64,)], typings)
+        self.assertEqual(list(g.envs), [(float64,)])
+
+        # ... and is recompiled on demand
+        set_limits(None, None)
+        self.assertEqual(g(3), 4)
+        self.assertEqual(set(g.envs), set([(int32,), (float64,)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -33,6 +33,26 @@ class TestCalls(unittest.TestCase):
 
         self.assertEqual(f(), 5)
 
+    def test_fastpath(self):
+        @jit
+        def f(a, b):
+            return a * b
+
+        self.assertEqual(f(3, 4), 12)
+        self.assertEqual(len(f.fastpath), 1)
+        self.assertEqual(f(5, 6), 30)
+        self.assertEqual(f(2.0, 4.0), 8.0)
+        self.assertEqual(len(f.fastpath), 2)
+
+    def test_fastpath_kwargs(self):
+        @jit
+        def f(a, b=2):
+            return a - b
+
+        self.assertEqual(f(5), 3)
+        self.assertEqual(f(5, b=1), 4)
+        self.assertEqual(f.fastpath, {})
+
 
 if __name__ == '__main__':
     #TestCalls("test_optional_args").debug()
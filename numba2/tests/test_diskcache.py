@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from numba2 import jit, environment, phase, int32, float64
+from numba2.config import config
+from numba2.diskcache import fingerprint, DiskCache, Uncacheable
+
+env = environment.root_env
+
+def make_callee(k):
+    def g(x):
+        return x + k
+    return g
+
+def make_caller(callee):
+    @jit
+    def f(x):
+        return callee(x) * 2
+    return f
+
+table = [1, 2, 3]
+array = np.arange(3)
+
+def read_globals(x):
+    return table[x] + array[x]
+
+scale = np.float32(2.0)
+offset = 2 ** 70
+
+def read_scalars(x):
+    return x * scale + offset
+
+class Opaque(object):
+    pass
+
+opaque = Opaque()
+
+def read_opaque(x):
+    return opaque
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_stable(self):
+        f = make_caller(jit(make_callee(1)))
+        self.assertEqual(fingerprint(f, (int32,), env),
+                         fingerprint(f, (int32,), env))
+
+    def test_argtypes(self):
+        f = make_caller(jit(make_callee(1)))
+        self.assertNotEqual(fingerprint(f, (int32,), env),
+                            fingerprint(f, (float64,), env))
+
+    def test_callee_changed(self):
+        f1 = make_caller(jit(make_callee(1)))
+        f2 = make_caller(jit(make_callee(2)))
+        self.assertNotEqual(fingerprint(f1, (int32,), env),
+                            fingerprint(f2, (int32,), env))
+
+    def test_global_mutated(self):
+        f = jit(read_globals)
+        before = fingerprint(f, (int32,), env)
+        table[0] += 1
+        self.assertNotEqual(fingerprint(f, (int32,), env), before)
+        before = fingerprint(f, (int32,), env)
+        array[0] += 1
+        self.assertNotEqual(fingerprint(f, (int32,), env), before)
+
+    def test_scalar_globals(self):
+        global scale, offset
+        f = jit(read_scalars)
+        before = fingerprint(f, (int32,), env)
+        scale = np.float32(3.0)
+        self.assertNotEqual(fingerprint(f, (int32,), env), before)
+        before = fingerprint(f, (int32,), env)
+        offset = 2 ** 71
+        self.assertNotEqual(fingerprint(f, (int32,), env), before)
+
+    def test_unknown_global(self):
+        # Instances may change without us noticing, so they are not cached
+        self.assertRaises(Uncacheable, fingerprint, jit(read_opaque),
+                          (int32,), env)
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.old_dir, config.cache_dir = config.cache_dir, self.dir
+
+    def tearDown(self):
+        config.cache_dir = self.old_dir
+        shutil.rmtree(self.dir)
+
+    def test_roundtrip(self):
+        cache = DiskCache()
+        cache.insert('abcdef', {'name': 'f', 'bitcode': b'', 'restype': None})
+        self.assertTrue(os.path.exists(cache.filename('abcdef')))
+        self.assertEqual(cache.lookup('abcdef')['name'], 'f')
+        self.assertIsNone(cache.lookup('fedcba'))
+
+    def test_reload(self):
+        def f(x):
+            return x * 3 + 1
+
+        self.assertEqual(jit(f)(5), 16)
+        self.assertTrue(os.listdir(self.dir))
+
+        # A fresh wrapper has no in-memory specializations and must load
+        # the compiled code from disk, without compiling it again
+        codegen = phase.codegen
+        def fail(func, env):
+            raise AssertionError("%s was compiled again" % (func,))
+
+        phase.codegen = fail
+        try:
+            self.assertEqual(jit(f)(5), 16)
+        finally:
+            phase.codegen = codegen
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, precompile, int32, float64
+from numba2.eager import declared_signatures
+
+class TestEager(unittest.TestCase):
+
+    def test_eager(self):
+        @jit('int32 -> int32', eager=True)
+        def f(x):
+            return x + 1
+
+        self.assertIn((int32,), f.ctypes_funcs)
+
+    def test_eager_overloads(self):
+        @jit('int32 -> int32', eager=True)
+        def f(x):
+            return x + 1
+
+        @jit('float64 -> float64', eager=True)
+        def f(x):
+            return x + 1.0
+
+        # Only the new overload is compiled when it is declared
+        self.assertEqual(list(f.ctypes_funcs), [(float64,)])
+        self.assertEqual(f(2.0), 3.0)
+
+    def test_declared_signatures(self):
+        @jit('a -> a')
+        def f(x):
+            return x
+
+        @jit('float64 -> float64')
+        def f(x):
+            return x * 2.0
+
+        sigs = declared_signatures(f)
+        self.assertEqual([list(sig.argtypes) for sig in sigs], [[float64]])
+        self.assertEqual(declared_signatures(f, f.py_func), sigs)
+
+    def test_precompile(self):
+        @jit
+        def g(x):
+            return x * 2
+
+        @jit('int32 -> int32')
+        def f(x):
+            return g(x) + 1
+
+        compiled = precompile([f, g], {g: ['float64 -> float64']})
+        self.assertEqual(compiled, [(g, (float64,))])
+
+        compiled = precompile([f, g])
+        self.assertEqual(compiled, [(f, (int32,))])
+        self.assertIn((int32,), f.ctypes_funcs)
+
+    def test_precompile_parallel(self):
+        @jit('int32 -> int32')
+        def f(x):
+            return x + 1
+
+        @jit('float64 -> float64')
+        def g(x):
+            return x + 1.0
+
+        precompile([f, g], threads=2)
+        self.assertIn((int32,), f.ctypes_funcs)
+        self.assertIn((float64,), g.ctypes_funcs)
+
+
+if __name__ == '__main__':
+    unittest.main()
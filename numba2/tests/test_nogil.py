@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import threading
+import unittest
+
+from numba2 import jit, typeof, Object
+from numba2.errors import CompileError
+
+class C(object):
+    def __add__(self, other):
+        return 1
+
+@typeof.case(C)
+def typeof(value):
+    return Object[()]
+
+class TestNoGIL(unittest.TestCase):
+
+    def test_nogil(self):
+        @jit(nogil=True)
+        def f(n):
+            total = 0
+            for i in range(n):
+                total += i
+            return total
+
+        self.assertEqual(f(10), 45)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(f(1000)))
+                       for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [499500] * 4)
+
+    def test_nogil_allocate(self):
+        @jit(nogil=True)
+        def f(n):
+            xs = [0]
+            for i in range(n):
+                xs.append(i)
+            return sum(xs)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(f(1000)))
+                       for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [499500] * 4)
+
+    def test_nogil_stub(self):
+        @jit(nogil=True)
+        def f(x):
+            return x + 1
+
+        self.assertEqual(f(1), 2)
+        [stub] = f.stubs.values()
+        self.assertFalse(stub.cfunc._flags_ & 2) # _FUNCFLAG_PYTHONAPI
+
+    def test_object_requires_gil(self):
+        @jit(nogil=True)
+        def f(obj):
+            return obj + obj
+
+        self.assertRaises(CompileError, f, C())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import jit, profiling
+
+class TestProfiling(unittest.TestCase):
+
+    def test_profile(self):
+        @jit
+        def g(x):
+            return x * 2
+
+        @jit
+        def f(x):
+            return g(x) + 1
+
+        with profiling.profile() as p:
+            self.assertEqual(f(10), 21)
+
+        stats = p.stats()
+        kinds = set(rec['kind'] for rec in stats)
+        self.assertEqual(kinds, set(['pass', 'phase']))
+
+        phases = set(rec['name'] for rec in stats if rec['kind'] == 'phase')
+        self.assertIn('numba.typing', phases)
+        self.assertIn('numba.codegen', phases)
+
+        funcs = set(rec['function'].split('(')[0] for rec in stats)
+        self.assertIn('f', funcs)
+        self.assertIn('g', funcs)
+
+        for rec in stats:
+            self.assertGreaterEqual(rec['time'], 0.0)
+            if rec['kind'] == 'pass':
+                self.assertGreater(rec['calls'], 0)
+
+        summary = p.summary('pass')
+        self.assertTrue(summary)
+        self.assertEqual(sum(t['calls'] for t in summary),
+                         sum(rec['calls'] for rec in stats
+                                 if rec['kind'] == 'pass'))
+        self.assertIn('Pass', p.report())
+
+    def test_cache_hits(self):
+        @jit
+        def f(x):
+            return x + 1
+
+        f(1)
+        with profiling.profile() as p:
+            # Typing and the rest of the pipeline is cached, but apply the
+            # frontend to a new specialization
+            f(1.0)
+
+        hits = sum(rec['cache_hits'] for rec in p.stats())
+        self.assertGreater(hits, 0)
+
+    def test_disabled(self):
+        @jit
+        def f(x):
+            return x + 1
+
+        self.assertIsNone(profiling.current())
+        f(1)
+        self.assertEqual(profiling.stats(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+from collections import namedtuple
+
+import networkx
+
+from numba2 import jit, environment, utils
+from numba2.scheduling import waves, parallel_map
+
+Func = namedtuple('Func', ['name', 'args'])
+Arg = namedtuple('Arg', ['type'])
+
+class TestSchedule(unittest.TestCase):
+
+    def test_waves(self):
+        G = networkx.DiGraph()
+        G.add_edges_from([('main', 'f'), ('main', 'g'), ('f', 'h'),
+                          ('g', 'h'), ('h', 'k'), ('k', 'h')])
+        self.assertEqual(waves(G, G.nodes()),
+                         [[['h', 'k']], [['f'], ['g']], [['main']]])
+
+    def test_waves_specializations(self):
+        f_int = Func('f', (Arg('int32'),))
+        f_float = Func('f', (Arg('float64'),))
+        G = networkx.DiGraph()
+        G.add_nodes_from([f_int, f_float])
+        self.assertEqual(waves(G, [f_int, f_float]),
+                         [[[f_float], [f_int]]])
+        self.assertEqual(waves(G, [f_float, f_int]),
+                         [[[f_float], [f_int]]])
+
+    def test_parallel_map(self):
+        self.assertEqual(parallel_map(lambda x: x * 2, range(10), 4),
+                         [x * 2 for x in range(10)])
+
+    def test_parallel_map_error(self):
+        def f(x):
+            if x in (3, 7):
+                raise ValueError(x)
+            return x
+        try:
+            parallel_map(f, range(10), 4)
+        except ValueError as e:
+            self.assertEqual(e.args, (3,))
+        else:
+            self.fail("Expected a ValueError")
+
+
+class TestParallelCompilation(unittest.TestCase):
+
+    def test_parallel(self):
+        root_env = environment.root_env
+        env = dict(root_env)
+        env['numba.parallel.threads'] = 4
+        environment.root_env = utils.FrozenDict(env)
+        try:
+            @jit
+            def a(x):
+                return x + 1
+            @jit
+            def b(x):
+                return x * 2
+            @jit
+            def c(x):
+                return a(x) + b(x)
+
+            self.assertEqual(c(10), 31)
+        finally:
+            environment.root_env = root_env
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import time
+import unittest
+import threading
+
+from numba2 import jit, phase
+from numba2.utils import LockTable
+from numba2.runtime.lib import threads
+from numba2.runtime.gc import boehm as gc
+
+def run_threads(f, nthreads=8):
+    """Run `f` in `nthreads` threads at once, return results and errors"""
+    start = threading.Event()
+    results, errors = [], []
+
+    def run():
+        start.wait()
+        try:
+            results.append(f())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for i in range(nthreads)]
+    for t in threads:
+        t.start()
+    start.set()
+    for t in threads:
+        t.join()
+    return results, errors
+
+class TestLockTable(unittest.TestCase):
+
+    def test_exclusive(self):
+        table = LockTable()
+        active = []
+        overlaps = []
+
+        def f():
+            with table.lock('key'):
+                active.append(1)
+                if len(active) > 1:
+                    overlaps.append(1)
+                time.sleep(0.001)
+                active.pop()
+
+        results, errors = run_threads(f)
+        self.assertEqual(errors, [])
+        self.assertEqual(overlaps, [])
+        self.assertEqual(len(table), 0)
+
+    def test_reentrant(self):
+        table = LockTable()
+        with table.lock('key'):
+            with table.lock('key'):
+                self.assertEqual(len(table), 1)
+        self.assertEqual(len(table), 0)
+
+    def test_independent_keys(self):
+        table = LockTable()
+        inside = threading.Event()
+
+        def other():
+            with table.lock('b'):
+                inside.set()
+
+        with table.lock('a'):
+            t = threading.Thread(target=other)
+            t.start()
+            self.assertTrue(inside.wait(5))
+            t.join()
+
+
+class TestConcurrentCompilation(unittest.TestCase):
+
+    def test_single_compilation(self):
+        @jit
+        def g(x):
+            return x * 2
+
+        @jit
+        def f(x):
+            return g(x) + 1
+
+        compiled = []
+        translate = f._translate
+        def _translate(argtypes):
+            compiled.append(argtypes)
+            time.sleep(0.01)
+            return translate(argtypes)
+
+        f._translate = _translate
+        results, errors = run_threads(lambda: f(10))
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [21] * 8)
+        self.assertEqual(len(compiled), 1)
+
+    def test_unrelated_functions(self):
+        @jit
+        def f(x):
+            return x + 1
+
+        @jit
+        def g(x):
+            return x * 3
+
+        funcs = [f, g] * 4
+        lock = threading.Lock()
+        def call():
+            with lock:
+                func = funcs.pop()
+            return func(5)
+
+        results, errors = run_threads(call)
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(results), [6] * 4 + [15] * 4)
+
+    def test_parallel_codegen(self):
+        @jit
+        def slow(x):
+            return x + 1
+
+        @jit
+        def fast(x):
+            return x + 2
+
+        @jit
+        def warmup(x):
+            return x + 3
+
+        # Compile the callees shared by slow() and fast()
+        self.assertEqual(warmup(1), 4)
+
+        blocked = threading.Event()
+        release = threading.Event()
+        def block(func, env):
+            if env["numba.state.func_name"] == 'slow':
+                blocked.set()
+                release.wait(10)
+
+        passes = phase.backend_optimize
+        phase.backend_optimize = [block] + passes
+        try:
+            t = threading.Thread(target=slow, args=(1,))
+            t.start()
+            self.assertTrue(blocked.wait(10))
+            # Code generation of fast() doesn't wait for slow()
+            self.assertEqual(fast(1), 3)
+            self.assertTrue(t.is_alive())
+        finally:
+            release.set()
+            phase.backend_optimize = passes
+        t.join()
+
+
+class TestCollectorThreads(unittest.TestCase):
+
+    def test_register_thread(self):
+        @jit
+        def f(x):
+            return x + 1
+
+        def call():
+            result = f(1)
+            return result, threads.local.registered
+
+        results, errors = run_threads(call, nthreads=2)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [(2, True)] * 2)
+
+    def test_allocate(self):
+        @jit
+        def f(n):
+            xs = [0]
+            for i in range(n):
+                xs.append(i)
+            gc.gc_collect()
+            return sum(xs)
+
+        results, errors = run_threads(lambda: f(1000), nthreads=4)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [499500] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division, absolute_import
+
+import unittest
+
+from numba2 import vectorize
+from numba2.runtime import mathlib
+
+import numpy as np
+
+@vectorize
+def axpy(a, x, y):
+    return a * x + y
+
+@vectorize
+def square(x):
+    return x * x
+
+class TestVectorize(unittest.TestCase):
+
+    def test_contiguous(self):
+        x = np.arange(10.0)
+        self.assertTrue(np.all(square(x) == x * x))
+        self.assertEqual(square(x).dtype, x.dtype)
+
+    def test_broadcast(self):
+        x = np.arange(6.0).reshape(2, 3)
+        y = np.arange(3.0)
+        self.assertTrue(np.all(axpy(2.0, x, y) == 2.0 * x + y))
+        self.assertEqual(axpy(2.0, x, y).shape, (2, 3))
+
+    def test_scalar_operands(self):
+        x = np.arange(10.0)
+        y = np.ones(10)
+        self.assertTrue(np.all(axpy(2.0, x, y) == 2.0 * x + y))
+        # Scalars are not broadcast to zero strides
+        self.assertIn(((True, False, False), True, None), axpy.loops)
+
+    def test_strided(self):
+        x = np.arange(24.0).reshape(4, 6)
+        for a in (x[::2], x[:, ::3], x.T, x[::-1]):
+            self.assertTrue(np.all(square(a) == a * a))
+
+    def test_scalar(self):
+        self.assertEqual(square(3.0), 9.0)
+
+    def test_out(self):
+        x = np.arange(10.0)
+        y = np.ones(10)
+        result = axpy(2.0, x, y, out=y)
+        self.assertIs(result, y)
+        self.assertTrue(np.all(y == 2.0 * np.arange(10.0) + 1.0))
+
+    def test_out_strided(self):
+        x = np.arange(5.0)
+        out = np.zeros(10)
+        square(x, out=out[::2])
+        self.assertTrue(np.all(out[::2] == x * x))
+        self.assertTrue(np.all(out[1::2] == 0.0))
+
+    def test_out_cast(self):
+        x = np.arange(10.0)
+        out = np.empty(10, dtype=np.float32)
+        square(x, out=out)
+        self.assertTrue(np.all(out == (x * x).astype(np.float32)))
+
+    def test_out_shape(self):
+        self.assertRaises(ValueError, square, np.arange(10.0),
+                          out=np.empty(5))
+
+    def test_mathlib(self):
+        x = np.linspace(0.1, 0.9, 10)
+        self.assertTrue(np.allclose(mathlib.ufuncs['sin'](x), np.sin(x)))
+        self.assertTrue(np.allclose(mathlib.ufuncs['atan2'](x, x[::-1]),
+                                    np.arctan2(x, x[::-1])))
+
+
+if __name__ == '__main__':
+    unittest.main()
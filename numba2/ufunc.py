@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""
+Elementwise functions over arrays, see vectorize() in entrypoints.py.
+
+    @vectorize
+    def axpy(a, x, y):
+        return a * x + y
+
+    axpy(2.0, np.arange(10.0), np.ones(10))     # broadcasts like NumPy
+    axpy(2.0, x, y, out=y)
+
+The scalar kernel is called from a jitted loop over the broadcast operands.
+Scalar operands are passed to the loop as scalars, and results are cast to
+the dtype of `out` if it differs from the result type of the kernel. Loops
+are generated per combination of scalar and array operands, with two
+variants:
+
+    contiguous: all operands are C-contiguous with the same shape, which
+                we flatten to a unit-stride loop that LLVM can vectorize
+    strided:    a loop over the rows of the broadcast shape, with an inner
+                loop over the last dimension using the strides of each
+                operand (which are 0 for broadcast dimensions)
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import numba2
+from numba2 import jit, typeof
+from numba2.functionwrapper import FunctionWrapper
+from numba2.runtime.obj import Pointer
+from numba2.runtime.obj.array import byteoffset, fromdtype, todtype
+
+import numpy as np
+
+#===------------------------------------------------------------------===
+# UFunc
+#===------------------------------------------------------------------===
+
+class UFunc(object):
+    """
+    Elementwise function built from a scalar kernel by @vectorize.
+    """
+
+    def __init__(self, kernel, **kwds):
+        if not isinstance(kernel, FunctionWrapper):
+            kernel = jit(kernel, **kwds)
+        self.kernel = kernel
+        self.__name__ = kernel.py_func.__name__
+        self.__doc__ = kernel.py_func.__doc__
+        self.loops = {}     # (scalars, contiguous, outtype) -> jitted loop
+        self.restypes = {}  # (argtypes) -> restype of the kernel
+
+    def __call__(self, *args, **kwds):
+        out = kwds.pop('out', None)
+        if kwds:
+            raise TypeError("%s() got unexpected keyword arguments %s" % (
+                self.__name__, ", ".join(kwds)))
+
+        if not args:
+            raise TypeError("%s() takes at least one argument" % (
+                self.__name__,))
+
+        inputs = [np.asarray(arg) for arg in args]
+        scalars = tuple(x.ndim == 0 for x in inputs)
+        values = [x.item() if scalar else x
+                      for x, scalar in zip(inputs, scalars)]
+        argtypes = [typeof(x) if scalar else fromdtype(x.dtype)
+                        for x, scalar in zip(values, scalars)]
+        restype = self.restype(argtypes)
+
+        if out is None:
+            shape = np.broadcast(*inputs).shape
+            out = np.empty(shape, dtype=todtype(restype))
+        elif np.broadcast(*(inputs + [out])).shape != out.shape:
+            raise ValueError("Output array of shape %s does not match the "
+                             "broadcast shape of the inputs" % (out.shape,))
+
+        # Scalars are passed as they are, only arrays are broadcast
+        arrays = [x for x, scalar in zip(values, scalars) if not scalar]
+        arrays = np.broadcast_arrays(*(arrays + [out]))[:-1] + [out]
+        arrays = [np.atleast_1d(x) for x in arrays]
+        contiguous = all(x.flags.c_contiguous and x.shape == arrays[-1].shape
+                         for x in arrays)
+        if contiguous:
+            arrays = [x.reshape(-1) for x in arrays]
+
+        arrays.reverse()
+        operands = [x if scalar else arrays.pop()
+                        for x, scalar in zip(values, scalars)] + arrays
+
+        # Results are cast to the type of `out` if it differs
+        outtype = fromdtype(out.dtype)
+        if outtype == restype:
+            outtype = None
+
+        self.loop(scalars, contiguous, outtype)(*operands)
+        return out if out.ndim else out[()]
+
+    def restype(self, argtypes):
+        """Type of the result of the kernel for scalar arguments `argtypes`"""
+        from numba2 import phase
+
+        key = tuple(argtypes)
+        if key not in self.restypes:
+            _, env = phase.apply_phase(phase.typing, self.kernel, key)
+            self.restypes[key] = env['numba.typing.restype']
+        return self.restypes[key]
+
+    def loop(self, scalars, contiguous, outtype=None):
+        """
+        Loop for operands of which `scalars` indicates which are scalars,
+        casting results to `outtype` if given.
+        """
+        key = (scalars, contiguous, outtype)
+        if key not in self.loops:
+            make_loop = contiguous_loop if contiguous else strided_loop
+            self.loops[key] = make_loop(self.kernel, scalars, outtype)
+        return self.loops[key]
+
+    def __repr__(self):
+        return "<ufunc %s>" % (self.__name__,)
+
+#===------------------------------------------------------------------===
+# Loops
+#===------------------------------------------------------------------===
+
+contiguous_template = """
+def loop(%(args)s, out):
+    %(pointers)s
+    q = out.data
+    for i in range(len(out)):
+        (q + i).store(%(result)s)
+"""
+
+strided_template = """
+def loop(%(args)s, out):
+    ndim = out.shape.size
+    shape = out.shape.p
+    inner = (shape + (ndim - 1)).deref()
+    outer = 1
+    for d in range(ndim - 1):
+        outer = outer * (shape + d).deref()
+
+    %(steps)s
+    t = (out.strides.p + (ndim - 1)).deref()
+    for row in range(outer):
+        %(pointers)s
+        q = byteoffset(out.data, rowoffset(row, shape, out.strides.p, ndim))
+        for j in range(inner):
+            byteoffset(q, j * t).store(%(result)s)
+"""
+
+def contiguous_loop(kernel, scalars, outtype=None):
+    """Loop over flattened C-contiguous operands"""
+    arrays = [i for i, scalar in enumerate(scalars) if not scalar]
+    items = ["a%d" % i if scalar else "(p%d + i).deref()" % i
+                 for i, scalar in enumerate(scalars)]
+    return make_loop(contiguous_template, kernel, outtype, {
+        'args': ", ".join("a%d" % i for i in range(len(scalars))),
+        'pointers': "\n    ".join("p%d = a%d.data" % (i, i) for i in arrays),
+        'items': ", ".join(items),
+    })
+
+def strided_loop(kernel, scalars, outtype=None):
+    """Loop over the rows of operands with arbitrary strides"""
+    arrays = [i for i, scalar in enumerate(scalars) if not scalar]
+    items = ["a%d" % i if scalar else
+             "byteoffset(p%d, j * s%d).deref()" % (i, i)
+                 for i, scalar in enumerate(scalars)]
+    return make_loop(strided_template, kernel, outtype, {
+        'args': ", ".join("a%d" % i for i in range(len(scalars))),
+        'steps': "\n    ".join("s%d = (a%d.strides.p + (ndim - 1)).deref()"
+                               % (i, i) for i in arrays),
+        'pointers': "\n        ".join(
+            "p%d = byteoffset(a%d.data, rowoffset(row, shape, a%d.strides.p, "
+            "ndim))" % (i, i, i) for i in arrays),
+        'items': ", ".join(items),
+    })
+
+def make_loop(template, kernel, outtype, params):
+    result = "kernel(%s)" % (params.pop('items'),)
+    if outtype is not None:
+        result = "cast(%s, outtype)" % (result,)
+    source = template % dict(params, result=result)
+    namespace = {
+        'kernel': kernel,
+        'byteoffset': byteoffset,
+        'rowoffset': rowoffset,
+        'cast': numba2.cast,
+        'outtype': outtype,
+    }
+    exec(source, namespace)
+    return jit(namespace['loop'])
+
+@jit('int64 -> Pointer[int64] -> Pointer[int64] -> int64 -> int64')
+def rowoffset(row, shape, strides, ndim):
+    """Byte offset of row `row` of the outer ndim - 1 dimensions"""
+    offset = numba2.cast(0, numba2.int64)
+    for d in range(ndim - 2, -1, -1):
+        extent = (shape + d).deref()
+        offset = offset + (row % extent) * (strides + d).deref()
+        row = row // extent
+    return offset
@@ -8,6 +8,8 @@ from __future__ import print_function, division, absolute_import
 
 import types
 import functools
+import threading
+from contextlib import contextmanager
 try:
     from collections import MutableMapping
 except ImportError as e:
@@ -119,3 +121,41 @@ class FrozenDict(MutableMapping):
     @classmethod
     def fromkeys(cls, iterable, value=None):
         return cls(dict.fromkeys(iterable, value))
+
+#===------------------------------------------------------------------===
+# Locking
+#===------------------------------------------------------------------===
+
+class LockTable(object):
+    """
+    Table of reentrant locks keyed on arbitrary hashable keys, e.g.
+    (function, argtypes). Locks are allocated on demand and released when
+    no thread holds or waits on them.
+
+        with table.lock(key):
+            ...
+    """
+
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.locks = {} # key -> [RLock, nusers]
+
+    @contextmanager
+    def lock(self, key):
+        with self.mutex:
+            entry = self.locks.get(key)
+            if entry is None:
+                entry = self.locks[key] = [threading.RLock(), 0]
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.mutex:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.locks[key]
+
+    def __len__(self):
+        return len(self.locks)
@@ -120,6 +120,7 @@ setup(
     package_data={
         '': ['*.md'],
         'numba2.runtime.obj': ['*.c', '*.h', '*.pyx', '*.pxd'],
+        'numba2.runtime.lib': ['*.pyx'],
     },
     ext_modules=[
         Extension(
@@ -127,6 +128,10 @@ setup(
             sources=["numba2/runtime/obj/libcpy.pyx"],
             include_dirs=[numpy.get_include()],
             depends=[]),
+        Extension(
+            name="numba2.runtime.lib.threadpool",
+            sources=["numba2/runtime/lib/threadpool.pyx"],
+            libraries=["pthread", "gc"]),
         Extension(
             name="numba2.runtime.gc.boehmlib",
             sources=["numba2/runtime/gc/boehmlib.pyx"],